@@ -1,10 +1,32 @@
 import streamlit as st
+import altair as alt
 import pandas as pd
 import numpy as np
-import math
-import matplotlib.pyplot as plt
-from PIL import Image
+import io
+import logging
+import os
+import urllib.request
+import uuid
+from contextlib import nullcontext
+from matplotlib.figure import Figure
 from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+
+from corrosight_cache import DEFAULT_CACHE_SIZE, ResultCache, inputs_key, open_disk_cache
+from corrosight_charts import (
+    band_chart, curve_chart, envelope_layers, percentile_bands, population_chart, scatter_chart, summary_bars
+)
+from corrosight_incremental import IncrementalAnalyzer
+from corrosight_index import ChainageIndex
+from corrosight_ingest import assess_anomaly_chunk, assess_ili_file, read_ili_file, unmapped_ili_columns
+from corrosight_interaction import assess_interacting_defects
+from corrosight_jobs import JobManager
+from corrosight_matching import apply_growth_rates, growth_rates, match_ili_runs, split_girth_welds
+from corrosight_rainflow import SECONDS_PER_YEAR, assess_pressure_history
+from corrosight_scenarios import ScenarioStore
+from corrosight_store import ProjectionStore, open_or_build_store
+from corrosight_tables import DEFAULT_PAGE_SIZE, highlight_threshold, page_bounds, page_count, page_slice
+from corrosight_timing import StageTimer, profile_call
 
 # Configuration
 st.set_page_config(
@@ -23,6 +45,13 @@ CARD_BG = "#FFFFFF"    # White cards
 DARK_TEXT = "#333333"  # Dark gray text
 LIGHT_TEXT = "#FFFFFF" # White text
 DATASET_COLORS = ["#2E86AB", "#5C6B73", "#F18F01"]
+# Scenarios beyond the first three cycle through this extended palette
+SCENARIO_PALETTE = DATASET_COLORS + ["#6A1B9A", "#C73E1D", "#43A047", "#00838F",
+                                     "#8D6E63", "#AD1457", "#F9A825", "#3949AB", "#546E7A"]
+SCENARIO_MARKERS = ['o', 's', 'D', '^', 'v', 'P', 'X']
+
+def scenario_color(position):
+    return SCENARIO_PALETTE[position % len(SCENARIO_PALETTE)]
 
 # Original color definitions for diagrams
 COLORS = {
@@ -34,6 +63,7 @@ COLORS = {
     'OperatingPoint': '#2E86AB',
     'KeyPoints': '#333333'
 }
+METHOD_COLORS = {'ASME B31G': COLORS['Goodman'], 'DNV-RP-F101': COLORS['Soderberg'], 'PCORRC': COLORS['Gerber']}
 
 # Custom CSS with original colors
 st.markdown(f"""
@@ -174,231 +204,472 @@ st.markdown(f"""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_result_cache():
+    """Analysis result cache shared by every session on this server, persisted on disk across restarts"""
+    return ResultCache(max_entries=DEFAULT_CACHE_SIZE, disk=open_disk_cache())
+
+@st.cache_resource
+def get_job_manager():
+    """Background job pool shared by every session on this server"""
+    return JobManager()
+
+@st.cache_resource
+def get_timing_logger():
+    """Timing logger; JSON records go to stderr when CORROSIGHT_TIMING_LOG is set"""
+    logger = logging.getLogger('corrosight.timing')
+    if os.environ.get('CORROSIGHT_TIMING_LOG'):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    return logger
+
+INTRO_IMAGE_URL = "https://www.researchgate.net/profile/Changqing-Gong/publication/313456917/figure/fig1/AS:573308992266241@1513698923813/Schematic-illustration-of-the-geometry-of-a-typical-corrosion-defect.png"
+ASSET_TIMEOUT = 5
+
+@st.cache_resource(show_spinner=False)
+def load_remote_image(url):
+    """Fetch a remote image once per server, falling back to the URL (fetched by the browser)"""
+    try:
+        with urllib.request.urlopen(url, timeout=ASSET_TIMEOUT) as response:
+            return response.read()
+    except OSError:
+        return url
+
 # Session State Initialization
-if 'datasets' not in st.session_state:
-    st.session_state.datasets = {
-        'Dataset 1': {
-            'inputs': {
-                'pipe_thickness': 0.0,
-                'pipe_diameter': 0.0,
-                'pipe_length': 0.0,
-                'corrosion_length': 0.0,
-                'corrosion_depth': 0.0,
-                'yield_stress': 0.0,
-                'uts': 0.0,
-                'max_pressure': 0.0,
-                'min_pressure': 0.0,
-                'inspection_year': 2023,
-                'radial_corrosion_rate': 0.0,
-                'axial_corrosion_rate': 0.0,
-                'projection_years': 0
-            },
-            'results': None
-        },
-        'Dataset 2': {
-            'inputs': {
-                'pipe_thickness': 0.0,
-                'pipe_diameter': 0.0,
-                'pipe_length': 0.0,
-                'corrosion_length': 0.0,
-                'corrosion_depth': 0.0,
-                'yield_stress': 0.0,
-                'uts': 0.0,
-                'max_pressure': 0.0,
-                'min_pressure': 0.0,
-                'inspection_year': 2023,
-                'radial_corrosion_rate': 0.0,
-                'axial_corrosion_rate': 0.0,
-                'projection_years': 0
-            },
-            'results': None
-        },
-        'Dataset 3': {
-            'inputs': {
-                'pipe_thickness': 0.0,
-                'pipe_diameter': 0.0,
-                'pipe_length': 0.0,
-                'corrosion_length': 0.0,
-                'corrosion_depth': 0.0,
-                'yield_stress': 0.0,
-                'uts': 0.0,
-                'max_pressure': 0.0,
-                'min_pressure': 0.0,
-                'inspection_year': 2023,
-                'radial_corrosion_rate': 0.0,
-                'axial_corrosion_rate': 0.0,
-                'projection_years': 0
-            },
-            'results': None
-        }
-    }
+if 'scenarios' not in st.session_state:
+    st.session_state.scenarios = ScenarioStore.with_defaults()
 
 if 'current_dataset' not in st.session_state:
     st.session_state.current_dataset = 'Dataset 1'
 if 'run_analysis' not in st.session_state:
     st.session_state.run_analysis = False
-if 'show_datasets' not in st.session_state:
-    st.session_state.show_datasets = [True, False, False]  # Default: show only Dataset 1
+if 'ili_results' not in st.session_state:
+    st.session_state.ili_results = None
+if 'ili_interactions' not in st.session_state:
+    st.session_state.ili_interactions = None
+if 'ili_growth' not in st.session_state:
+    st.session_state.ili_growth = None
+if 'ili_index' not in st.session_state:
+    st.session_state.ili_index = None
+if 'ili_store' not in st.session_state:
+    st.session_state.ili_store = None
+if 'ili_ignored' not in st.session_state:
+    st.session_state.ili_ignored = {}
+if 'scada_fatigue' not in st.session_state:
+    st.session_state.scada_fatigue = None
+if 'analyzer' not in st.session_state:
+    st.session_state.analyzer = IncrementalAnalyzer()
+if 'interactive_charts' not in st.session_state:
+    st.session_state.interactive_charts = False
+if 'mc_settings' not in st.session_state:
+    st.session_state.mc_settings = {'enabled': False, 'n_samples': 200_000, 'seed': 0}
+if 'diagnostics' not in st.session_state:
+    st.session_state.diagnostics = {'reruns': 0, 'profile_next': False, 'report': None, 'profile': None}
+if 'job_owner' not in st.session_state:
+    st.session_state.job_owner = uuid.uuid4().hex
+if 'job_partials' not in st.session_state:
+    st.session_state.job_partials = {}
+# Stage timings of the last analysis job, which ran outside any rerun
+if 'analysis_timer' not in st.session_state:
+    st.session_state.analysis_timer = None
 
-# Engineering Calculations
-def modified_asme_b31g(D, t, d, L, Sy):
-    """ASME B31G burst pressure calculation"""
-    if t <= 0 or D <= 0:
-        return 0
-    flow_stress = Sy + 68.95
-    limit = math.sqrt(50 * D * t)
-    if L <= limit:
-        M = math.sqrt(1 + 0.6275 * (L**2) / (D * t) - 0.003375 * (L**4) / ((D * t)**2))
+def stage(name):
+    """Charge the enclosed block to `name` in this rerun's stage timings"""
+    timer = st.session_state.get('stage_timer')
+    return timer.stage(name) if timer is not None else nullcontext()
+
+# Background Jobs
+# Analyses and bulk assessments run on the server's job pool instead of in the
+# script, so widget edits never wait on (or interrupt) them. The script submits
+# jobs, a fragment polls their progress, and collect_jobs() moves finished (and,
+# for analyses, partial) results into session state on the next full rerun.
+JOB_POLL_SECONDS = 1.0
+# Scenarios analysed per step between progress updates and cancellation checks
+ANALYSIS_CHUNK = 64
+JOB_ERRORS = {
+    'analysis': "Error in scenario calculations",
+    'ili': "ILI ingestion failed",
+    'scada': "Pressure history assessment failed"
+}
+
+def detached_upload(upload):
+    """In-memory copy of an uploaded file that stays readable after the rerun that received it"""
+    if upload is None:
+        return None
+    data = upload.getvalue()
+    buffer = io.BytesIO(data)
+    buffer.name = upload.name
+    buffer.size = len(data)
+    return buffer
+
+def read_fraction(source):
+    return source.tell() / source.size if source.size else 1.0
+
+def analysis_job(job, scenarios, keys, cached, cache, analyzer, pof_samples, pof_seed, pof_executor):
+    """Results of `scenarios` ({name: inputs}): `cached` ones as they are, the rest analysed a chunk at a time"""
+    results = dict(cached)
+    missing = [name for name in scenarios if name not in results]
+    if results:
+        job.add_partial(results)
+    analyzer.prune(scenarios)
+    # With Monte Carlo every scenario is slow enough to report on its own
+    size = 1 if pof_samples else ANALYSIS_CHUNK
+    recomputed = {}
+    for start in range(0, len(missing), size):
+        job.progress(start / len(missing), f"{start:,} of {len(missing):,} scenarios analysed")
+        chunk = missing[start:start + size]
+        with job.timer.stage('compute'):
+            computed = analyzer.analyze({name: scenarios[name] for name in chunk}, pof_samples, pof_seed,
+                                        timer=job.timer, pof_executor=pof_executor)
+        with job.timer.stage('cache write'):
+            for name in chunk:
+                cache.put(keys[name], computed[name])
+        for step, n in analyzer.last_run.items():
+            recomputed[step] = recomputed.get(step, 0) + n
+        results.update(computed)
+        job.add_partial(computed)
+    if recomputed:
+        analyzer.last_run = recomputed
+    return results
+
+def ili_job(job, source, previous, inputs):
+    """Session state entries of an assessed ILI listing: results, growth, interactions, index and store"""
+    assessed_rows = 0
+    
+    def assessed(chunk):
+        nonlocal assessed_rows
+        assessed_rows += len(chunk)
+        job.progress(0.8 * read_fraction(source), f"{assessed_rows:,} anomalies assessed")
+    
+    def reading(buffer, offset, label):
+        return lambda _: job.progress(offset + 0.3 * read_fraction(buffer), label)
+    
+    # Numeric columns nobody recognised would silently fall back to the dataset's values
+    ignored = {buffer.name: unmapped_ili_columns(buffer) for buffer in (source, previous) if buffer is not None}
+    if previous is None:
+        results, _ = split_girth_welds(assess_ili_file(source, defaults=inputs, on_chunk=assessed))
+        growth = None
     else:
-        M = 3.3 + 0.032 * (L**2) / (D * t)
-    return (2 * t * flow_stress / D) * ((1 - 0.85 * d/t) / (1 - 0.85 * (d/t) / M))
+        # Per-defect growth rates from the matched previous run replace the dataset's
+        current, welds = split_girth_welds(read_ili_file(
+            source, defaults=inputs, on_chunk=reading(source, 0.0, "Reading the listing")))
+        earlier, earlier_welds = split_girth_welds(read_ili_file(
+            previous, defaults=inputs, on_chunk=reading(previous, 0.3, "Reading the previous run")))
+        job.progress(0.6, "Matching anomalies between runs")
+        matches = match_ili_runs(earlier, current, earlier_welds, welds)
+        rates = growth_rates(earlier, current, matches)
+        job.progress(0.7, "Assessing with matched growth rates")
+        results = assess_anomaly_chunk(apply_growth_rates(current, rates))
+        growth = matches.join(rates)
+    # Interaction grouping and segment queries need positions along the line
+    interactions = index = None
+    if 'chainage' in results:
+        job.progress(0.8, "Grouping interacting defects")
+        results['group'], interactions = assess_interacting_defects(results)
+        index = ChainageIndex(results)
+    # Year-by-year projections live on disk; views map only the slices they show
+    job.progress(0.9, "Writing the projection store")
+    return {'ili_results': results, 'ili_growth': growth, 'ili_interactions': interactions,
+            'ili_index': index, 'ili_store': open_or_build_store(results),
+            'ili_ignored': {name: columns for name, columns in ignored.items() if columns}}
 
-def dnv_rp_f101(D, t, d, L, UTS):
-    """DNV-RP-F101 burst pressure calculation"""
-    if t <= 0 or D <= 0:
-        return 0
-    Q = math.sqrt(1 + 0.31 * (L**2) / (D * t))
-    return 0.9 * UTS * (2 * t / (D - t)) * ((1 - d/t) / (1 - (d/t) / Q))
+def scada_job(job, source, inputs, unit, sample_rate):
+    """Session state entry of a rainflow-counted pressure history"""
+    def counted(counter):
+        job.progress(read_fraction(source), f"{counter.samples:,} samples counted")
+    
+    summary, per_bin, counter = assess_pressure_history(
+        source, inputs, unit=unit, sample_rate=sample_rate, on_chunk=counted)
+    return {'scada_fatigue': {'summary': summary, 'bins': per_bin, 'samples': counter.samples,
+                              'years': counter.samples / sample_rate / SECONDS_PER_YEAR}}
 
-def pcorrc(D, t, d, L, UTS):
-    """PCORRC burst pressure calculation"""
-    if t <= 0 or D <= 0:
-        return 0
-    exponent = -0.224 * L / math.sqrt(D * (t - d))
-    return 0.95 * UTS * (2 * t / D) * (1 - d/t) * (1 - math.exp(exponent))
+def cancel_jobs(slot=None):
+    """Cancel this session's job in `slot` (or all of them) and drop it, so nothing it still produces is collected"""
+    manager = get_job_manager()
+    for job in manager.jobs(st.session_state.job_owner):
+        if slot is None or job.slot == slot:
+            job.cancel()
+            manager.forget(job)
 
-def calculate_pressures(inputs):
-    """Calculate all burst pressures"""
-    t = inputs['pipe_thickness']
-    D = inputs['pipe_diameter']
-    Lc = inputs['corrosion_length']
-    Dc = inputs['corrosion_depth']
-    UTS = inputs['uts']
-    Sy = inputs['yield_stress']
-    
-    # Theoretical models
-    P_vm = (2 * t * UTS) / (math.sqrt(3) * D) if D > 0 else 0
-    P_tresca = (2 * t * UTS) / D if D > 0 else 0
-    
-    # Industry models
-    P_asme = modified_asme_b31g(D, t, Dc, Lc, Sy)
-    P_dnv = dnv_rp_f101(D, t, Dc, Lc, UTS)
-    P_pcorrc = pcorrc(D, t, Dc, Lc, UTS)
-    
-    return {
-        'P_vm': P_vm,
-        'P_tresca': P_tresca,
-        'P_asme': P_asme,
-        'P_dnv': P_dnv,
-        'P_pcorrc': P_pcorrc
-    }
+def collect_jobs():
+    """Apply this session's new partial and finished job results to session state"""
+    manager = get_job_manager()
+    store = st.session_state.scenarios
+    jobs = manager.jobs(st.session_state.job_owner)
+    # Partial counts of replaced, cancelled or collected jobs are no longer needed
+    st.session_state.job_partials = {job.id: st.session_state.job_partials.get(job.id, 0) for job in jobs}
+    for job in jobs:
+        if job.slot == 'analysis':
+            seen = st.session_state.job_partials.get(job.id, 0)
+            partials = job.partials(seen)
+            for partial in partials:
+                store.results.update((name, results) for name, results in partial.items() if name in store)
+            st.session_state.job_partials[job.id] = seen + len(partials)
+        if not job.done:
+            continue
+        manager.forget(job)
+        st.session_state.job_partials.pop(job.id, None)
+        if job.state == 'done' and job.slot == 'analysis':
+            store.results = {name: results for name, results in job.result.items() if name in store}
+            st.session_state.analysis_timer = job.timer
+        elif job.state == 'done':
+            for name, value in job.result.items():
+                st.session_state[name] = value
+        elif job.state == 'failed':
+            st.error(f"{JOB_ERRORS[job.slot]}: {str(job.error)}")
+            if job.slot == 'analysis':
+                store.results = {}
+        else:
+            st.info(f"{job.label} cancelled.")
 
-def calculate_stresses(inputs):
-    """Calculate stress parameters"""
-    t = inputs['pipe_thickness']
-    D = inputs['pipe_diameter']
-    Pop_max = inputs['max_pressure']
-    Pop_min = inputs['min_pressure']
-    
-    if t <= 0:
-        return {
-            'sigma_vm_max': 0, 'sigma_vm_min': 0,
-            'sigma_a': 0, 'sigma_m': 0,
-            'Se': 0, 'sigma_f': 0
-        }
-    
-    # Principal stresses
-    P1_max = Pop_max * D / (2 * t)
-    P2_max = Pop_max * D / (4 * t)
-    P3_max = 0
-    
-    P1_min = Pop_min * D / (2 * t)
-    P2_min = Pop_min * D / (4 * t)
-    P3_min = 0
-    
-    # Von Mises stresses
-    def vm_stress(p1, p2, p3):
-        return (1/math.sqrt(2)) * math.sqrt((p1-p2)**2 + (p2-p3)**2 + (p3-p1)**2)
-    
-    sigma_vm_max = vm_stress(P1_max, P2_max, P3_max)
-    sigma_vm_min = vm_stress(P1_min, P2_min, P3_min)
-    
-    # Fatigue parameters
-    sigma_a = (sigma_vm_max - sigma_vm_min) / 2
-    sigma_m = (sigma_vm_max + sigma_vm_min) / 2
-    Se = 0.5 * inputs['uts']
-    sigma_f = inputs['uts'] + 345
-    
-    return {
-        'sigma_vm_max': sigma_vm_max,
-        'sigma_vm_min': sigma_vm_min,
-        'sigma_a': sigma_a,
-        'sigma_m': sigma_m,
-        'Se': Se,
-        'sigma_f': sigma_f
-    }
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def display_jobs():
+    """Progress of this session's jobs, refreshed on its own; a full rerun draws whatever they finished"""
+    jobs = get_job_manager().jobs(st.session_state.job_owner)
+    for job in jobs:
+        state = 'cancelling' if job.cancelling else job.state
+        label_col, cancel_col = st.columns([5, 1])
+        label_col.progress(job.fraction or 0.0,
+                           text=f"{job.label} — {job.message or state} ({state}, {job.elapsed():,.0f} s)")
+        if not job.done and cancel_col.button('Cancel', key=f'cancel_job_{job.id}', disabled=job.cancelling,
+                                              use_container_width=True):
+            job.cancel()
+    arrived = [job for job in jobs
+               if job.done or job.partials(st.session_state.job_partials.get(job.id, 0))]
+    if arrived or not jobs:
+        st.rerun()
 
-def calculate_fatigue_criteria(sigma_a, sigma_m, Se, UTS, Sy, sigma_f):
-    """Calculate fatigue failure criteria"""
-    return {
-        'Goodman': (sigma_a / Se) + (sigma_m / UTS) if Se > 0 else 0,
-        'Soderberg': (sigma_a / Se) + (sigma_m / Sy) if Se > 0 else 0,
-        'Gerber': (sigma_a / Se) + (sigma_m / UTS)**2 if Se > 0 else 0,
-        'Morrow': (sigma_a / Se) + (sigma_m / sigma_f) if Se > 0 else 0,
-        'ASME-Elliptic': np.sqrt((sigma_a / Se)**2 + (sigma_m / Sy)**2) if Se > 0 else 0
-    }
+# Result Tables
+# Only one page of a table is sent to the browser. Numbers stay numeric and are
+# formatted client-side via column_config; highlighted pages carry their own
+# display formats because a Styler's rendered values take precedence there.
+SAFE = "#43A047"
+HIGHLIGHT_ABOVE = f'color: {WARNING}; font-weight: bold;'
+HIGHLIGHT_BELOW = f'color: {SAFE}; font-weight: normal;'
 
-def calculate_ffs_assessment(inputs, current_depth, current_length):
-    """Fitness-for-Service assessment over time"""
-    results = []
-    failure_years = {}
-    
-    for year in range(inputs['inspection_year'], 
-                     inputs['inspection_year'] + inputs['projection_years'] + 1):
-        years_elapsed = year - inputs['inspection_year']
-        d = current_depth + inputs['radial_corrosion_rate'] * years_elapsed
-        L = current_length + inputs['axial_corrosion_rate'] * years_elapsed
-        
-        # Cap depth at 80% wall thickness
-        d = min(d, inputs['pipe_thickness'] * 0.8)
-        
-        # Calculate burst pressures
-        P_asme = modified_asme_b31g(
-            inputs['pipe_diameter'], inputs['pipe_thickness'], d, L, inputs['yield_stress'])
-        P_dnv = dnv_rp_f101(
-            inputs['pipe_diameter'], inputs['pipe_thickness'], d, L, inputs['uts'])
-        P_pcorrc = pcorrc(
-            inputs['pipe_diameter'], inputs['pipe_thickness'], d, L, inputs['uts'])
-        
-        # Calculate ERF
-        erf_asme = inputs['max_pressure'] / P_asme if P_asme > 0 else 0
-        erf_dnv = inputs['max_pressure'] / P_dnv if P_dnv > 0 else 0
-        erf_pcorrc = inputs['max_pressure'] / P_pcorrc if P_pcorrc > 0 else 0
-        
-        critical_erf = max(erf_asme, erf_dnv, erf_pcorrc)
+def paged_table(frame, key, column_config=None, sort_by=None, ascending=True, highlight=None,
+                formats=None, inclusive=True, height='auto', page_size=DEFAULT_PAGE_SIZE):
+    """st.dataframe of one page of `frame`, with values of the `highlight` columns reaching 1.0 in red"""
+    n_rows = len(frame)
+    page = 1
+    if n_rows > page_size:
+        page_cols = st.columns([1, 4])
+        page = page_cols[0].number_input('Page', min_value=1, max_value=page_count(n_rows, page_size),
+                                         value=1, step=1, key=f'{key}_page')
+        start, stop = page_bounds(n_rows, page, page_size)
+        page_cols[1].caption(f"Rows {start + 1:,}–{stop:,} of {n_rows:,}"
+                             + (f", by {sort_by} {'ascending' if ascending else 'descending'}" if sort_by else ""))
+    rows = page_slice(frame, page, page_size, sort_by, ascending)
+    if highlight:
+        rows = highlight_threshold(rows, highlight, 1.0, HIGHLIGHT_ABOVE, HIGHLIGHT_BELOW, formats, inclusive)
+    elif formats:
+        rows = rows.style.format(formats)
+    st.dataframe(rows, column_config=column_config, height=height, hide_index=True, use_container_width=True)
+
+# Figure Rendering
+# Figures are drawn on bare matplotlib Figure objects (never registered with pyplot,
+# so nothing accumulates in its global figure list), rasterized once and cleared.
+# The encoded bytes are cached on the plotted data and the theme, so unchanged
+# charts cost nothing on rerun. st.cache_data hashes arguments but not globals,
+# so every colour a renderer uses comes in through its `theme` argument.
+FIGURE_THEME = {
+    'background': CARD_BG,
+    'text': DARK_TEXT,
+    'grid': PRIMARY,
+    'warning': WARNING,
+    'colors': COLORS,
+    'markers': tuple(SCENARIO_MARKERS)
+}
+FIGURE_FORMAT = 'png'
+FIGURE_DPI = 150
+FIGURE_CACHE_SIZE = 512
+# Beyond this many scenarios a per-scenario legend is unreadable and is left out
+MAX_LEGEND_ENTRIES = 12
+
+def _figure_bytes(fig):
+    """Encode a finished figure and release everything it holds"""
+    buffer = io.BytesIO()
+    with stage('figure encode'):
+        fig.savefig(buffer, format=FIGURE_FORMAT, dpi=FIGURE_DPI, bbox_inches='tight',
+                    facecolor=fig.get_facecolor())
+    fig.clear()
+    return buffer.getvalue()
+
+def _style_axes(ax, theme):
+    ax.set_facecolor(theme['background'])
+    for spine in ('bottom', 'top', 'right', 'left'):
+        ax.spines[spine].set_color(theme['text'])
+    ax.tick_params(axis='x', colors=theme['text'])
+    ax.tick_params(axis='y', colors=theme['text'])
+
+@st.cache_data(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+def render_burst_projection(theme, dataset_name, year, P_asme, P_dnv, P_pcorrc, maop):
+    fig = Figure(figsize=(10, 5))
+    ax1 = fig.subplots()
+    fig.patch.set_facecolor(theme['background'])
+    
+    ax1.plot(year, P_asme, label='ASME B31G', color=theme['colors']['Goodman'], linewidth=2)
+    ax1.plot(year, P_dnv, label='DNV-RP-F101', color=theme['colors']['Soderberg'], linewidth=2)
+    ax1.plot(year, P_pcorrc, label='PCORRC', color=theme['colors']['Gerber'], linewidth=2)
+    
+    ax1.axhline(y=maop, color=theme['warning'], linestyle='-', linewidth=2.5, label='MAOP')
+    ax1.axhspan(ymin=0, ymax=maop, color=theme['warning'], alpha=0.1, label='Unsafe Zone')
+    
+    pressures = np.concatenate([P_asme, P_dnv, P_pcorrc])
+    y_min = min(pressures.min(), maop * 0.7)
+    y_max = max(pressures.max(), maop * 1.3)
+    ax1.set_ylim(y_min, y_max)
+    
+    ax1.set_xlabel('Year', fontsize=10, color=theme['text'])
+    ax1.set_ylabel('Burst Pressure (MPa)', fontsize=10, color=theme['text'])
+    ax1.set_title(f'Burst Pressure Projection ({dataset_name})', fontsize=12, fontweight='bold', color=theme['text'])
+    ax1.grid(True, linestyle='-', alpha=0.7, color=theme['grid'])
+    ax1.legend(loc='upper right', facecolor=theme['background'], edgecolor=theme['text'])
+    return _figure_bytes(fig)
+
+@st.cache_data(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+def render_erf_projection(theme, dataset_name, year, erf_asme, erf_dnv, erf_pcorrc):
+    fig = Figure(figsize=(10, 5))
+    ax2 = fig.subplots()
+    fig.patch.set_facecolor(theme['background'])
+    
+    ax2.plot(year, erf_asme, label='ASME ERF', color=theme['colors']['Goodman'], linewidth=2)
+    ax2.plot(year, erf_dnv, label='DNV ERF', color=theme['colors']['Soderberg'], linewidth=2)
+    ax2.plot(year, erf_pcorrc, label='PCORRC ERF', color=theme['colors']['Gerber'], linewidth=2)
+    
+    erfs = np.concatenate([erf_asme, erf_dnv, erf_pcorrc])
+    ax2.axhline(y=1.0, color=theme['warning'], linestyle='-', linewidth=2.5, label='Safety Threshold (ERF=1)')
+    erf_max = max(erfs.max(), 1.3)
+    ax2.axhspan(ymin=1.0, ymax=erf_max, color=theme['warning'], alpha=0.1, label='Unsafe Zone')
+    
+    erf_min = min(erfs.min(), 0.7)
+    ax2.set_ylim(erf_min, erf_max)
+    
+    ax2.set_xlabel('Year', fontsize=10, color=theme['text'])
+    ax2.set_ylabel('ERF (MAOP/Burst Pressure)', fontsize=10, color=theme['text'])
+    ax2.set_title(f'ERF Projection ({dataset_name})', fontsize=12, fontweight='bold', color=theme['text'])
+    ax2.grid(True, linestyle='-', alpha=0.7, color=theme['grid'])
+    ax2.legend(loc='upper right', facecolor=theme['background'], edgecolor=theme['text'])
+    return _figure_bytes(fig)
+
+@st.cache_data(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+def render_pof_projection(theme, dataset_name, year, pof_asme, pof_dnv, pof_pcorrc, pof_critical, n_samples):
+    fig = Figure(figsize=(10, 5))
+    ax3 = fig.subplots()
+    fig.patch.set_facecolor(theme['background'])
+    ax3.plot(year, pof_asme, label='ASME B31G', color=theme['colors']['Goodman'], linewidth=2)
+    ax3.plot(year, pof_dnv, label='DNV-RP-F101', color=theme['colors']['Soderberg'], linewidth=2)
+    ax3.plot(year, pof_pcorrc, label='PCORRC', color=theme['colors']['Gerber'], linewidth=2)
+    ax3.plot(year, pof_critical, label='Any Method', color=theme['warning'], linewidth=2.5, linestyle='--')
+    ax3.set_yscale('symlog', linthresh=1e-5)
+    ax3.set_ylim(0, 1)
+    
+    ax3.set_xlabel('Year', fontsize=10, color=theme['text'])
+    ax3.set_ylabel('Cumulative PoF (ERF ≥ 1)', fontsize=10, color=theme['text'])
+    ax3.set_title(f'Probability of Failure ({dataset_name}, {n_samples:,} samples)',
+                  fontsize=12, fontweight='bold', color=theme['text'])
+    ax3.grid(True, linestyle='-', alpha=0.7, color=theme['grid'])
+    ax3.legend(loc='upper left', facecolor=theme['background'], edgecolor=theme['text'])
+    return _figure_bytes(fig)
+
+@st.cache_data(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+def render_stress_distribution(theme, names, colors, values):
+    """Grouped bars of (max, min, amplitude) stress, one row of `values` per scenario"""
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    fig.patch.set_facecolor(theme['background'])
+    
+    categories = ['Max Stress', 'Min Stress', 'Amplitude']
+    visible_count = len(names)
+    width = min(0.25, 0.8 / max(visible_count, 1))
+    x = np.arange(len(categories))
+    
+    # All bars in a single call: scenario offsets down the rows, categories across
+    positions = x[None, :] + width * np.arange(visible_count)[:, None]
+    ax.bar(positions.ravel(), np.asarray(values).ravel(), width,
+           color=np.repeat(colors, len(categories)), edgecolor=theme['text'])
+    if 0 < visible_count <= MAX_LEGEND_ENTRIES:
+        ax.legend(handles=[Patch(facecolor=c, edgecolor=theme['text'], label=n) for n, c in zip(names, colors)])
+    
+    ax.set_ylabel('Stress (MPa)', fontsize=10, color=theme['text'])
+    ax.set_title('Stress Distribution Comparison', fontsize=12, fontweight='bold', color=theme['text'])
+    ax.set_xticks(x + width * (visible_count-1)/2 if visible_count > 0 else 0)
+    ax.set_xticklabels(categories)
+    ax.grid(axis='y', linestyle='--', alpha=0.7, color=theme['grid'])
+    _style_axes(ax, theme)
+    return _figure_bytes(fig)
+
+@st.cache_data(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+def render_fatigue_diagram(theme, envelope, names, colors, sigma_m, sigma_a):
+    """`envelope` is (uts, yield_stress, Se, sigma_f) or None; one operating point per scenario"""
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    fig.patch.set_facecolor(theme['background'])
+    
+    if envelope:
+        uts, yield_stress, Se, sigma_f = envelope
+        # Generate x-axis values
+        x = np.linspace(0, uts*1.1, 100)
         
-        results.append({
-            'year': year,
-            'depth': d,
-            'length': L,
-            'P_asme': P_asme,
-            'P_dnv': P_dnv,
-            'P_pcorrc': P_pcorrc,
-            'erf_asme': erf_asme,
-            'erf_dnv': erf_dnv,
-            'erf_pcorrc': erf_pcorrc,
-            'critical_erf': critical_erf
-        })
+        # Plot all criteria with distinct colors and line styles
+        ax.plot(x, Se*(1 - x/uts),
+                color=theme['colors']['Goodman'], linewidth=2.5, linestyle='-', label='Goodman')
+        ax.plot(x, Se*(1 - x/yield_stress),
+                color=theme['colors']['Soderberg'], linewidth=2.5, linestyle='--', label='Soderberg')
+        ax.plot(x, Se*(1 - (x/uts)**2),
+                color=theme['colors']['Gerber'], linestyle=':', linewidth=2.5, label='Gerber')
+        ax.plot(x, Se*(1 - x/sigma_f),
+                color=theme['colors']['Morrow'], linestyle='-.', linewidth=2.5, label='Morrow')
+        with np.errstate(invalid='ignore'):
+            ax.plot(x, Se*np.sqrt(1 - (x/yield_stress)**2),
+                    color=theme['colors']['ASME-Elliptic'], linestyle=(0, (5, 1)), linewidth=2.5, label='ASME-Elliptic')
         
-        # Track failures
-        if erf_asme >= 1.0 and 'ASME' not in failure_years:
-            failure_years['ASME'] = year
-        if erf_dnv >= 1.0 and 'DNV' not in failure_years:
-            failure_years['DNV'] = year
-        if erf_pcorrc >= 1.0 and 'PCORRC' not in failure_years:
-            failure_years['PCORRC'] = year
-            
-    return results, failure_years
+        # Mark key points
+        ax.scatter(0, Se, color=theme['text'], s=100, marker='o', label=f'Se = {Se:.1f} MPa')
+        ax.scatter(uts, 0, color=theme['text'], s=100, marker='s', label=f'UTS = {uts:.1f} MPa')
+        ax.scatter(yield_stress, 0, color=theme['text'], s=100, marker='^', label=f'Sy = {yield_stress:.1f} MPa')
+    
+    # One scatter call per marker shape rather than per scenario
+    sigma_m, sigma_a = np.asarray(sigma_m), np.asarray(sigma_a)
+    marker_of = np.arange(len(names)) % len(theme['markers'])
+    for m, marker in enumerate(theme['markers']):
+        picked = marker_of == m
+        if picked.any():
+            ax.scatter(sigma_m[picked], sigma_a[picked], color=np.asarray(colors)[picked],
+                       s=150, edgecolor=theme['text'], zorder=10, marker=marker)
+    point_handles = [
+        Line2D([], [], linestyle='none', marker=theme['markers'][i % len(theme['markers'])],
+               markersize=11, markerfacecolor=colors[i], markeredgecolor=theme['text'],
+               label=f'{names[i]} (σm={sigma_m[i]:.1f}, σa={sigma_a[i]:.1f})')
+        for i in range(min(len(names), MAX_LEGEND_ENTRIES))]
+    
+    # Determine axis limits based on all plotted points
+    if len(names):
+        max_x = max(sigma_m.max(), sigma_a.max()) * 1.2
+        max_y = max(sigma_m.max(), sigma_a.max()) * 1.5
+    elif envelope:
+        max_x = uts * 1.1
+        max_y = Se * 1.5
+    else:
+        max_x = 1000
+        max_y = 500
+    
+    ax.set_xlim(0, max_x)
+    ax.set_ylim(0, max_y)
+    
+    ax.set_xlabel('Mean Stress (σm) [MPa]', fontsize=10, color=theme['text'])
+    ax.set_ylabel('Alternating Stress (σa) [MPa]', fontsize=10, color=theme['text'])
+    ax.set_title('Fatigue Analysis Diagram', fontsize=12, fontweight='bold', color=theme['text'])
+    ax.grid(True, linestyle='--', alpha=0.7, color=theme['grid'])
+    _style_axes(ax, theme)
+    
+    # Create custom legend
+    handles, _ = ax.get_legend_handles_labels()
+    ax.legend(handles=handles + point_handles, loc='upper right', bbox_to_anchor=(1.35, 1), fontsize=9,
+              facecolor=theme['background'], edgecolor=theme['text'])
+    return _figure_bytes(fig)
 
 # UI Components
 def create_header():
@@ -422,16 +693,34 @@ def create_sidebar():
         </div>
         """, unsafe_allow_html=True)
         
-        dataset = st.radio(
+        store = st.session_state.scenarios
+        if st.session_state.current_dataset not in store:
+            st.session_state.current_dataset = store.names[0]
+        dataset = st.selectbox(
             "Choose dataset:",
-            ['Dataset 1', 'Dataset 2', 'Dataset 3'],
-            index=['Dataset 1', 'Dataset 2', 'Dataset 3'].index(st.session_state.current_dataset)
+            store.names,
+            index=store.index(st.session_state.current_dataset)
         )
         
         if st.session_state.current_dataset != dataset:
             st.session_state.current_dataset = dataset
             st.rerun()
-            
+        
+        add_col, clone_col, remove_col = st.columns(3)
+        with add_col:
+            if st.button("➕ Add", use_container_width=True):
+                st.session_state.current_dataset = store.add()
+                st.rerun()
+        with clone_col:
+            if st.button("⧉ Clone", use_container_width=True):
+                st.session_state.current_dataset = store.clone(dataset)
+                st.rerun()
+        with remove_col:
+            if st.button("✕ Remove", use_container_width=True, disabled=len(store) <= 1):
+                store.remove(dataset)
+                st.session_state.current_dataset = store.names[0]
+                st.rerun()
+        
         st.markdown("---")
         
         # Dataset visibility controls
@@ -443,14 +732,8 @@ def create_sidebar():
         </div>
         """, unsafe_allow_html=True)
         
-        st.markdown("**Select which datasets to display:**")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.session_state.show_datasets[0] = st.checkbox("Dataset 1", value=st.session_state.show_datasets[0])
-        with col2:
-            st.session_state.show_datasets[1] = st.checkbox("Dataset 2", value=st.session_state.show_datasets[1])
-        with col3:
-            st.session_state.show_datasets[2] = st.checkbox("Dataset 3", value=st.session_state.show_datasets[2])
+        store.set_visible(st.multiselect(
+            "Select which datasets to display:", store.names, default=store.visible_names()))
         
         st.markdown("---")
         
@@ -465,8 +748,7 @@ def create_sidebar():
         </div>
         """, unsafe_allow_html=True)
         
-        current_data = st.session_state.datasets[st.session_state.current_dataset]
-        inputs = current_data['inputs']
+        inputs = store.inputs(st.session_state.current_dataset)
         
         with st.expander("📏 Dimensional Parameters", expanded=True):
             inputs['pipe_thickness'] = st.number_input(
@@ -527,98 +809,72 @@ def create_sidebar():
                 'Projection Period (years)',
                 min_value=0, max_value=50, value=inputs['projection_years'], step=1)
         
+        store.set_inputs(st.session_state.current_dataset, inputs)
+        
+        with st.expander("🎲 Probabilistic Mode", expanded=False):
+            mc = st.session_state.mc_settings
+            mc['enabled'] = st.checkbox("Compute probability of failure", value=mc['enabled'])
+            mc['n_samples'] = st.number_input(
+                'Monte Carlo Samples', min_value=10_000, max_value=10_000_000,
+                value=mc['n_samples'], step=10_000)
+            mc['seed'] = st.number_input('Random Seed', min_value=0, value=mc['seed'], step=1)
+        
+        with st.expander("📂 Bulk ILI Assessment", expanded=False):
+            st.caption("Columns missing from the listing are taken from the current dataset.")
+            ili_file = st.file_uploader("ILI anomaly listing", type=['csv', 'parquet'])
+            previous_file = st.file_uploader("Previous ILI run (optional, for growth rates)",
+                                             type=['csv', 'parquet'])
+            if ili_file is not None and st.button('Assess ILI Listing', use_container_width=True):
+                get_job_manager().submit(st.session_state.job_owner, 'ili', f"Assessing {ili_file.name}", ili_job,
+                                         detached_upload(ili_file), detached_upload(previous_file), dict(inputs))
+        
+        with st.expander("⏱️ SCADA Pressure Fatigue", expanded=False):
+            st.caption("Rainflow-counts a logged pressure history against the current dataset's pipe and material.")
+            scada_file = st.file_uploader("Pressure history", type=['csv', 'parquet'])
+            scada_unit = st.selectbox('Pressure Unit', ['MPa', 'kPa', 'bar', 'psi'])
+            sample_rate = st.number_input('Sample Rate (Hz)', min_value=1e-4, value=1.0, format="%.4f")
+            if scada_file is not None and st.button('Assess Pressure History', use_container_width=True):
+                get_job_manager().submit(st.session_state.job_owner, 'scada', f"Rainflow counting {scada_file.name}",
+                                         scada_job, detached_upload(scada_file), dict(inputs), scada_unit, sample_rate)
+        
+        st.toggle("🖱️ Interactive charts", key='interactive_charts',
+                  help="Zoomable client-side charts; long curves are downsampled and large "
+                       "populations summarized as percentile bands")
+        
         st.markdown("---")
         
         # Action buttons
         if st.button('Run Analysis', use_container_width=True, type="primary"):
             st.session_state.run_analysis = True
-            # Calculate results for all datasets
-            for dataset_name, data in st.session_state.datasets.items():
-                try:
-                    pressures = calculate_pressures(data['inputs'])
-                    stresses = calculate_stresses(data['inputs'])
-                    fatigue = calculate_fatigue_criteria(
-                        stresses['sigma_a'], stresses['sigma_m'],
-                        stresses['Se'], data['inputs']['uts'],
-                        data['inputs']['yield_stress'],
-                        stresses['sigma_f']
-                    )
-                    ffs_results, failure_years = calculate_ffs_assessment(
-                        data['inputs'],
-                        data['inputs']['corrosion_depth'],
-                        data['inputs']['corrosion_length']
-                    )
-                    data['results'] = {
-                        'pressures': pressures,
-                        'stresses': stresses,
-                        'fatigue': fatigue,
-                        'ffs_results': ffs_results,
-                        'failure_years': failure_years
-                    }
-                except Exception as e:
-                    st.error(f"Error in {dataset_name} calculations: {str(e)}")
-                    data['results'] = None
-            st.rerun()
-            
+            # Calculate results for all datasets, reusing any unchanged scenario and
+            # recomputing only the stages whose inputs changed for the others
+            cache = get_result_cache()
+            mc = st.session_state.mc_settings
+            pof_samples = int(mc['n_samples']) if mc['enabled'] else 0
+            pof_seed = int(mc['seed'])
+            scenarios = {name: store.inputs(name) for name in store.names}
+            with stage('cache lookup'):
+                keys = {name: inputs_key(inputs, pof_samples=pof_samples, pof_seed=pof_seed)
+                        for name, inputs in scenarios.items()}
+                cached = {name: cache.get(key) for name, key in keys.items()}
+                cached = {name: results for name, results in cached.items() if results is not None}
+            if len(cached) == len(scenarios):
+                cancel_jobs('analysis')
+                store.results = cached
+            else:
+                manager = get_job_manager()
+                manager.submit(st.session_state.job_owner, 'analysis', f"Analysing {len(scenarios):,} scenarios",
+                               analysis_job, scenarios, keys, cached, cache, st.session_state.analyzer,
+                               pof_samples, pof_seed, manager.pof_executor if pof_samples else None)
+        
         if st.button('Reset All', use_container_width=True):
             st.session_state.run_analysis = False
             # Reset to initial state
-            st.session_state.datasets = {
-        'Dataset 1': {
-            'inputs': {
-                'pipe_thickness': 0.0,
-                'pipe_diameter': 0.0,
-                'pipe_length': 0.0,
-                'corrosion_length': 0.0,
-                'corrosion_depth': 0.0,
-                'yield_stress': 0.0,
-                'uts': 0.0,
-                'max_pressure': 0.0,
-                'min_pressure': 0.0,
-                'inspection_year': 2023,
-                'radial_corrosion_rate': 0.0,
-                'axial_corrosion_rate': 0.0,
-                'projection_years': 0
-            },
-            'results': None
-        },
-        'Dataset 2': {
-            'inputs': {
-                'pipe_thickness': 0.0,
-                'pipe_diameter': 0.0,
-                'pipe_length': 0.0,
-                'corrosion_length': 0.0,
-                'corrosion_depth': 0.0,
-                'yield_stress': 0.0,
-                'uts': 0.0,
-                'max_pressure': 0.0,
-                'min_pressure': 0.0,
-                'inspection_year': 2023,
-                'radial_corrosion_rate': 0.0,
-                'axial_corrosion_rate': 0.0,
-                'projection_years': 0
-            },
-            'results': None
-        },
-        'Dataset 3': {
-            'inputs': {
-                'pipe_thickness': 0.0,
-                'pipe_diameter': 0.0,
-                'pipe_length': 0.0,
-                'corrosion_length': 0.0,
-                'corrosion_depth': 0.0,
-                'yield_stress': 0.0,
-                'uts': 0.0,
-                'max_pressure': 0.0,
-                'min_pressure': 0.0,
-                'inspection_year': 2023,
-                'radial_corrosion_rate': 0.0,
-                'axial_corrosion_rate': 0.0,
-                'projection_years': 0
-            },
-            'results': None
-        }
-    }
+            cancel_jobs()
+            st.session_state.scenarios = ScenarioStore.with_defaults()
+            st.session_state.current_dataset = 'Dataset 1'
+            st.session_state.analyzer = IncrementalAnalyzer()
+            st.session_state.analysis_timer = None
             st.rerun()
         
         st.markdown("---")
@@ -647,8 +903,8 @@ def create_intro_section():
     col1, col2 = st.columns([1, 2])
     
     with col1:
-        st.image("https://www.researchgate.net/profile/Changqing-Gong/publication/313456917/figure/fig1/AS:573308992266241@1513698923813/Schematic-illustration-of-the-geometry-of-a-typical-corrosion-defect.png",
-                 caption="Fig. 1: Corrosion defect geometry")
+        with stage('asset load'):
+            st.image(load_remote_image(INTRO_IMAGE_URL), caption="Fig. 1: Corrosion defect geometry")
     
     with col2:
         st.markdown(f"""
@@ -698,17 +954,19 @@ def create_intro_section():
 
 def display_dataset_results(dataset_name):
     """Display analysis results for a specific dataset"""
-    data = st.session_state.datasets[dataset_name]
-    if not data['results']:
+    store = st.session_state.scenarios
+    results = store.results.get(dataset_name)
+    if not results:
         return
     
-    inputs = data['inputs']
-    results = data['results']
+    inputs = store.inputs(dataset_name)
     pressures = results['pressures']
     stresses = results['stresses']
     ffs_results = results['ffs_results']
     failure_years = results['failure_years']
-    df = pd.DataFrame(ffs_results)
+    remaining_life = results.get('remaining_life', {})
+    with stage('table build'):
+        df = ffs_results.to_frame()
     
     # Dataset header
     st.markdown(f"""
@@ -764,7 +1022,7 @@ def display_dataset_results(dataset_name):
             </div>
         </div>
         """, unsafe_allow_html=True)
-        
+    
     with metric_cols[1]:
         critical_erf = df.iloc[0]['critical_erf']
         status_color = "#43A047" if critical_erf <= 1 else WARNING
@@ -776,110 +1034,150 @@ def display_dataset_results(dataset_name):
             </div>
         </div>
         """, unsafe_allow_html=True)
-        
+    
     with metric_cols[2]:
         asme_fail = failure_years.get('ASME', "Beyond projection")
         color = WARNING if asme_fail != "Beyond projection" else DARK_TEXT
+        asme_life = f"{remaining_life['ASME']:.2f} years remaining" if 'ASME' in remaining_life else "&nbsp;"
         st.markdown(f"""
         <div class="metric-card">
             <div style="font-size:1.1rem; color:{DARK_TEXT};">ASME Failure Year</div>
             <div style="font-size:2rem; font-weight:bold; color:{color}; margin:10px 0;">
                 {asme_fail}
             </div>
+            <div style="font-size:0.9rem; color:{SECONDARY};">{asme_life}</div>
         </div>
         """, unsafe_allow_html=True)
-        
+    
     with metric_cols[3]:
         dnv_fail = failure_years.get('DNV', "Beyond projection")
         color = WARNING if dnv_fail != "Beyond projection" else DARK_TEXT
+        dnv_life = f"{remaining_life['DNV']:.2f} years remaining" if 'DNV' in remaining_life else "&nbsp;"
         st.markdown(f"""
         <div class="metric-card">
             <div style="font-size:1.1rem; color:{DARK_TEXT};">DNV Failure Year</div>
             <div style="font-size:2rem; font-weight:bold; color:{color}; margin:10px 0;">
                 {dnv_fail}
             </div>
+            <div style="font-size:0.9rem; color:{SECONDARY};">{dnv_life}</div>
         </div>
         """, unsafe_allow_html=True)
     
     # 2c. Burst Pressure Projection
     st.markdown(f"<h3>📈 Burst Pressure Projection</h3>", unsafe_allow_html=True)
     
-    fig1, ax1 = plt.subplots(figsize=(10, 5))
-    fig1.patch.set_facecolor(CARD_BG)
-    
-    ax1.plot(df['year'], df['P_asme'], label='ASME B31G', color=COLORS['Goodman'], linewidth=2)
-    ax1.plot(df['year'], df['P_dnv'], label='DNV-RP-F101', color=COLORS['Soderberg'], linewidth=2)
-    ax1.plot(df['year'], df['P_pcorrc'], label='PCORRC', color=COLORS['Gerber'], linewidth=2)
-    
-    maop = inputs['max_pressure']
-    ax1.axhline(y=maop, color=WARNING, linestyle='-', linewidth=2.5, label='MAOP')
-    ax1.axhspan(ymin=0, ymax=maop, color=WARNING, alpha=0.1, label='Unsafe Zone')
-    
-    y_min = min(df[['P_asme','P_dnv','P_pcorrc']].min().min(), maop * 0.7)
-    y_max = max(df[['P_asme','P_dnv','P_pcorrc']].max().max(), maop * 1.3)
-    ax1.set_ylim(y_min, y_max)
-    
-    ax1.set_xlabel('Year', fontsize=10, color=DARK_TEXT)
-    ax1.set_ylabel('Burst Pressure (MPa)', fontsize=10, color=DARK_TEXT)
-    ax1.set_title(f'Burst Pressure Projection ({dataset_name})', fontsize=12, fontweight='bold', color=DARK_TEXT)
-    ax1.grid(True, linestyle='-', alpha=0.7, color=PRIMARY)
-    ax1.legend(loc='upper right', facecolor=CARD_BG, edgecolor=DARK_TEXT)
-    st.pyplot(fig1)
+    with stage('figure build'):
+        if st.session_state.interactive_charts:
+            st.altair_chart(curve_chart(
+                df['year'], {'ASME B31G': df['P_asme'], 'DNV-RP-F101': df['P_dnv'], 'PCORRC': df['P_pcorrc']},
+                METHOD_COLORS, f'Burst Pressure Projection ({dataset_name})', 'Year', 'Burst Pressure (MPa)',
+                rules=[(inputs['max_pressure'], 'MAOP', WARNING)]), use_container_width=True)
+        else:
+            st.image(render_burst_projection(
+                FIGURE_THEME, dataset_name, df['year'].to_numpy(), df['P_asme'].to_numpy(),
+                df['P_dnv'].to_numpy(), df['P_pcorrc'].to_numpy(), inputs['max_pressure']), use_container_width=True)
     
     # 2d. Detailed Burst Pressure Projection Data
-    with st.expander("📊 Detailed Burst Pressure Projection Data", expanded=False):
-        burst_df = df[['year', 'depth', 'length', 'P_asme', 'P_dnv', 'P_pcorrc']].copy()
-        burst_df['Depth'] = burst_df['depth'].apply(lambda x: f"{x:.2f} mm")
-        burst_df['Length'] = burst_df['length'].apply(lambda x: f"{x:.2f} mm")
-        burst_df['ASME Burst'] = burst_df['P_asme'].apply(lambda x: f"{x:.2f} MPa")
-        burst_df['DNV Burst'] = burst_df['P_dnv'].apply(lambda x: f"{x:.2f} MPa")
-        burst_df['PCORRC Burst'] = burst_df['P_pcorrc'].apply(lambda x: f"{x:.2f} MPa")
-        
-        st.dataframe(
-            burst_df[['year', 'Depth', 'Length', 'ASME Burst', 'DNV Burst', 'PCORRC Burst']],
+    with st.expander("📊 Detailed Burst Pressure Projection Data", expanded=False), stage('table build'):
+        paged_table(
+            df[['year', 'depth', 'length', 'P_asme', 'P_dnv', 'P_pcorrc']], f'burst_table_{dataset_name}',
+            column_config={
+                'year': st.column_config.NumberColumn('Year', format="%d"),
+                'depth': st.column_config.NumberColumn('Depth', format="%.2f mm"),
+                'length': st.column_config.NumberColumn('Length', format="%.2f mm"),
+                'P_asme': st.column_config.NumberColumn('ASME Burst', format="%.2f MPa"),
+                'P_dnv': st.column_config.NumberColumn('DNV Burst', format="%.2f MPa"),
+                'P_pcorrc': st.column_config.NumberColumn('PCORRC Burst', format="%.2f MPa")
+            },
             height=300
         )
     
     # 2e. Estimated Repair Factor (ERF) Projection
     st.markdown(f"<h3>📉 Estimated Repair Factor (ERF) Projection</h3>", unsafe_allow_html=True)
     
-    fig2, ax2 = plt.subplots(figsize=(10, 5))
-    fig2.patch.set_facecolor(CARD_BG)
+    with stage('figure build'):
+        if st.session_state.interactive_charts:
+            st.altair_chart(curve_chart(
+                df['year'], {'ASME B31G': df['erf_asme'], 'DNV-RP-F101': df['erf_dnv'], 'PCORRC': df['erf_pcorrc']},
+                METHOD_COLORS, f'ERF Projection ({dataset_name})', 'Year', 'ERF (MAOP/Burst Pressure)',
+                rules=[(1.0, 'Safety Threshold (ERF=1)', WARNING)]), use_container_width=True)
+        else:
+            st.image(render_erf_projection(
+                FIGURE_THEME, dataset_name, df['year'].to_numpy(), df['erf_asme'].to_numpy(),
+                df['erf_dnv'].to_numpy(), df['erf_pcorrc'].to_numpy()), use_container_width=True)
     
-    ax2.plot(df['year'], df['erf_asme'], label='ASME ERF', color=COLORS['Goodman'], linewidth=2)
-    ax2.plot(df['year'], df['erf_dnv'], label='DNV ERF', color=COLORS['Soderberg'], linewidth=2)
-    ax2.plot(df['year'], df['erf_pcorrc'], label='PCORRC ERF', color=COLORS['Gerber'], linewidth=2)
+    # 2f. Probability of Failure Projection
+    if 'pof' in results:
+        pof = results['pof']
+        st.markdown(f"<h3>🎲 Probability of Failure Projection</h3>", unsafe_allow_html=True)
+        
+        with stage('figure build'):
+            if st.session_state.interactive_charts:
+                st.altair_chart(curve_chart(
+                    pof['year'], {'ASME B31G': pof['ASME'], 'DNV-RP-F101': pof['DNV'], 'PCORRC': pof['PCORRC'],
+                                  'Any Method': pof['critical']},
+                    {**METHOD_COLORS, 'Any Method': WARNING},
+                    f"Probability of Failure ({dataset_name}, {pof['n_samples']:,} samples)", 'Year',
+                    'Cumulative PoF (ERF ≥ 1)', y_scale=alt.Scale(type='symlog', constant=1e-5)),
+                    use_container_width=True)
+            else:
+                st.image(render_pof_projection(
+                    FIGURE_THEME, dataset_name, pof['year'], pof['ASME'], pof['DNV'], pof['PCORRC'],
+                    pof['critical'], pof['n_samples']), use_container_width=True)
     
-    ax2.axhline(y=1.0, color=WARNING, linestyle='-', linewidth=2.5, label='Safety Threshold (ERF=1)')
-    erf_max = max(df[['erf_asme','erf_dnv','erf_pcorrc']].max().max(), 1.3)
-    ax2.axhspan(ymin=1.0, ymax=erf_max, color=WARNING, alpha=0.1, label='Unsafe Zone')
+    # 2g. Detailed ERF Projection Data
+    with st.expander("📈 Detailed ERF Projection Data", expanded=False), stage('table build'):
+        # Highlight failure years
+        erf_df = df[['year', 'erf_asme', 'erf_dnv', 'erf_pcorrc', 'critical_erf']].rename(columns={
+            'year': 'Year', 'erf_asme': 'ASME ERF', 'erf_dnv': 'DNV ERF', 'erf_pcorrc': 'PCORRC ERF',
+            'critical_erf': 'Critical ERF'})
+        paged_table(erf_df, f'erf_table_{dataset_name}', highlight=['Critical ERF'],
+                    formats={column: '{:.3f}' for column in erf_df.columns[1:]}, height=300)
+
+def display_scenario_comparison():
+    """Side-by-side summary of every visible scenario with results"""
+    store = st.session_state.scenarios
+    names = [name for name in store.visible_names() if store.results.get(name)]
+    if len(names) < 2:
+        return
     
-    erf_min = min(df[['erf_asme','erf_dnv','erf_pcorrc']].min().min(), 0.7)
-    ax2.set_ylim(erf_min, erf_max)
+    st.markdown(f"""
+    <div class="section-header">
+        <h2 style="margin:0;">Scenario Comparison</h2>
+    </div>
+    """, unsafe_allow_html=True)
     
-    ax2.set_xlabel('Year', fontsize=10, color=DARK_TEXT)
-    ax2.set_ylabel('ERF (MAOP/Burst Pressure)', fontsize=10, color=DARK_TEXT)
-    ax2.set_title(f'ERF Projection ({dataset_name})', fontsize=12, fontweight='bold', color=DARK_TEXT)
-    ax2.grid(True, linestyle='-', alpha=0.7, color=PRIMARY)
-    ax2.legend(loc='upper right', facecolor=CARD_BG, edgecolor=DARK_TEXT)
-    st.pyplot(fig2)
-    
-    # 2f. Detailed ERF Projection Data
-    with st.expander("📈 Detailed ERF Projection Data", expanded=False):
-        erf_df = df[['year', 'erf_asme', 'erf_dnv', 'erf_pcorrc', 'critical_erf']].copy()
-        erf_df['Critical ERF'] = erf_df['critical_erf'].apply(lambda x: f"{x:.3f}")
-        
-        # Highlight failure years
-        def highlight_erf(val):
-            erf = float(val)
-            color = WARNING if erf >= 1.0 else "#43A047"
-            weight = "bold" if erf >= 1.0 else "normal"
-            return f'color: {color}; font-weight: {weight};'
+    with stage('table build'):
+        rows = [store.index(name) for name in names]
+        pressures = store.result_matrix(names, 'pressures', ('P_asme', 'P_dnv', 'P_pcorrc'))
+        maop = store.columns['max_pressure'][rows][:, None]
+        erf_now = np.where(pressures > 0, maop / np.where(pressures > 0, pressures, 1.0), 0.0)
+        failure_years = store.result_matrix(names, 'failure_years', ('ASME', 'DNV', 'PCORRC'))
+        remaining_life = store.result_matrix(names, 'remaining_life', ('ASME', 'DNV', 'PCORRC'))
         
-        st.dataframe(
-            erf_df.style.applymap(highlight_erf, subset=['Critical ERF']),
-            height=300
-        )
+        comparison = pd.DataFrame({
+            'Dataset': names,
+            'Critical ERF Now': erf_now.max(axis=1),
+            'ASME Failure Year': failure_years[:, 0],
+            'DNV Failure Year': failure_years[:, 1],
+            'PCORRC Failure Year': failure_years[:, 2],
+            'Min Remaining Life (years)': np.nanmin(np.where(np.isnan(remaining_life), np.inf, remaining_life), axis=1)
+        })
+        comparison['Min Remaining Life (years)'] = comparison['Min Remaining Life (years)'].replace(np.inf, np.nan)
+        st.dataframe(comparison, height=min(400, 40 + 35 * len(names)), hide_index=True)
+    
+    # Every scenario's ERF curve is only drawn client-side, collapsed into bands for large sets
+    if st.session_state.interactive_charts:
+        with stage('figure build'):
+            grids = [store.results[name]['ffs_results'] for name in names]
+            years = np.unique(np.concatenate([g['year'] for g in grids]))
+            erf = np.full((len(names), years.size), np.nan)
+            for row, grid in zip(erf, grids):
+                row[np.searchsorted(years, grid['year'])] = grid['critical_erf']
+            st.altair_chart(population_chart(
+                years, names, erf, [scenario_color(store.index(name)) for name in names],
+                'Critical ERF Projection', 'Year', 'Critical ERF', rules=[(1.0, 'ERF=1', WARNING)],
+                band_color=PRIMARY), use_container_width=True)
 
 def display_stress_analysis():
     """Display combined stress analysis for selected datasets"""
@@ -892,167 +1190,60 @@ def display_stress_analysis():
     # 5a. Stress Parameters
     st.markdown(f"<h3>⚙️ Stress Parameters</h3>", unsafe_allow_html=True)
     
+    # Visible scenarios with results, gathered once into per-field columns
+    store = st.session_state.scenarios
+    names = [name for name in store.visible_names() if store.results.get(name)]
+    colors = tuple(scenario_color(store.index(name)) for name in names)
+    stress_keys = ('sigma_vm_max', 'sigma_vm_min', 'sigma_a', 'sigma_m', 'Se', 'sigma_f')
+    stress_matrix = store.result_matrix(names, 'stresses', stress_keys)
+    
     # Create table of stress parameters - only for visible datasets
-    stress_data = []
-    for i in range(3):
-        if st.session_state.show_datasets[i]:
-            dataset_name = f'Dataset {i+1}'
-            data = st.session_state.datasets[dataset_name]
-            if data['results']:
-                s = data['results']['stresses']
-                stress_data.append({
-                    'Dataset': dataset_name,
-                    'Max VM Stress (MPa)': f"{s['sigma_vm_max']:.2f}",
-                    'Min VM Stress (MPa)': f"{s['sigma_vm_min']:.2f}",
-                    'Alternating Stress (MPa)': f"{s['sigma_a']:.2f}",
-                    'Mean Stress (MPa)': f"{s['sigma_m']:.2f}",
-                    'Endurance Limit (MPa)': f"{s['Se']:.2f}"
-                })
-    
-    if stress_data:
-        st.table(pd.DataFrame(stress_data))
+    if names:
+        with stage('table build'):
+            stress_table = pd.DataFrame(
+                np.char.mod('%.2f', stress_matrix[:, :5]),
+                columns=['Max VM Stress (MPa)', 'Min VM Stress (MPa)', 'Alternating Stress (MPa)',
+                         'Mean Stress (MPa)', 'Endurance Limit (MPa)'])
+            stress_table.insert(0, 'Dataset', names)
+            st.table(stress_table)
     
     # 5b. Stress Distribution Graph - only for visible datasets
     st.markdown(f"<h3>📊 Stress Distribution Comparison</h3>", unsafe_allow_html=True)
     
-    if any(data['results'] for data in st.session_state.datasets.values()):
-        fig, ax = plt.subplots(figsize=(10, 6))
-        fig.patch.set_facecolor(CARD_BG)
-        
-        categories = ['Max Stress', 'Min Stress', 'Amplitude']
-        width = 0.25
-        x = np.arange(len(categories))
-        
-        # Track number of visible datasets for positioning
-        visible_count = 0
-        for i in range(3):
-            if st.session_state.show_datasets[i]:
-                dataset_name = f'Dataset {i+1}'
-                data = st.session_state.datasets[dataset_name]
-                if data['results']:
-                    s = data['results']['stresses']
-                    values = [s['sigma_vm_max'], s['sigma_vm_min'], s['sigma_a']]
-                    ax.bar(x + visible_count * width, values, width, 
-                          color=DATASET_COLORS[i], edgecolor=DARK_TEXT,
-                          label=dataset_name)
-                    visible_count += 1
-        
-        ax.set_ylabel('Stress (MPa)', fontsize=10, color=DARK_TEXT)
-        ax.set_title('Stress Distribution Comparison', fontsize=12, fontweight='bold', color=DARK_TEXT)
-        ax.set_xticks(x + width * (visible_count-1)/2 if visible_count > 0 else 0)
-        ax.set_xticklabels(categories)
-        ax.grid(axis='y', linestyle='--', alpha=0.7, color=PRIMARY)
-        ax.legend()
-        ax.set_facecolor(CARD_BG)
-        
-        # Set axis and tick colors
-        ax.spines['bottom'].set_color(DARK_TEXT)
-        ax.spines['top'].set_color(DARK_TEXT)
-        ax.spines['right'].set_color(DARK_TEXT)
-        ax.spines['left'].set_color(DARK_TEXT)
-        ax.tick_params(axis='x', colors=DARK_TEXT)
-        ax.tick_params(axis='y', colors=DARK_TEXT)
-        
-        st.pyplot(fig)
+    if store.results:
+        with stage('figure build'):
+            if st.session_state.interactive_charts:
+                st.altair_chart(summary_bars(['Max Stress', 'Min Stress', 'Amplitude'], names,
+                                             stress_matrix[:, :3], colors, 'Stress Distribution Comparison',
+                                             'Stress (MPa)'), use_container_width=True)
+            else:
+                st.image(render_stress_distribution(FIGURE_THEME, tuple(names), colors, stress_matrix[:, :3]),
+                         use_container_width=True)
     
     # 5c. Fatigue Graph - only for visible datasets
     st.markdown(f"<h3>🔄 Fatigue Analysis Diagram</h3>", unsafe_allow_html=True)
     
-    # Get active datasets
-    active_datasets = []
-    for i in range(3):
-        if st.session_state.show_datasets[i]:
-            dataset_name = f'Dataset {i+1}'
-            data = st.session_state.datasets[dataset_name]
-            if data['results']:
-                active_datasets.append((dataset_name, data))
-    
-    if any(data['results'] for name, data in active_datasets):
-        fig, ax = plt.subplots(figsize=(10, 6))
-        fig.patch.set_facecolor(CARD_BG)
-        
+    if names:
         # Use the first active dataset for the envelopes
-        ref_dataset = active_datasets[0][1] if active_datasets else None
-        
-        if ref_dataset:
-            # Use the first available dataset for the envelopes
-            stresses = ref_dataset['results']['stresses']
-            inputs = ref_dataset['inputs']
-            
-            # Generate x-axis values
-            x = np.linspace(0, inputs['uts']*1.1, 100)
-            
-            # Plot all criteria with distinct colors and line styles
-            ax.plot(x, stresses['Se']*(1 - x/inputs['uts']), 
-                    color=COLORS['Goodman'], linewidth=2.5, linestyle='-', label='Goodman')
-            ax.plot(x, stresses['Se']*(1 - x/inputs['yield_stress']), 
-                    color=COLORS['Soderberg'], linewidth=2.5, linestyle='--', label='Soderberg')
-            ax.plot(x, stresses['Se']*(1 - (x/inputs['uts'])**2), 
-                    color=COLORS['Gerber'], linestyle=':', linewidth=2.5, label='Gerber')
-            ax.plot(x, stresses['Se']*(1 - x/stresses['sigma_f']), 
-                    color=COLORS['Morrow'], linestyle='-.', linewidth=2.5, label='Morrow')
-            ax.plot(x, stresses['Se']*np.sqrt(1 - (x/inputs['yield_stress'])**2), 
-                    color=COLORS['ASME-Elliptic'], linestyle=(0, (5, 1)), linewidth=2.5, label='ASME-Elliptic')
-            
-            # Mark key points
-            ax.scatter(0, stresses['Se'], color=DARK_TEXT, s=100, marker='o', 
-                      label=f'Se = {stresses["Se"]:.1f} MPa')
-            ax.scatter(inputs['uts'], 0, color=DARK_TEXT, s=100, marker='s', 
-                      label=f'UTS = {inputs["uts"]:.1f} MPa')
-            ax.scatter(inputs['yield_stress'], 0, color=DARK_TEXT, s=100, marker='^', 
-                      label=f'Sy = {inputs["yield_stress"]:.1f} MPa')
-        
-        # Plot operating points for active datasets with results
-        markers = ['o', 's', 'D']  # Circle, Square, Diamond
-        for i, (dataset_name, data) in enumerate(active_datasets):
-            if data['results']:
-                ds = data['results']['stresses']
-                ax.scatter(ds['sigma_m'], ds['sigma_a'], 
-                          color=DATASET_COLORS[i], s=150, edgecolor=DARK_TEXT, zorder=10,
-                          marker=markers[i], label=f'{dataset_name} (σm={ds["sigma_m"]:.1f}, σa={ds["sigma_a"]:.1f})')
-        
-        # Determine axis limits based on all plotted points
-        all_points = []
-        for dataset_name, data in active_datasets:
-            if data['results']:
-                ds = data['results']['stresses']
-                all_points.append(ds['sigma_m'])
-                all_points.append(ds['sigma_a'])
-        
-        if all_points:
-            max_x = max(all_points) * 1.2
-            max_y = max(all_points) * 1.5
-        elif ref_dataset:
-            max_x = inputs['uts'] * 1.1
-            max_y = stresses['Se'] * 1.5
-        else:
-            max_x = 1000
-            max_y = 500
-        
-        ax.set_xlim(0, max_x)
-        ax.set_ylim(0, max_y)
-        
-        ax.set_xlabel('Mean Stress (σm) [MPa]', fontsize=10, color=DARK_TEXT)
-        ax.set_ylabel('Alternating Stress (σa) [MPa]', fontsize=10, color=DARK_TEXT)
-        ax.set_title('Fatigue Analysis Diagram', fontsize=12, fontweight='bold', color=DARK_TEXT)
-        ax.grid(True, linestyle='--', alpha=0.7, color=PRIMARY)
-        ax.set_facecolor(CARD_BG)
-        
-        # Set axis and tick colors
-        ax.spines['bottom'].set_color(DARK_TEXT)
-        ax.spines['top'].set_color(DARK_TEXT)
-        ax.spines['right'].set_color(DARK_TEXT)
-        ax.spines['left'].set_color(DARK_TEXT)
-        ax.tick_params(axis='x', colors=DARK_TEXT)
-        ax.tick_params(axis='y', colors=DARK_TEXT)
-        
-        # Create custom legend
-        ax.legend(loc='upper right', bbox_to_anchor=(1.35, 1), fontsize=9, 
-                 facecolor=CARD_BG, edgecolor=DARK_TEXT)
-        
-        st.pyplot(fig)
+        ref_inputs = store.inputs(names[0])
+        envelope = (ref_inputs['uts'], ref_inputs['yield_stress'], stress_matrix[0, 4], stress_matrix[0, 5])
+        with stage('figure build'):
+            if st.session_state.interactive_charts:
+                st.altair_chart(scatter_chart(
+                    stress_matrix[:, 3], stress_matrix[:, 2], names, colors, 'Fatigue Analysis Diagram',
+                    'Mean Stress (σm) [MPa]', 'Alternating Stress (σa) [MPa]',
+                    layers=[envelope_layers(*envelope, COLORS)]), use_container_width=True)
+            else:
+                st.image(render_fatigue_diagram(FIGURE_THEME, envelope, tuple(names), colors,
+                                                stress_matrix[:, 3], stress_matrix[:, 2]),
+                         use_container_width=True)
         
         # Add interpretation guide
+        legend = ''.join(f"""
+                    <div style="display: flex; align-items: center;">
+                        <div style="background: {color}; width:20px; height:20px; border-radius:50%; margin-right:5px;"></div>
+                        <span>{name}</span>
+                    </div>""" for name, color in zip(names, colors))
         with st.expander("🔍 Diagram Interpretation Guide", expanded=True):
             st.markdown(f"""
             <div style="background:{CARD_BG}; padding:15px; border-radius:8px; 
@@ -1066,18 +1257,7 @@ def display_stress_analysis():
                     <li>Safety margin is indicated by <strong>distance to the nearest curve</strong></li>
                 </ul>
                 <div style="display: flex; flex-wrap: wrap; gap: 15px; margin-top: 15px;">
-                    <div style="display: flex; align-items: center;">
-                        <div style="background: {DATASET_COLORS[0]}; width:20px; height:20px; border-radius:50%; margin-right:5px;"></div>
-                        <span>Dataset 1</span>
-                    </div>
-                    <div style="display: flex; align-items: center;">
-                        <div style="background: {DATASET_COLORS[1]}; width:20px; height:20px; border-radius:50%; margin-right:5px;"></div>
-                        <span>Dataset 2</span>
-                    </div>
-                    <div style="display: flex; align-items: center;">
-                        <div style="background: {DATASET_COLORS[2]}; width:20px; height:20px; border-radius:50%; margin-right:5px;"></div>
-                        <span>Dataset 3</span>
-                    </div>
+                    {legend}
                 </div>
             </div>
             """, unsafe_allow_html=True)
@@ -1085,38 +1265,16 @@ def display_stress_analysis():
     # 5d. Detailed Comparisons - only for visible datasets
     st.markdown(f"<h3>📝 Detailed Fatigue Criteria Comparison</h3>", unsafe_allow_html=True)
     
-    fatigue_data = []
-    for i in range(3):
-        if st.session_state.show_datasets[i]:
-            dataset_name = f'Dataset {i+1}'
-            data = st.session_state.datasets[dataset_name]
-            if data['results']:
-                f = data['results']['fatigue']
-                fatigue_data.append({
-                    'Dataset': dataset_name,
-                    'Goodman Factor': f"{f['Goodman']:.3f}",
-                    'Soderberg Factor': f"{f['Soderberg']:.3f}",
-                    'Gerber Factor': f"{f['Gerber']:.3f}",
-                    'Morrow Factor': f"{f['Morrow']:.3f}",
-                    'ASME-Elliptic Factor': f"{f['ASME-Elliptic']:.3f}"
-                })
-    
-    if fatigue_data:
-        df_fatigue = pd.DataFrame(fatigue_data)
-        
-        # Apply styling to highlight safety status
-        def highlight_fatigue(val):
-            factor = float(val)
-            color = "#43A047" if factor <= 1.0 else WARNING
-            weight = "bold" if factor > 1.0 else "normal"
-            return f'color: {color}; font-weight: {weight};'
-        
-        styled_df = df_fatigue.style.applymap(highlight_fatigue, 
-                                            subset=['Goodman Factor', 'Soderberg Factor', 
-                                                    'Gerber Factor', 'Morrow Factor', 
-                                                    'ASME-Elliptic Factor'])
-        
-        st.table(styled_df)
+    if names:
+        with stage('table build'):
+            fatigue_keys = ('Goodman', 'Soderberg', 'Gerber', 'Morrow', 'ASME-Elliptic')
+            factor_columns = [f'{key} Factor' for key in fatigue_keys]
+            df_fatigue = pd.DataFrame(store.result_matrix(names, 'fatigue', fatigue_keys), columns=factor_columns)
+            df_fatigue.insert(0, 'Dataset', names)
+            
+            # Apply styling to highlight safety status
+            paged_table(df_fatigue, 'fatigue_table', highlight=factor_columns, inclusive=False,
+                        formats={column: '{:.3f}' for column in factor_columns})
         
         # Safety explanation
         st.markdown(f"""
@@ -1132,6 +1290,141 @@ def display_stress_analysis():
         </div>
         """, unsafe_allow_html=True)
 
+PROJECTION_TOP_N = 100
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def store_erf_bands(path):
+    """Critical ERF percentile bands per projection year of a stored anomaly population"""
+    store = ProjectionStore.open(path)
+    return percentile_bands(np.arange(store.years), store.column('critical_erf'))
+
+def display_ili_results():
+    """Display the bulk ILI assessment table"""
+    results = st.session_state.ili_results
+    st.markdown(f"""
+    <div class="section-header">
+        <h2 style="margin:0;">Bulk ILI Assessment</h2>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    for name, columns in st.session_state.ili_ignored.items():
+        st.warning(f"{name}: columns not recognised, so ignored: {', '.join(columns)}. "
+                   "Rename them to a supported header if they hold inputs.")
+    
+    metric_cols = st.columns(3)
+    metric_cols[0].metric("Anomalies Assessed", f"{len(results):,}")
+    metric_cols[1].metric("Critical ERF ≥ 1 Now", f"{int((results['critical_erf'] >= 1.0).sum()):,}")
+    metric_cols[2].metric("Max Critical ERF", f"{results['critical_erf'].max():.3f}" if len(results) else "-")
+    
+    with stage('table build'):
+        paged_table(results, 'ili_table', sort_by='critical_erf', ascending=False, highlight=['critical_erf'],
+                    height=400)
+    # Encoded only when clicked rather than on every rerun
+    st.download_button("Download Results (CSV)", lambda: results.to_csv(index=False),
+                       file_name="ili_assessment.csv", mime="text/csv")
+    
+    growth = st.session_state.ili_growth
+    if growth is not None:
+        st.markdown(f"<h3>📐 Run-to-Run Growth</h3>", unsafe_allow_html=True)
+        matched = growth['matched'].notna()
+        metric_cols = st.columns(3)
+        metric_cols[0].metric("Matched Anomalies", f"{int(matched.sum()):,} of {len(growth):,}")
+        metric_cols[1].metric("Median Depth Growth", f"{growth['radial_corrosion_rate'].median():.3f} mm/yr"
+                              if matched.any() else "-")
+        metric_cols[2].metric("Median Length Growth", f"{growth['axial_corrosion_rate'].median():.3f} mm/yr"
+                              if matched.any() else "-")
+        st.caption("Unmatched (new) anomalies are projected with the median matched rates.")
+    
+    index = st.session_state.ili_index
+    if index is not None and len(index):
+        st.markdown(f"<h3>📍 Segment Query</h3>", unsafe_allow_html=True)
+        query_cols = st.columns(3)
+        kp_from = query_cols[0].number_input('From KP (km)', value=float(index.chainage[0]) / 1000.0,
+                                             step=0.1, format="%.3f")
+        kp_to = query_cols[1].number_input('To KP (km)', value=float(index.chainage[-1]) / 1000.0,
+                                           step=0.1, format="%.3f")
+        year = query_cols[2].selectbox('Year', ['Now'] + index.years.tolist())
+        segment = index.query(kp_from * 1000.0, kp_to * 1000.0, None if year == 'Now' else year)
+        
+        worst_id = results.at[segment['max_critical_erf_row'], 'anomaly_id'] \
+            if segment['max_critical_erf_row'] is not None and 'anomaly_id' in results else None
+        metric_cols = st.columns(4)
+        metric_cols[0].metric("Anomalies in Segment", f"{segment['count']:,}")
+        metric_cols[1].metric("Max Critical ERF", "-" if np.isnan(segment['max_critical_erf'])
+                              else f"{segment['max_critical_erf']:.3f}",
+                              help=None if worst_id is None else f"Anomaly {worst_id}")
+        metric_cols[2].metric("Critical ERF ≥ 1", f"{segment['exceeding']:,}")
+        metric_cols[3].metric("Earliest Failure Year", "-" if np.isnan(segment['earliest_failure_year'])
+                              else f"{int(segment['earliest_failure_year'])}")
+    
+    store = st.session_state.ili_store
+    if store is not None and len(store) and store.years:
+        st.markdown(f"<h3>📅 Projection by Year</h3>", unsafe_allow_html=True)
+        elapsed = st.slider('Years After Inspection', 0, store.years - 1, 0)
+        critical = store.year('critical_erf', elapsed)
+        with stage('compute'):
+            exceeding = int(np.count_nonzero(critical >= 1.0))
+            ranked = np.nan_to_num(critical, nan=-np.inf)
+            worst = np.argpartition(ranked, -min(PROJECTION_TOP_N, ranked.size))[-PROJECTION_TOP_N:]
+            worst = worst[np.argsort(ranked[worst])[::-1]]
+        metric_cols = st.columns(2)
+        metric_cols[0].metric("Critical ERF ≥ 1", f"{exceeding:,}")
+        metric_cols[1].metric("Max Critical ERF", f"{ranked[worst[0]]:.3f}" if np.isfinite(ranked[worst[0]]) else "-")
+        with stage('table build'):
+            ids = [c for c in ('anomaly_id', 'chainage') if c in results]
+            top = results.iloc[worst][ids].reset_index(drop=True)
+            for field in ('depth', 'length', 'critical_erf'):
+                top[field] = store.column(field)[worst, elapsed]
+            st.dataframe(top, height=300, hide_index=True)
+        st.caption(f"Worst {PROJECTION_TOP_N} anomalies; the full projection is stored at {store.path}.")
+        if st.session_state.interactive_charts:
+            with stage('figure build'):
+                st.altair_chart(band_chart(
+                    store_erf_bands(str(store.path)), PRIMARY, f'Critical ERF of {len(store):,} Anomalies',
+                    'Years After Inspection', 'Critical ERF', rules=[(1.0, 'ERF=1', WARNING)]),
+                    use_container_width=True)
+    
+    interactions = st.session_state.ili_interactions
+    if interactions is not None and len(interactions):
+        st.markdown(f"<h3>🔗 Interacting Defects (DNV-RP-F101)</h3>", unsafe_allow_html=True)
+        st.caption("Anomalies closer than 2√(D·t) axially and π√(D·t) circumferentially are combined; "
+                   "each row is the governing combination of adjacent defects in a group.")
+        metric_cols = st.columns(3)
+        metric_cols[0].metric("Interacting Groups", f"{len(interactions):,}")
+        metric_cols[1].metric("Anomalies in Groups", f"{int(interactions['n_defects'].sum()):,}")
+        metric_cols[2].metric("Combined Critical ERF ≥ 1", f"{int((interactions['critical_erf'] >= 1.0).sum()):,}")
+        with stage('table build'):
+            paged_table(interactions, 'interaction_table', sort_by='critical_erf', ascending=False,
+                        highlight=['critical_erf'], height=400)
+
+def display_scada_fatigue():
+    """Display the Miner's-rule damage of the rainflow-counted pressure history"""
+    fatigue = st.session_state.scada_fatigue
+    st.markdown(f"""
+    <div class="section-header">
+        <h2 style="margin:0;">SCADA Pressure Fatigue</h2>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    bins = fatigue['bins']
+    metric_cols = st.columns(3)
+    metric_cols[0].metric("Samples", f"{fatigue['samples']:,}")
+    metric_cols[1].metric("Logged Period", f"{fatigue['years'] * 365.25:,.1f} days")
+    metric_cols[2].metric("Rainflow Cycles", f"{bins['cycles'].sum():,.1f}")
+    
+    with stage('table build'):
+        summary = pd.DataFrame([{'Criterion': name, 'Miner Damage': values['damage'],
+                                 'Fatigue Life (years)': values['life_years']}
+                                for name, values in fatigue['summary'].items()])
+        st.dataframe(summary.style.format({'Miner Damage': '{:.3e}', 'Fatigue Life (years)': '{:,.1f}'}),
+                     hide_index=True, use_container_width=True)
+        st.caption("Cycles are binned by pressure range and mean; equivalent fully reversed amplitudes "
+                   "follow each mean-stress criterion, with lives from a Basquin curve through the "
+                   "endurance limit. The open residue counts as half cycles.")
+        paged_table(bins, 'rainflow_table', sort_by='damage_Goodman', ascending=False, height=300)
+    st.download_button("Download Cycle Histogram (CSV)", lambda: bins.to_csv(index=False),
+                       file_name="rainflow_histogram.csv", mime="text/csv")
+
 def create_references():
     st.markdown(f"""
     <div class="section-header">
@@ -1183,28 +1476,73 @@ def create_footer():
                 <p style="margin:0; color:#BBDEFB;">Aflfliation:</p>
                 <p style="margin:0; color:#BBDEF8;">Dr. Adel Aldhahebi(Project Supervisor)</p>
                 <p style="margin:0; color:#BBDEF8;">Russell Spielberg(Project Leader)</p>
+            </div>
+        </div>
+        <div style="text-align:center; margin-top:15px; color:#BBDEFB;">
             © 2026 Pipeline Engineering Solutions | All rights reserved
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
 
+def display_timings(rows):
+    """Table of StageTimer.summary() rows"""
+    timings = pd.DataFrame(rows)
+    timings['share'] *= 100
+    st.dataframe(timings, hide_index=True, column_config={
+        'stage': 'Stage',
+        'ms': st.column_config.NumberColumn('Time (ms)', format="%.1f"),
+        'calls': 'Calls',
+        'share': st.column_config.ProgressColumn('Share', min_value=0.0, max_value=100.0, format="%.0f%%")
+    })
+
+def create_diagnostics_panel():
+    """Sidebar expander with the stage timings of this rerun and an optional cProfile capture"""
+    diagnostics = st.session_state.diagnostics
+    timer = st.session_state.stage_timer
+    with st.sidebar, st.expander("🩺 Diagnostics", expanded=False):
+        st.caption(f"Rerun {diagnostics['reruns']}: {timer.elapsed() * 1e3:,.1f} ms")
+        display_timings(timer.summary())
+        analysis_timer = st.session_state.analysis_timer
+        if analysis_timer is not None:
+            st.caption(f"Last analysis job: {analysis_timer.elapsed() * 1e3:,.1f} ms")
+            # Only the stages the job ran; the rest are rerun stages
+            display_timings([row for row in analysis_timer.summary() if row['calls'] or row['stage'] == 'other'])
+        recomputed = {name: n for name, n in st.session_state.analyzer.last_run.items() if n}
+        cache = get_result_cache()
+        st.caption(f"Result cache: {len(cache):,} in memory"
+                   + (f", {len(cache.disk):,} on disk ({cache.disk.size_bytes() / 2**20:,.1f} MB)" if cache.disk is not None else "")
+                   + f"; {cache.hits:,} hits, {cache.disk_hits:,} from disk, {cache.misses:,} misses")
+        if recomputed:
+            st.caption("Last analysis recomputed: " + ", ".join(f"{name} ×{n}" for name, n in recomputed.items()))
+        if st.button('Profile Next Rerun', use_container_width=True):
+            diagnostics['profile_next'] = True
+            st.rerun()
+        if diagnostics['report']:
+            st.code(diagnostics['report'], language=None)
+            st.download_button("Download Profile (.prof)", diagnostics['profile'],
+                               file_name="corrosight_rerun.prof", mime="application/octet-stream")
 
 # Main Application
 def main():
     create_header()
     create_sidebar()
+    collect_jobs()
+    if get_job_manager().jobs(st.session_state.job_owner):
+        display_jobs()
     
     # 1. Pipeline Configuration
     create_intro_section()
     
     if st.session_state.run_analysis:
         # Only show datasets that are selected
-        if st.session_state.show_datasets[0]:
-            display_dataset_results('Dataset 1')
-        if st.session_state.show_datasets[1]:
-            display_dataset_results('Dataset 2')
-        if st.session_state.show_datasets[2]:
-            display_dataset_results('Dataset 3')
+        store = st.session_state.scenarios
+        for dataset_name in store.visible_names():
+            display_dataset_results(dataset_name)
         
-        # Only show stress analysis if at least one dataset is selected
-        if any(st.session_state.show_datasets):
+        # Only show comparison and stress analysis if at least one dataset is selected
+        if store.visible.any():
+            display_scenario_comparison()
             display_stress_analysis()
         else:
             st.warning("No datasets selected for analysis. Please select at least one dataset to view results.")
@@ -1221,8 +1559,26 @@ def main():
         </div>
         """, unsafe_allow_html=True)
     
+    if st.session_state.ili_results is not None:
+        display_ili_results()
+    
+    if st.session_state.scada_fatigue is not None:
+        display_scada_fatigue()
+    
     create_references()
     create_footer()
 
 if __name__ == "__main__":
-    main()
+    get_timing_logger()
+    st.session_state.stage_timer = StageTimer()
+    diagnostics = st.session_state.diagnostics
+    diagnostics['reruns'] += 1
+    if diagnostics['profile_next']:
+        diagnostics['profile_next'] = False
+        _, diagnostics['report'], diagnostics['profile'] = profile_call(main)
+    else:
+        main()
+    st.session_state.stage_timer.log(rerun=diagnostics['reruns'],
+                                     scenarios=len(st.session_state.scenarios),
+                                     visible=len(st.session_state.scenarios.visible_names()))
+    create_diagnostics_panel()
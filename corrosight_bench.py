@@ -0,0 +1,221 @@
+"""Reproducible benchmarks for the assessment kernels, a full analysis and the results page.
+
+    python corrosight_bench.py                              # run and print
+    python corrosight_bench.py --save baseline.json         # record a baseline
+    python corrosight_bench.py --compare baseline.json      # flag regressions (exit status 1)
+
+Timings are best-of-`repeat` wall clock with no tracing active; peak memory comes
+from a separate tracemalloc pass (NumPy reports its buffers to tracemalloc).
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+from corrosight_core import (
+    DEFAULT_INPUTS, INPUT_FIELDS, analyze_batch, batch_results_row, calculate_ffs_assessment,
+    dnv_rp_f101, dnv_rp_f101_array, modified_asme_b31g, modified_asme_b31g_array, pcorrc,
+    pcorrc_array
+)
+
+DEFECT_COUNTS = (1, 1_000, 100_000, 1_000_000)
+HORIZONS = (10, 30, 50)
+ANALYSIS_CHUNK = 50_000
+MIN_TIME = 0.2
+DEFAULT_TOLERANCE = 0.3
+
+def synthetic_batch(n, horizon, seed=0):
+    """`n` plausible defects on an X65-like line, drawn from a fixed seed"""
+    rng = np.random.default_rng(seed)
+    t = rng.uniform(8.0, 16.0, n)
+    return {
+        'pipe_thickness': t,
+        'pipe_diameter': rng.choice([323.9, 406.4, 610.0, 914.0], n),
+        'pipe_length': np.full(n, float(DEFAULT_INPUTS['pipe_length'])),
+        'corrosion_length': rng.uniform(10.0, 400.0, n),
+        'corrosion_depth': t * rng.uniform(0.05, 0.6, n),
+        'yield_stress': rng.uniform(360.0, 485.0, n),
+        'uts': rng.uniform(460.0, 570.0, n),
+        'max_pressure': rng.uniform(4.0, 10.0, n),
+        'min_pressure': rng.uniform(0.5, 3.0, n),
+        'inspection_year': np.full(n, 2023),
+        'radial_corrosion_rate': rng.uniform(0.0, 0.4, n),
+        'axial_corrosion_rate': rng.uniform(0.0, 2.0, n),
+        'projection_years': np.full(n, horizon)
+    }
+
+def _row(columns, i=0):
+    return {field: columns[field][i].item() for field in INPUT_FIELDS}
+
+def measure(fn, repeat=5, min_time=MIN_TIME):
+    """Best seconds per call of `fn` and peak traced bytes of one extra call"""
+    started = time.perf_counter()
+    fn()
+    first = time.perf_counter() - started
+    number = max(1, math.ceil(min_time / first)) if first < min_time else 1
+    best = first if number == 1 else math.inf
+    for _ in range(repeat if first < 10 * min_time else 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - started) / number)
+    
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+# Benchmark Cases
+def kernel_cases(sizes):
+    for n in sizes:
+        c = synthetic_batch(n, 30)
+        args = [c[f] for f in ('pipe_diameter', 'pipe_thickness', 'corrosion_depth', 'corrosion_length')]
+        yield f'kernel.asme[{n}]', n, None, lambda a=args, c=c: modified_asme_b31g_array(*a, c['yield_stress'])
+        yield f'kernel.dnv[{n}]', n, None, lambda a=args, c=c: dnv_rp_f101_array(*a, c['uts'])
+        yield f'kernel.pcorrc[{n}]', n, None, lambda a=args, c=c: pcorrc_array(*a, c['uts'])
+
+def scalar_cases():
+    i = _row(synthetic_batch(1, 30))
+    args = (i['pipe_diameter'], i['pipe_thickness'], i['corrosion_depth'], i['corrosion_length'])
+    yield 'scalar.modified_asme_b31g', 1, None, lambda: modified_asme_b31g(*args, i['yield_stress'])
+    yield 'scalar.dnv_rp_f101', 1, None, lambda: dnv_rp_f101(*args, i['uts'])
+    yield 'scalar.pcorrc', 1, None, lambda: pcorrc(*args, i['uts'])
+
+def ffs_cases(horizons):
+    for horizon in horizons:
+        i = _row(synthetic_batch(1, horizon))
+        yield f'ffs.calculate_ffs_assessment[{horizon}y]', 1, horizon, \
+            lambda i=i: calculate_ffs_assessment(i, i['corrosion_depth'], i['corrosion_length'])
+
+def analysis_cases(sizes, horizons):
+    """The deterministic "Run Analysis" compute path, chunked as the batch CLI does"""
+    for n in sizes:
+        for horizon in horizons:
+            c = synthetic_batch(n, horizon)
+            
+            def run(c=c, n=n):
+                for start in range(0, n, ANALYSIS_CHUNK):
+                    batch = analyze_batch({f: v[start:start + ANALYSIS_CHUNK] for f, v in c.items()})
+                if n == 1:
+                    batch_results_row(batch, 0)
+            yield f'analysis[{n}x{horizon}y]', n, horizon, run
+
+def render_cases(horizons):
+    """A full rerun of the results page for one analysed dataset, cold and warm figure cache"""
+    from streamlit.logger import set_log_level
+    from streamlit.testing.v1 import AppTest
+    import streamlit as st
+    from corrosight_scenarios import ScenarioStore
+    
+    # Bare-mode runs warn about the missing script context on every element
+    set_log_level('error')
+    warnings.simplefilter('ignore', FutureWarning)
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'CorroSight.py')
+    for horizon in horizons:
+        store = ScenarioStore.with_defaults(1)
+        store.set_inputs('Dataset 1', _row(synthetic_batch(1, horizon)))
+        store.results = {'Dataset 1': batch_results_row(analyze_batch(store.batch()), 0)}
+        
+        def rerun(store=store, cold=True):
+            if cold:
+                st.cache_data.clear()
+            at = AppTest.from_file(app, default_timeout=120)
+            at.session_state['scenarios'] = store
+            at.session_state['run_analysis'] = True
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+        yield f'render.cold[{horizon}y]', 1, horizon, rerun
+        yield f'render.warm[{horizon}y]', 1, horizon, lambda rerun=rerun: rerun(cold=False)
+
+def run_suite(sizes=DEFECT_COUNTS, horizons=HORIZONS, render=True, repeat=5, log=None):
+    """Run every case and return {'meta': ..., 'cases': {name: measurement}}"""
+    groups = [kernel_cases(sizes), scalar_cases(), ffs_cases(horizons), analysis_cases(sizes, horizons)]
+    if render:
+        groups.append(render_cases(horizons))
+    cases = {}
+    for group in groups:
+        for name, n, horizon, fn in group:
+            seconds, peak = measure(fn, repeat=repeat)
+            cases[name] = {
+                'n': n,
+                'horizon': horizon,
+                'seconds': seconds,
+                'throughput': n / seconds,
+                'peak_mb': peak / 2**20
+            }
+            if log:
+                log(name, cases[name])
+    return {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count()
+        },
+        'cases': cases
+    }
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Cases whose time grew by more than `tolerance` over the baseline: [(name, ratio), ...]"""
+    regressions = []
+    for name, case in current['cases'].items():
+        previous = baseline['cases'].get(name)
+        if previous and case['seconds'] > previous['seconds'] * (1 + tolerance):
+            regressions.append((name, case['seconds'] / previous['seconds']))
+    return regressions
+
+def _print_case(name, case, baseline=None):
+    line = f"{name:<40} {case['seconds'] * 1e3:>11.3f} ms {case['throughput']:>14,.0f} /s {case['peak_mb']:>9.1f} MB"
+    previous = (baseline or {}).get('cases', {}).get(name)
+    if previous:
+        line += f"  x{case['seconds'] / previous['seconds']:.2f} vs baseline"
+    print(line, flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CorroSight benchmark suite")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFECT_COUNTS), help="defect counts")
+    parser.add_argument('--horizons', type=int, nargs='+', default=list(HORIZONS), help="projection years")
+    parser.add_argument('--quick', action='store_true', help="skip the 1e6-defect cases")
+    parser.add_argument('--no-render', action='store_true', help="skip the Streamlit rendering cases")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON file to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a case counts as a regression")
+    args = parser.parse_args(argv)
+    
+    sizes = [n for n in args.sizes if not (args.quick and n >= 1_000_000)]
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    
+    print(f"{'case':<40} {'time':>14} {'throughput':>17} {'peak':>12}")
+    results = run_suite(sizes, args.horizons, render=not args.no_render, repeat=args.repeat,
+                        log=lambda name, case: _print_case(name, case, baseline))
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1)
+    
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, ratio in regressions:
+            print(f"REGRESSION {name}: {ratio:.2f}x baseline time")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Memoization of analysis results keyed by a canonical hash of the inputs."""
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+from corrosight_records import ScenarioResults
+
+DEFAULT_CACHE_SIZE = int(os.environ.get('CORROSIGHT_CACHE_SIZE', 256))
+
+def user_cache_dir():
+    """Per-user cache directory of the platform (XDG on Linux), under which CorroSight keeps its files"""
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser('~'), 'Library', 'Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'corrosight')
+
+# Persistent tier, private to the user running the server; an empty CORROSIGHT_DISK_CACHE turns it off
+DISK_CACHE_PATH = os.environ.get('CORROSIGHT_DISK_CACHE', os.path.join(user_cache_dir(), 'results.sqlite'))
+DISK_CACHE_BYTES = int(float(os.environ.get('CORROSIGHT_DISK_CACHE_MB', 256)) * 2**20)
+# Eviction frees down to this share of the size limit, so it runs once per batch of inserts
+DISK_CACHE_LOW_WATER = 0.9
+# Layout of the SQLite file (PRAGMA user_version); files of another layout are emptied on open
+DISK_CACHE_SCHEMA = 2
+# Modules whose source determines the results; editing any of them invalidates persisted results
+CALCULATION_MODULES = ('corrosight_core', 'corrosight_incremental', 'corrosight_records')
+
+logger = logging.getLogger('corrosight.cache')
+
+def _canonical(value):
+    # 2023 and 2023.0 describe the same scenario, and so must hash the same
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return repr(float(value))
+    if isinstance(value, Mapping):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if hasattr(value, 'item'):  # NumPy scalars
+        return _canonical(value.item())
+    raise TypeError(f"Cannot hash input value of type {type(value).__name__}")
+
+def inputs_key(inputs, **options):
+    """Canonical SHA-256 hex digest of an `inputs` dict plus any analysis options"""
+    payload = json.dumps(_canonical({'inputs': inputs, 'options': options}),
+                         sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def code_version(modules=CALCULATION_MODULES):
+    """Digest of the calculation modules' source, the version tag of persisted results"""
+    digest = hashlib.sha256()
+    for name in modules:
+        digest.update(inspect.getsource(importlib.import_module(name)).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+class DiskCache:
+    """Size-bounded SQLite store of encoded results, shared by every server process on the host.
+    
+    Rows are keyed by inputs_key and the calculation code version, and only rows
+    of this version are served, so a change to the formulas cannot return stale
+    results. Rows of other versions (e.g. a server still running older code) are
+    kept until, never being used, they age out. WAL journaling lets readers run
+    while a process writes, and writers queue for up to `timeout` seconds.
+    Past `max_bytes` the least recently used rows are evicted. Failures are
+    logged and treated as misses; the in-memory tier keeps working without the disk.
+    """
+    
+    def __init__(self, path=DISK_CACHE_PATH, max_bytes=DISK_CACHE_BYTES, version=None, timeout=30.0,
+                 encode=ScenarioResults.to_bytes, decode=ScenarioResults.from_bytes):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.version = version or code_version()
+        self.timeout = timeout
+        self.encode = encode
+        self.decode = decode
+        self._local = threading.local()
+        with self._write() as db:
+            if db.execute('PRAGMA user_version').fetchone()[0] != DISK_CACHE_SCHEMA:
+                db.execute('DROP TABLE IF EXISTS results')
+                db.execute('DROP TABLE IF EXISTS meta')
+                db.execute(f'PRAGMA user_version = {DISK_CACHE_SCHEMA}')
+            db.execute('CREATE TABLE IF NOT EXISTS results (key TEXT NOT NULL, version TEXT NOT NULL, '
+                       'size INTEGER NOT NULL, used REAL NOT NULL, value BLOB NOT NULL, '
+                       'PRIMARY KEY (key, version))')
+            db.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+            db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('bytes', (SELECT total(size) FROM results))")
+    
+    def _connection(self):
+        # sqlite3 connections belong to the thread that opened them; sessions run on many threads
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+    
+    @contextmanager
+    def _write(self):
+        """Transaction that takes the write lock up front, so it never fails half way on a lock upgrade"""
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+    
+    def __len__(self):
+        return self._connection().execute('SELECT count(*) FROM results').fetchone()[0]
+    
+    def size_bytes(self):
+        return self._connection().execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+    
+    def get(self, key, default=None):
+        try:
+            row = self._connection().execute('SELECT value FROM results WHERE key = ? AND version = ?',
+                                             (key, self.version)).fetchone()
+            if row is None:
+                return default
+            value = self.decode(row[0])
+            self._connection().execute('UPDATE results SET used = ? WHERE key = ? AND version = ?',
+                                       (time.time(), key, self.version))
+            return value
+        except (sqlite3.Error, OSError, ValueError, KeyError) as e:
+            logger.warning("Result cache read failed for %s: %s", key[:12], e)
+            return default
+    
+    def put(self, key, value):
+        try:
+            blob = self.encode(value)
+            if len(blob) > self.max_bytes:
+                return
+            with self._write() as db:
+                old = db.execute('SELECT size FROM results WHERE key = ? AND version = ?',
+                                 (key, self.version)).fetchone()
+                db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                           (key, self.version, len(blob), time.time(), blob))
+                db.execute("UPDATE meta SET value = value + ? WHERE name = 'bytes'",
+                           (len(blob) - (old[0] if old else 0),))
+                total = db.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(db, total)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Result cache write failed for %s: %s", key[:12], e)
+    
+    def _evict(self, db, total):
+        """Drop least recently used rows until the store is under the low-water mark"""
+        target = self.max_bytes * DISK_CACHE_LOW_WATER
+        evicted, freed = [], 0
+        for key, version, size in db.execute('SELECT key, version, size FROM results ORDER BY used'):
+            if total - freed <= target:
+                break
+            evicted.append((key, version))
+            freed += size
+        db.executemany('DELETE FROM results WHERE key = ? AND version = ?', evicted)
+        db.execute("UPDATE meta SET value = value - ? WHERE name = 'bytes'", (freed,))
+    
+    def clear(self):
+        with self._write() as db:
+            db.execute('DELETE FROM results')
+            db.execute("UPDATE meta SET value = 0 WHERE name = 'bytes'")
+
+def open_disk_cache(path=DISK_CACHE_PATH, max_bytes=DISK_CACHE_BYTES):
+    """DiskCache at `path`, or None when persistence is off or the file cannot be opened"""
+    if not path:
+        return None
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return DiskCache(path, max_bytes)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Persistent result cache unavailable at %s: %s", path, e)
+        return None
+
+class ResultCache:
+    """Thread-safe in-memory LRU cache of analysis results, optionally backed by a DiskCache.
+    
+    Streamlit serves every browser session from threads of one process, so a single
+    instance (see st.cache_resource) is shared by all sessions on the server.
+    With `disk`, results also outlive the process: memory misses fall back to the
+    disk and new results are written through to it.
+    Cached results are shared objects and must be treated as read-only.
+    """
+    
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, disk=None):
+        self.max_entries = max_entries
+        self.disk = disk
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __contains__(self, key):
+        return key in self._entries
+    
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def _lookup(self, key):
+        """The cached value or None, from memory first, counting the hit or miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        # Disk reads happen outside the lock so they never stall memory hits of other sessions
+        value = self.disk.get(key) if self.disk is not None else None
+        if value is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._remember(key, value)
+        return value
+    
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is None else value
+    
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+    
+    def get_or_compute(self, key, compute):
+        """Return the cached value for `key`, calling `compute()` and storing it on a miss"""
+        value = self._lookup(key)
+        if value is None:
+            # Computed outside the lock so one slow scenario does not block other sessions
+            value = compute()
+            self.put(key, value)
+        return value
+    
+    def clear(self):
+        """Empty the memory tier (the disk tier is shared with other processes and kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
@@ -0,0 +1,193 @@
+"""Server-side downsampling and client-side (Vega-Lite) charts with bounded payloads."""
+import warnings
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+# Payload bounds: points per curve, curves before collapsing into percentile bands,
+# and scatter points before collapsing into a density grid
+MAX_POINTS = 400
+MAX_SERIES = 12
+MAX_SCATTER_POINTS = 2_000
+DENSITY_BINS = 40
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+# Values per percentile computation block
+BAND_BLOCK = 4_000_000
+
+def lttb(x, y, threshold=MAX_POINTS):
+    """Indices of the `threshold` points Largest-Triangle-Three-Buckets keeps.
+    
+    The first and last points always stay; every bucket in between keeps the
+    point spanning the largest triangle with the point kept before it and the
+    mean of the next bucket, which preserves peaks and the overall shape.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n = x.size
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for k in range(threshold - 2):
+        lo, hi = edges[k], edges[k + 1]
+        next_hi = edges[k + 2] if k + 2 < edges.size else n
+        cx, cy = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[k + 1] = a
+    return kept
+
+def downsample_curves(x, curves, max_points=MAX_POINTS):
+    """Long-format (x, series, value) frame of {name: y} curves, each reduced by LTTB (NaNs dropped)"""
+    x = np.asarray(x, dtype=float)
+    parts = []
+    for name, y in curves.items():
+        y = np.asarray(y, dtype=float)
+        finite = np.flatnonzero(np.isfinite(y) & np.isfinite(x))
+        kept = finite[lttb(x[finite], y[finite], max_points)]
+        parts.append(pd.DataFrame({'x': x[kept], 'series': name, 'value': y[kept]}))
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['x', 'series', 'value'])
+
+def percentile_bands(x, values, percentiles=BAND_PERCENTILES, max_points=MAX_POINTS):
+    """Per-x percentiles of a (series, points) array as a wide frame (x, p5, ..., p95)"""
+    # Columns go in blocks so a memory-mapped population is never copied whole
+    values = np.asarray(values)
+    block = max(1, BAND_BLOCK // max(values.shape[0], 1))
+    levels = np.empty((len(percentiles), values.shape[1]))
+    with warnings.catch_warnings():
+        # Points no series reaches are all-NaN columns
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for start in range(0, values.shape[1], block):
+            levels[:, start:start + block] = np.nanpercentile(
+                values[:, start:start + block].astype(float), percentiles, axis=0)
+    frame = pd.DataFrame({'x': np.asarray(x, dtype=float)})
+    for p, level in zip(percentiles, levels):
+        frame[f'p{p}'] = level
+    frame = frame.dropna().reset_index(drop=True)
+    # The median's shape decides which points every band keeps
+    median = f'p{percentiles[len(percentiles) // 2]}'
+    return frame.iloc[lttb(frame['x'], frame[median], max_points)].reset_index(drop=True)
+
+def density_grid(x, y, bins=DENSITY_BINS):
+    """Occupied cells (x0, x1, y0, y1, count) of a 2-D histogram of the points"""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    finite = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[finite], y[finite], bins=bins)
+    i, j = np.nonzero(counts)
+    # Edges rounded well below a cell width keep the payload small
+    x_edges, y_edges = np.round(x_edges, 3), np.round(y_edges, 3)
+    return pd.DataFrame({'x0': x_edges[i], 'x1': x_edges[i + 1], 'y0': y_edges[j], 'y1': y_edges[j + 1],
+                         'count': counts[i, j].astype(int)})
+
+def _rules(rules):
+    """Horizontal reference lines from (value, label, color) triples"""
+    frame = pd.DataFrame(rules, columns=['value', 'label', 'color'])
+    return alt.Chart(frame).mark_rule(strokeWidth=2.5).encode(
+        y='value:Q', color=alt.Color('color:N', scale=None), tooltip=['label:N', 'value:Q'])
+
+def curve_chart(x, curves, colors, title, x_title, y_title, rules=(), y_scale=None, max_points=MAX_POINTS):
+    """Interactive line chart of {name: y} curves sharing `x`, each LTTB-downsampled"""
+    frame = downsample_curves(x, curves, max_points)
+    names = list(curves)
+    lines = alt.Chart(frame).mark_line(strokeWidth=2).encode(
+        x=alt.X('x:Q', title=x_title, axis=alt.Axis(format='d')),
+        y=alt.Y('value:Q', title=y_title, scale=y_scale or alt.Undefined),
+        color=alt.Color('series:N', scale=alt.Scale(domain=names, range=[colors[n] for n in names]),
+                        legend=alt.Legend(title=None) if len(names) <= MAX_SERIES else None),
+        tooltip=['series:N', alt.Tooltip('x:Q', format='d', title=x_title), alt.Tooltip('value:Q', format='.3f')])
+    chart = alt.layer(lines, _rules(list(rules))).resolve_scale(color='independent') if rules else lines
+    return chart.properties(title=title, height=360).interactive()
+
+def band_chart(bands, color, title, x_title, y_title, rules=(), percentiles=BAND_PERCENTILES):
+    """Nested percentile bands (outer pair lightest) with the median drawn as a line"""
+    x = alt.X('x:Q', title=x_title, axis=alt.Axis(format='d'))
+    base = alt.Chart(bands)
+    layers = []
+    for depth in range(len(percentiles) // 2):
+        low, high = f'p{percentiles[depth]}', f'p{percentiles[-1 - depth]}'
+        layers.append(base.mark_area(color=color, opacity=0.15 + 0.2 * depth).encode(
+            x=x, y=alt.Y(f'{low}:Q', title=y_title), y2=f'{high}:Q',
+            tooltip=[alt.Tooltip('x:Q', format='d', title=x_title),
+                     alt.Tooltip(f'{low}:Q', format='.3f'), alt.Tooltip(f'{high}:Q', format='.3f')]))
+    median = f'p{percentiles[len(percentiles) // 2]}'
+    layers.append(base.mark_line(color=color, strokeWidth=2).encode(
+        x=x, y=f'{median}:Q', tooltip=[alt.Tooltip('x:Q', format='d', title=x_title),
+                                       alt.Tooltip(f'{median}:Q', format='.3f', title='median')]))
+    if rules:
+        layers.append(_rules(list(rules)))
+    return alt.layer(*layers).resolve_scale(color='independent').properties(title=title, height=360).interactive()
+
+def population_chart(x, names, values, colors, title, x_title, y_title, rules=(),
+                     band_color='#2E86AB', max_series=MAX_SERIES, max_points=MAX_POINTS):
+    """One curve per series up to `max_series`, percentile bands of the population beyond"""
+    if len(names) <= max_series:
+        return curve_chart(x, dict(zip(names, values)), dict(zip(names, colors)), title, x_title, y_title,
+                           rules, max_points=max_points)
+    bands = percentile_bands(x, values, max_points=max_points)
+    return band_chart(bands, band_color, f'{title} ({len(names):,} series, {BAND_PERCENTILES[0]}'
+                      f'-{BAND_PERCENTILES[-1]}th percentiles)', x_title, y_title, rules)
+
+def scatter_chart(x, y, names, colors, title, x_title, y_title, layers=(), max_points=MAX_SCATTER_POINTS):
+    """Labelled points up to `max_points`, a density grid of the points beyond"""
+    if len(names) <= max_points:
+        frame = pd.DataFrame({'x': x, 'y': y, 'name': names, 'color': colors})
+        points = alt.Chart(frame).mark_point(size=120, filled=True, stroke='#333333').encode(
+            x=alt.X('x:Q', title=x_title), y=alt.Y('y:Q', title=y_title),
+            color=alt.Color('color:N', scale=None),
+            tooltip=['name:N', alt.Tooltip('x:Q', format='.1f'), alt.Tooltip('y:Q', format='.1f')])
+    else:
+        points = alt.Chart(density_grid(x, y)).mark_rect().encode(
+            x=alt.X('x0:Q', title=x_title), x2='x1:Q', y=alt.Y('y0:Q', title=y_title), y2='y1:Q',
+            color=alt.Color('count:Q', scale=alt.Scale(scheme='blues', type='log'), title='Scenarios'),
+            tooltip=['count:Q'])
+    chart = alt.layer(*layers, points).resolve_scale(color='independent')
+    return chart.properties(title=title, height=420).interactive()
+
+def envelope_layers(uts, yield_stress, Se, sigma_f, colors, samples=100):
+    """Goodman, Soderberg, Gerber, Morrow and ASME-Elliptic limit lines as one layer"""
+    x = np.linspace(0, uts * 1.1, samples)
+    with np.errstate(invalid='ignore'):
+        curves = {
+            'Goodman': Se * (1 - x / uts),
+            'Soderberg': Se * (1 - x / yield_stress),
+            'Gerber': Se * (1 - (x / uts) ** 2),
+            'Morrow': Se * (1 - x / sigma_f),
+            'ASME-Elliptic': Se * np.sqrt(1 - (x / yield_stress) ** 2)
+        }
+    frame = pd.concat([pd.DataFrame({'x': x, 'y': y, 'criterion': name}) for name, y in curves.items()])
+    frame = frame[frame['y'] >= 0]
+    names = list(curves)
+    return alt.Chart(frame).mark_line(strokeWidth=2.5).encode(
+        x='x:Q', y='y:Q',
+        color=alt.Color('criterion:N', scale=alt.Scale(domain=names, range=[colors[n] for n in names]),
+                        legend=alt.Legend(title='Criterion')),
+        tooltip=['criterion:N'])
+
+def summary_bars(categories, names, values, colors, title, y_title, max_series=MAX_SERIES):
+    """Grouped bars per series up to `max_series`, box plots of the population per category beyond"""
+    values = np.asarray(values, dtype=float)
+    if len(names) <= max_series:
+        frame = pd.DataFrame({'category': np.tile(categories, len(names)), 'series': np.repeat(names, len(categories)),
+                              'value': values.ravel()})
+        chart = alt.Chart(frame).mark_bar(stroke='#333333').encode(
+            x=alt.X('category:N', title=None, sort=list(categories)), xOffset=alt.XOffset('series:N', sort=list(names)),
+            y=alt.Y('value:Q', title=y_title),
+            color=alt.Color('series:N', scale=alt.Scale(domain=list(names), range=list(colors)),
+                            legend=alt.Legend(title=None)),
+            tooltip=['series:N', 'category:N', alt.Tooltip('value:Q', format='.2f')])
+    else:
+        # Five-number summaries only, whatever the number of scenarios
+        stats = np.nanpercentile(values, [0, 25, 50, 75, 100], axis=0)
+        frame = pd.DataFrame({'category': categories, 'min': stats[0], 'q1': stats[1], 'median': stats[2],
+                              'q3': stats[3], 'max': stats[4]})
+        base = alt.Chart(frame).encode(x=alt.X('category:N', title=None, sort=list(categories)))
+        chart = alt.layer(
+            base.mark_rule().encode(y=alt.Y('min:Q', title=y_title), y2='max:Q'),
+            base.mark_bar(size=40, color=colors[0], opacity=0.7).encode(y='q1:Q', y2='q3:Q'),
+            base.mark_tick(color='#333333', size=40, thickness=2).encode(y='median:Q'),
+        ).encode(tooltip=['category:N', 'min:Q', 'q1:Q', 'median:Q', 'q3:Q', 'max:Q'])
+        title = f'{title} ({len(names):,} scenarios)'
+    return chart.properties(title=title, height=380)
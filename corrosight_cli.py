@@ -0,0 +1,224 @@
+"""Headless batch runner: the "Run Analysis" calculations for scenario or ILI anomaly files.
+
+    python corrosight_cli.py scenarios scenarios.csv -o results.parquet --workers 8
+    python corrosight_cli.py anomalies ili_run.csv -o assessed.csv --defaults pipeline.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from corrosight_core import (
+    DEFAULT_INPUTS, FFS_GRID_FIELDS, FFS_METHODS, INPUT_FIELDS,
+    analyze_batch, monte_carlo_pof
+)
+from corrosight_ingest import (
+    assess_anomaly_chunk, iter_ili_chunks, max_projection_years, normalize_ili_chunk, resolve_ili_columns,
+    warn_unmapped_columns
+)
+from corrosight_store import ProjectionStore, project_anomalies
+
+OUTPUT_FORMATS = ('.csv', '.parquet', '.json')
+
+def read_table(path):
+    """Load a scenario table from CSV, Parquet or JSON (records)"""
+    suffix = Path(path).suffix.lower()
+    if suffix == '.parquet':
+        return pd.read_parquet(path)
+    if suffix == '.json':
+        return pd.read_json(path, orient='records')
+    return pd.read_csv(path)
+
+def write_table(frame, path, append=False):
+    """Write a table in the format given by the file extension"""
+    suffix = Path(path).suffix.lower()
+    if suffix == '.parquet':
+        frame.to_parquet(path, index=False)
+    elif suffix == '.json':
+        frame.to_json(path, orient='records', indent=1)
+    else:
+        frame.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+
+def _sibling(path, suffix):
+    path = Path(path)
+    return path.with_name(f"{path.stem}_{suffix}{path.suffix}")
+
+def _scenario_columns(frame):
+    """INPUT_FIELDS columns for a scenario table, defaults filling any that are absent"""
+    missing = [f for f in INPUT_FIELDS if f not in frame and f not in ('pipe_length', 'min_pressure')]
+    if missing:
+        raise ValueError(f"Scenario file is missing columns: {', '.join(missing)}")
+    return {field: frame[field].to_numpy() if field in frame else np.full(len(frame), DEFAULT_INPUTS[field])
+            for field in INPUT_FIELDS}
+
+def analyze_scenario_chunk(names, columns, pof_samples=0, pof_seed=0):
+    """Summary, FFS projection and optional PoF tables for one chunk of scenarios"""
+    batch = analyze_batch(columns)
+    summary = pd.DataFrame({'name': names, **columns})
+    for section in ('pressures', 'stresses', 'fatigue'):
+        for key, values in batch[section].items():
+            summary[key] = values
+    for method in FFS_METHODS:
+        summary[f'failure_year_{method.lower()}'] = batch['failure_years'][method]
+        summary[f'remaining_life_{method.lower()}'] = batch['remaining_life'][method]
+    
+    grid = batch['grid']
+    projection = pd.DataFrame({'name': np.repeat(names, grid.shape[1]), 'year': grid['year'].ravel()})
+    for field in FFS_GRID_FIELDS:
+        projection[field] = grid[field].ravel()
+    projection = projection.dropna(subset=['critical_erf']).reset_index(drop=True)
+    
+    pof = None
+    if pof_samples:
+        frames = []
+        for i, name in enumerate(names):
+            inputs = {field: columns[field][i].item() for field in INPUT_FIELDS}
+            result = monte_carlo_pof(inputs, n_samples=pof_samples, seed=pof_seed)
+            frames.append(pd.DataFrame({'name': name, 'year': result['year'],
+                                        **{m: result[m] for m in FFS_METHODS},
+                                        'critical': result['critical']}))
+        pof = pd.concat(frames, ignore_index=True)
+    return summary, projection, pof
+
+def run_scenarios(source, output, workers=None, chunk_size=256, pof_samples=0, pof_seed=0):
+    """Analyze every row of a scenario file, fanned out over a process pool.
+    
+    Writes `output` (one row per scenario: pressures, stresses, fatigue factors,
+    failure years and remaining life), `<output>_projection` (scenario x year) and,
+    with `pof_samples`, `<output>_pof`. Returns the number of scenarios.
+    """
+    frame = read_table(source)
+    names = frame['name'].astype(str).to_numpy() if 'name' in frame else \
+        np.array([f'Scenario {i+1}' for i in range(len(frame))])
+    columns = _scenario_columns(frame)
+    bounds = range(0, len(frame), chunk_size)
+    jobs = [(names[start:start + chunk_size],
+             {field: values[start:start + chunk_size] for field, values in columns.items()})
+            for start in bounds]
+    
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        parts = [analyze_scenario_chunk(n, c, pof_samples, pof_seed) for n, c in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(analyze_scenario_chunk, *zip(*jobs),
+                                  [pof_samples] * len(jobs), [pof_seed] * len(jobs)))
+    
+    summaries, projections, pofs = zip(*parts) if parts else ((), (), ())
+    write_table(pd.concat(summaries, ignore_index=True) if summaries else pd.DataFrame(), output)
+    write_table(pd.concat(projections, ignore_index=True) if projections else pd.DataFrame(),
+                _sibling(output, 'projection'))
+    if pof_samples and pofs:
+        write_table(pd.concat(pofs, ignore_index=True), _sibling(output, 'pof'))
+    return len(frame)
+
+def _assess_raw_chunk(raw, resolved, units, defaults, project=False):
+    frame = normalize_ili_chunk(raw, resolved, units, defaults)
+    return assess_anomaly_chunk(frame), project_anomalies(frame) if project else None
+
+def run_anomalies(source, output, workers=None, chunk_size=50_000, defaults=None, column_map=None, units=None,
+                  projection_store=None):
+    """Assess an ILI listing chunk by chunk over a process pool, streaming results to `output`.
+    
+    At most two chunks per worker are in flight, so memory is bounded by the chunk
+    size. CSV output is appended chunk by chunk; Parquet and JSON are written once.
+    With `projection_store` (a directory), every anomaly's year-by-year projection
+    is appended to a ProjectionStore there as well. Returns the number of anomalies assessed.
+    """
+    workers = workers or os.cpu_count() or 1
+    streaming = Path(output).suffix.lower() == '.csv'
+    store = None
+    if projection_store:
+        # A projection_years column in the listing overrides the pipeline-level horizon;
+        # without either, the first chunk's longest projection sizes the store
+        horizon = max_projection_years(source, column_map=column_map)
+        if horizon is None:
+            horizon = (defaults or {}).get('projection_years')
+        store = ProjectionStore.create(projection_store, None if horizon is None else int(horizon) + 1,
+                                       overwrite=True)
+    resolved = None
+    held = []
+    rows = 0
+    
+    def collect(result):
+        nonlocal rows
+        assessed, grid = result
+        if streaming:
+            write_table(assessed, output, append=rows > 0)
+        else:
+            held.append(assessed)
+        if store is not None:
+            store.append(grid)
+        rows += len(assessed)
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for raw in iter_ili_chunks(source, chunksize=chunk_size):
+            if resolved is None:
+                resolved = resolve_ili_columns(raw.columns, column_map)
+                warn_unmapped_columns(raw, resolved)
+            pending.append(pool.submit(_assess_raw_chunk, raw, resolved, units, defaults, store is not None))
+            # Results are written in file order as soon as the oldest chunk is done
+            while len(pending) >= 2 * workers or (pending and pending[0].done()):
+                collect(pending.pop(0).result())
+        for future in pending:
+            collect(future.result())
+    
+    if store is not None:
+        store.close()
+    if not streaming:
+        write_table(pd.concat(held, ignore_index=True) if held else pd.DataFrame(), output)
+    return rows
+
+def _load_json_option(value):
+    if value is None:
+        return None
+    if os.path.exists(value):
+        with open(value, encoding='utf-8') as f:
+            return json.load(f)
+    return json.loads(value)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CorroSight batch assessment")
+    parser.add_argument('mode', choices=['scenarios', 'anomalies'],
+                        help="one row per dataset `inputs`, or a vendor ILI anomaly listing")
+    parser.add_argument('source', help="input file (.csv, .parquet or .json)")
+    parser.add_argument('-o', '--output', required=True, help="results file (.csv, .parquet or .json)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=None, help="rows per work unit")
+    parser.add_argument('--pof-samples', type=int, default=0,
+                        help="Monte Carlo samples per scenario (scenarios mode, 0 to skip)")
+    parser.add_argument('--seed', type=int, default=0, help="Monte Carlo seed")
+    parser.add_argument('--defaults', help="JSON object or file with pipeline-level inputs (anomalies mode)")
+    parser.add_argument('--column-map', help="JSON object or file mapping vendor columns to inputs keys")
+    parser.add_argument('--units', help="JSON object or file mapping inputs keys to vendor units")
+    parser.add_argument('--projection-store', help="directory for the memory-mapped per-year projections "
+                                                   "(anomalies mode, replaced if present)")
+    args = parser.parse_args(argv)
+    
+    if Path(args.output).suffix.lower() not in OUTPUT_FORMATS:
+        parser.error(f"output must end in one of {', '.join(OUTPUT_FORMATS)}")
+    
+    started = time.perf_counter()
+    try:
+        if args.mode == 'scenarios':
+            count = run_scenarios(args.source, args.output, args.workers, args.chunk_size or 256,
+                                  args.pof_samples, args.seed)
+        else:
+            count = run_anomalies(args.source, args.output, args.workers, args.chunk_size or 50_000,
+                                  _load_json_option(args.defaults), _load_json_option(args.column_map),
+                                  _load_json_option(args.units), args.projection_store)
+    except (ValueError, ImportError, OSError) as e:
+        print(f"corrosight: {e}", file=sys.stderr)
+        return 1
+    print(f"Assessed {count:,} {args.mode} in {time.perf_counter() - started:.1f} s -> {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
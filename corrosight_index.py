@@ -0,0 +1,165 @@
+"""Chainage-range index over assessed ILI anomalies for fast segment queries."""
+import numpy as np
+
+from corrosight_core import FFS_METHODS, INPUT_FIELDS, projected_erf_array
+
+DEFAULT_BLOCK_SIZE = 64
+
+def _sparse_table(values, pick):
+    """Levels of argbest block indices: level k, row i covers blocks i .. i + 2**k - 1 (per column)"""
+    level = np.broadcast_to(np.arange(values.shape[0])[:, None], values.shape).copy()
+    table = [level]
+    span = 1
+    while 2 * span <= values.shape[0]:
+        left, right = level[:-span], level[span:]
+        better = pick(np.take_along_axis(values, right, 0), np.take_along_axis(values, left, 0))
+        level = np.where(better, right, left)
+        table.append(level)
+        span *= 2
+    return table
+
+class ChainageIndex:
+    """Assessed anomalies sorted by chainage, with per-block summaries for range queries.
+    
+    Anomalies are split into blocks of `block_size` consecutive chainages. Each
+    block keeps its worst critical ERF per calendar year and its earliest failure
+    year, and sparse tables over those summaries answer any run of whole blocks in
+    O(1). A query costs two binary searches for the range ends, the table lookups
+    and a scan of at most two partial blocks. Counts come from prefix sums.
+    
+    `assessed` is a results table from assess_ili_file (chainage in m).
+    """
+    
+    def __init__(self, assessed, block_size=DEFAULT_BLOCK_SIZE):
+        if 'chainage' not in assessed:
+            raise ValueError("A chainage index needs the anomaly chainage")
+        chainage = assessed['chainage'].to_numpy(dtype=float)
+        order = np.argsort(chainage, kind='stable')
+        self.block_size = block_size
+        self.chainage = chainage[order]
+        self.rows = assessed.index.to_numpy()[order]
+        needed = INPUT_FIELDS + ('critical_erf',) + tuple(f'failure_year_{m.lower()}' for m in FFS_METHODS)
+        cols = {c: assessed[c].to_numpy(dtype=float)[order] for c in needed}
+        
+        failure = np.fmin.reduce([cols[f'failure_year_{m.lower()}'] for m in FFS_METHODS])
+        self.failure_year = np.nan_to_num(failure, nan=np.inf)[:, None]
+        
+        # Column 0 is the current critical ERF, then one column per calendar year within
+        # each anomaly's projection period (-inf outside it)
+        inspection = cols['inspection_year']
+        horizon = np.floor(cols['projection_years'])
+        first = int(inspection.min()) if inspection.size else 0
+        last = int((inspection + horizon).max()) if inspection.size else 0
+        self.years = np.arange(first, last + 1)
+        # Kept in float64 like the table: narrowing would round ERFs just below 1 up to 1
+        self.erf = np.full((self.chainage.size, self.years.size + 1), -np.inf)
+        self.erf[:, 0] = np.nan_to_num(cols['critical_erf'], nan=-np.inf)
+        args = [cols[f] for f in ('pipe_diameter', 'pipe_thickness', 'corrosion_depth', 'corrosion_length',
+                                  'yield_stress', 'uts', 'max_pressure', 'radial_corrosion_rate',
+                                  'axial_corrosion_rate')]
+        for k, year in enumerate(self.years):
+            elapsed = year - inspection
+            inside = (elapsed >= 0) & (elapsed <= horizon)
+            if inside.any():
+                critical = np.maximum.reduce([
+                    projected_erf_array(m, *(a[inside] for a in args), elapsed[inside]) for m in FFS_METHODS])
+                self.erf[inside, k + 1] = critical
+        self._exceeding = np.vstack([np.zeros((1, self.erf.shape[1]), dtype=np.int32),
+                                     np.cumsum(self.erf >= 1.0, axis=0, dtype=np.int32)])
+        
+        self._erf_blocks = self._blocks(self.erf, np.max)
+        self._erf_table = _sparse_table(self._erf_blocks, np.greater)
+        self._failure_blocks = self._blocks(self.failure_year, np.min)
+        self._failure_table = _sparse_table(self._failure_blocks, np.less)
+    
+    def _blocks(self, values, reduce):
+        n = values.shape[0]
+        padding = -n % self.block_size
+        fill = -np.inf if reduce is np.max else np.inf
+        padded = np.vstack([values, np.full((padding, values.shape[1]), fill, dtype=values.dtype)])
+        return reduce(padded.reshape(-1, self.block_size, values.shape[1]), axis=1)
+    
+    def __len__(self):
+        return self.chainage.size
+    
+    def span(self, start, end):
+        """Positions [i, j) of the anomalies with start <= chainage <= end (m)"""
+        return (int(np.searchsorted(self.chainage, start, side='left')),
+                int(np.searchsorted(self.chainage, end, side='right')))
+    
+    def _best(self, values, blocks, table, column, i, j, pick):
+        """(value, position) of the best entry of values[i:j, column]"""
+        if i >= j:
+            return None, None
+        b = self.block_size
+        first_block, last_block = -(-i // b), j // b
+        candidates = []
+        if first_block < last_block:
+            level = int(np.log2(last_block - first_block))
+            for block in (table[level][first_block, column], table[level][last_block - (1 << level), column]):
+                candidates.append((blocks[block, column], block * b, min((block + 1) * b, len(self))))
+            edges = [(i, first_block * b), (last_block * b, j)]
+        else:
+            edges = [(i, j)]
+        for lo, hi in edges:
+            if lo < hi:
+                candidates.append((None, lo, hi))
+        
+        best_value, best_position = None, None
+        for value, lo, hi in candidates:
+            segment = values[lo:hi, column]
+            if value is None:
+                offset = int(np.argmax(segment) if pick is np.greater else np.argmin(segment))
+                value = segment[offset]
+            else:
+                offset = int(np.flatnonzero(segment == value)[0])
+            if best_value is None or pick(value, best_value):
+                best_value, best_position = value, lo + offset
+        return float(best_value), best_position
+    
+    def _year_column(self, year):
+        if year is None:
+            return 0
+        if not self.years[0] <= year <= self.years[-1]:
+            raise ValueError(f"Year {year} is outside the projected years {self.years[0]}-{self.years[-1]}")
+        return int(year - self.years[0]) + 1
+    
+    def count(self, start, end):
+        i, j = self.span(start, end)
+        return j - i
+    
+    def max_critical_erf(self, start, end, year=None):
+        """Worst critical ERF between two chainages (m) now or in a calendar year, and its row label"""
+        i, j = self.span(start, end)
+        value, position = self._best(self.erf, self._erf_blocks, self._erf_table, self._year_column(year),
+                                     i, j, np.greater)
+        if value is None or not np.isfinite(value):
+            return np.nan, None
+        return value, self.rows[position]
+    
+    def earliest_failure_year(self, start, end):
+        """First projected failure year of any method between two chainages, and its row label"""
+        i, j = self.span(start, end)
+        value, position = self._best(self.failure_year, self._failure_blocks, self._failure_table, 0, i, j, np.less)
+        if value is None or not np.isfinite(value):
+            return np.nan, None
+        return value, self.rows[position]
+    
+    def count_exceeding(self, start, end, year=None):
+        """Anomalies between two chainages whose critical ERF is at least 1 now or in a calendar year"""
+        i, j = self.span(start, end)
+        column = self._year_column(year)
+        return int(self._exceeding[j, column] - self._exceeding[i, column])
+    
+    def query(self, start, end, year=None):
+        """Everything the segment views need for one chainage range"""
+        erf, erf_row = self.max_critical_erf(start, end, year)
+        failure, failure_row = self.earliest_failure_year(start, end)
+        return {
+            'count': self.count(start, end),
+            'max_critical_erf': erf,
+            'max_critical_erf_row': erf_row,
+            'earliest_failure_year': failure,
+            'earliest_failure_row': failure_row,
+            'exceeding': self.count_exceeding(start, end, year)
+        }
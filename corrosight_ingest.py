@@ -0,0 +1,308 @@
+"""Chunked ILI anomaly listing ingestion on top of the CorroSight calculation layer."""
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from corrosight_core import (
+    FFS_METHODS, INPUT_FIELDS, calculate_pressures_array, erf_array,
+    ffs_failure_years_array, remaining_life_array
+)
+
+# ILI Anomaly Ingestion
+# Identification columns carried through to the results table untouched (chainage is converted to m)
+ILI_ID_FIELDS = ('anomaly_id', 'chainage', 'clock_position', 'feature_type')
+# Text columns copied as they are
+ILI_TEXT_FIELDS = ('anomaly_id', 'clock_position', 'feature_type')
+# Defect geometry not used by the burst-pressure methods but needed for interaction checks
+ILI_GEOMETRY_FIELDS = ('corrosion_width',)
+
+# Normalized vendor header -> (field, implied unit or None)
+ILI_COLUMN_ALIASES = {
+    'anomaly_id': ('anomaly_id', None), 'feature_id': ('anomaly_id', None), 'id': ('anomaly_id', None),
+    'chainage': ('chainage', None), 'odometer': ('chainage', None), 'log_distance': ('chainage', None),
+    'kp': ('chainage', 'km'),
+    'clock_position': ('clock_position', None), 'clock': ('clock_position', None),
+    'orientation': ('clock_position', None),
+    'feature_type': ('feature_type', None), 'feature': ('feature_type', None), 'event': ('feature_type', None),
+    'identification': ('feature_type', None), 'type': ('feature_type', None),
+    'wt': ('pipe_thickness', None), 'wall_thickness': ('pipe_thickness', None),
+    'nominal_wt': ('pipe_thickness', None), 't': ('pipe_thickness', None),
+    'od': ('pipe_diameter', None), 'outside_diameter': ('pipe_diameter', None),
+    'diameter': ('pipe_diameter', None),
+    'joint_length': ('pipe_length', None),
+    'width': ('corrosion_width', None), 'circumferential_width': ('corrosion_width', None),
+    'width_mm': ('corrosion_width', 'mm'), 'width_in': ('corrosion_width', 'in'),
+    'length': ('corrosion_length', None), 'axial_length': ('corrosion_length', None),
+    'length_mm': ('corrosion_length', 'mm'), 'length_in': ('corrosion_length', 'in'),
+    'depth': ('corrosion_depth', None), 'max_depth': ('corrosion_depth', None),
+    'peak_depth': ('corrosion_depth', None), 'depth_mm': ('corrosion_depth', 'mm'),
+    'depth_in': ('corrosion_depth', 'in'), 'depth_pct': ('corrosion_depth', '%wt'),
+    'depth_wt': ('corrosion_depth', '%wt'), 'depth_percent': ('corrosion_depth', '%wt'),
+    'smys': ('yield_stress', None), 'sy': ('yield_stress', None),
+    'smts': ('uts', None), 'uts': ('uts', None),
+    'maop': ('max_pressure', None), 'mop': ('max_pressure', None),
+    'min_pressure': ('min_pressure', None),
+    'inspection_year': ('inspection_year', None), 'run_year': ('inspection_year', None),
+    'radial_rate': ('radial_corrosion_rate', None), 'depth_growth_rate': ('radial_corrosion_rate', None),
+    'axial_rate': ('axial_corrosion_rate', None), 'length_growth_rate': ('axial_corrosion_rate', None),
+    'projection_years': ('projection_years', None)
+}
+ILI_COLUMN_ALIASES.update({field: (field, None) for field in INPUT_FIELDS + ILI_ID_FIELDS + ILI_GEOMETRY_FIELDS})
+
+# Conversion factors into the canonical units used by the calculations
+_LENGTH_UNITS = {'mm': 1.0, 'm': 1000.0, 'in': 25.4, 'inch': 25.4, 'ft': 304.8}
+_STRESS_UNITS = {'mpa': 1.0, 'kpa': 0.001, 'bar': 0.1, 'psi': 0.006894757, 'ksi': 6.894757}
+_RATE_UNITS = {'mm/yr': 1.0, 'mm/y': 1.0, 'in/yr': 25.4, 'mpy': 0.0254}
+_CHAINAGE_UNITS = {'m': 1.0, 'km': 1000.0, 'mm': 0.001, 'ft': 0.3048}
+FIELD_UNITS = {
+    'pipe_thickness': ('mm', _LENGTH_UNITS), 'pipe_diameter': ('mm', _LENGTH_UNITS),
+    'pipe_length': ('mm', _LENGTH_UNITS), 'corrosion_length': ('mm', _LENGTH_UNITS),
+    'corrosion_width': ('mm', _LENGTH_UNITS),
+    'corrosion_depth': ('mm', _LENGTH_UNITS), 'yield_stress': ('mpa', _STRESS_UNITS),
+    'uts': ('mpa', _STRESS_UNITS), 'max_pressure': ('mpa', _STRESS_UNITS),
+    'min_pressure': ('mpa', _STRESS_UNITS), 'radial_corrosion_rate': ('mm/yr', _RATE_UNITS),
+    'axial_corrosion_rate': ('mm/yr', _RATE_UNITS), 'chainage': ('m', _CHAINAGE_UNITS)
+}
+# Depth units meaning percent of wall thickness (converted to mm once the thickness is known)
+PERCENT_WT_UNITS = ('%wt', '%', 'pct', 'percent', 'wt%', '%t')
+# Units vendors append to headers in brackets ('WT (mm)', 'Depth [%WT]') or as a last word ('Odometer_m')
+_BRACKETED_UNIT = re.compile(r'^(.*?)\s*[(\[]([^)\]]*)[)\]]\s*$')
+_SUFFIX_UNITS = set().union(_LENGTH_UNITS, _STRESS_UNITS, _CHAINAGE_UNITS, ('pct', 'percent', 'mpy'))
+# Fields the burst-pressure and FFS computations cannot do without
+ILI_REQUIRED_FIELDS = tuple(f for f in INPUT_FIELDS if f not in ('pipe_length', 'min_pressure'))
+# Most anomalies assess_ili_file returns as an in-memory table (about 250 bytes each);
+# larger listings must be written to an output file
+MAX_IN_MEMORY_ROWS = 2_000_000
+
+def _normalize_header(name):
+    """'Depth [%WT]' -> 'depth_wt'"""
+    cleaned = ''.join(c if c.isalnum() else ' ' for c in str(name).lower())
+    return '_'.join(cleaned.split())
+
+def _parse_header(name):
+    """'WT (mm)' -> ('wt', 'mm'): the normalized header and the unit it names (None if it names none)"""
+    name, unit = str(name), None
+    match = _BRACKETED_UNIT.match(name)
+    if match and match.group(1).strip():
+        name, unit = match.group(1), match.group(2).lower().replace(' ', '')
+    elif '%' in name:
+        unit = '%'
+    header = _normalize_header(name)
+    if header not in ILI_COLUMN_ALIASES and unit is None:
+        base, _, suffix = header.rpartition('_')
+        if base and suffix in _SUFFIX_UNITS:
+            header, unit = base, suffix
+    return header, unit
+
+def resolve_ili_columns(columns, column_map=None):
+    """Map vendor column names onto `inputs` keys, returning {vendor_column: (field, unit)}.
+    
+    A unit named in the header overrides the one an alias implies.
+    """
+    column_map = column_map or {}
+    resolved = {}
+    for column in columns:
+        header, unit = _parse_header(column)
+        if column in column_map:
+            resolved[column] = (column_map[column], unit)
+        elif header in ILI_COLUMN_ALIASES:
+            field, implied_unit = ILI_COLUMN_ALIASES[header]
+            resolved[column] = (field, unit or implied_unit)
+    # First vendor column wins when several alias the same field
+    seen = set()
+    for column, (field, _) in list(resolved.items()):
+        if field in seen:
+            del resolved[column]
+        seen.add(field)
+    return resolved
+
+def unmapped_columns(raw, resolved):
+    """Numeric vendor columns that resolve_ili_columns left out, and the assessment therefore ignores"""
+    return [str(column) for column in raw.columns
+            if column not in resolved and pd.api.types.is_numeric_dtype(raw[column])]
+
+def warn_unmapped_columns(raw, resolved):
+    unmapped = unmapped_columns(raw, resolved)
+    if unmapped:
+        warnings.warn(f"ILI columns not recognised, so ignored: {', '.join(unmapped)}. "
+                      f"Map them onto inputs keys with column_map if they are needed.", stacklevel=3)
+    return unmapped
+
+def _unit_factor(field, unit):
+    canonical, table = FIELD_UNITS[field]
+    unit = (unit or canonical).lower()
+    if unit not in table:
+        raise ValueError(f"Unsupported unit '{unit}' for {field}; expected one of {sorted(table)}")
+    return table[unit]
+
+def normalize_ili_chunk(raw, resolved, units=None, defaults=None):
+    """Turn one chunk of vendor rows into a DataFrame of `inputs` fields in canonical units"""
+    units = units or {}
+    defaults = defaults or {}
+    frame = pd.DataFrame(index=raw.index)
+    depth_unit = None
+    
+    for column, (field, implied_unit) in resolved.items():
+        unit = units.get(field, implied_unit)
+        if field in ILI_TEXT_FIELDS:
+            frame[field] = raw[column].to_numpy()
+            continue
+        values = pd.to_numeric(raw[column], errors='coerce').to_numpy(dtype=float)
+        if field == 'corrosion_depth' and unit and unit.lower() in PERCENT_WT_UNITS:
+            depth_unit = '%wt'  # needs wall thickness, converted below
+        elif field in FIELD_UNITS:
+            values = values * _unit_factor(field, unit)
+        frame[field] = values
+    
+    # Pipeline-level values (e.g. the sidebar dataset) fill columns the vendor did not supply
+    for field in INPUT_FIELDS:
+        if field not in frame and field in defaults:
+            frame[field] = float(defaults[field])
+    
+    missing = [f for f in ILI_REQUIRED_FIELDS if f not in frame]
+    if missing:
+        raise ValueError(f"ILI listing has no column or default for: {', '.join(missing)}")
+    if depth_unit == '%wt':
+        frame['corrosion_depth'] = frame['corrosion_depth'] / 100.0 * frame['pipe_thickness']
+    for field in ('pipe_length', 'min_pressure'):
+        if field not in frame:
+            frame[field] = 0.0
+    return frame
+
+def assess_anomaly_chunk(frame):
+    """Burst pressures, current ERFs, remaining life and FFS failure years for a normalized anomaly chunk"""
+    cols = {f: frame[f].to_numpy(dtype=float) for f in INPUT_FIELDS}
+    D, t = cols['pipe_diameter'], cols['pipe_thickness']
+    d, L = cols['corrosion_depth'], cols['corrosion_length']
+    Sy, UTS = cols['yield_stress'], cols['uts']
+    
+    out = {f: frame[f].to_numpy() for f in ILI_ID_FIELDS + ILI_GEOMETRY_FIELDS if f in frame}
+    out.update(cols)
+    pressures = calculate_pressures_array(D, t, d, L, Sy, UTS)
+    out.update(pressures)
+    out['erf_asme'] = erf_array(cols['max_pressure'], pressures['P_asme'])
+    out['erf_dnv'] = erf_array(cols['max_pressure'], pressures['P_dnv'])
+    out['erf_pcorrc'] = erf_array(cols['max_pressure'], pressures['P_pcorrc'])
+    out['critical_erf'] = np.maximum.reduce([out['erf_asme'], out['erf_dnv'], out['erf_pcorrc']])
+    
+    growth = (cols['max_pressure'], cols['radial_corrosion_rate'], cols['axial_corrosion_rate'])
+    life = remaining_life_array(D, t, d, L, Sy, UTS, *growth, np.floor(cols['projection_years']))
+    failure_years = ffs_failure_years_array(
+        D, t, d, L, Sy, UTS, *growth, cols['inspection_year'], cols['projection_years'], life=life)
+    for method in FFS_METHODS:
+        out[f'remaining_life_{method.lower()}'] = life[method]
+        out[f'failure_year_{method.lower()}'] = failure_years[method]
+    return pd.DataFrame(out, index=frame.index)
+
+def iter_ili_chunks(source, fmt=None, chunksize=50_000, columns=None):
+    """Yield raw DataFrame chunks from a CSV or Parquet ILI listing (path or file-like), optionally only `columns`"""
+    if fmt is None:
+        name = str(getattr(source, 'name', source)).lower()
+        fmt = 'parquet' if name.endswith(('.parquet', '.pq')) else 'csv'
+    if fmt == 'csv':
+        yield from pd.read_csv(source, chunksize=chunksize, usecols=columns)
+    elif fmt == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Reading Parquet ILI listings requires pyarrow") from e
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported ILI file format: {fmt}")
+
+def unmapped_ili_columns(source, fmt=None, column_map=None):
+    """unmapped_columns of a listing's first rows; file-like sources are rewound afterwards"""
+    chunks = iter_ili_chunks(source, fmt=fmt, chunksize=1000)
+    raw = next(chunks, None)
+    chunks.close()
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return [] if raw is None else unmapped_columns(raw, resolve_ili_columns(raw.columns, column_map))
+
+def max_projection_years(source, fmt=None, column_map=None, chunksize=50_000):
+    """Longest whole projection period in a listing's projection_years column, or None without one.
+    
+    Only that column is read, so sizing per-year output up front costs one narrow pass.
+    """
+    chunks = iter_ili_chunks(source, fmt=fmt, chunksize=1000)
+    raw = next(chunks, None)
+    chunks.close()
+    resolved = {} if raw is None else resolve_ili_columns(raw.columns, column_map)
+    columns = [column for column, (field, _) in resolved.items() if field == 'projection_years']
+    horizon = None
+    if columns:
+        for raw in iter_ili_chunks(source, fmt=fmt, chunksize=chunksize, columns=columns):
+            values = pd.to_numeric(raw[columns[0]], errors='coerce').dropna()
+            if len(values):
+                top = int(np.floor(values.max()))
+                horizon = top if horizon is None else max(horizon, top)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return horizon
+
+def read_ili_file(source, fmt=None, column_map=None, units=None, defaults=None, chunksize=50_000,
+                  on_chunk=None):
+    """Normalized `inputs` table of a whole ILI listing (identification columns included), without assessing it"""
+    resolved = None
+    frames = []
+    for raw in iter_ili_chunks(source, fmt=fmt, chunksize=chunksize):
+        if resolved is None:
+            resolved = resolve_ili_columns(raw.columns, column_map)
+            warn_unmapped_columns(raw, resolved)
+        frames.append(normalize_ili_chunk(raw, resolved, units, defaults))
+        if on_chunk is not None:
+            on_chunk(frames[-1])
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def assess_ili_file(source, fmt=None, column_map=None, units=None, defaults=None,
+                    chunksize=50_000, output_path=None, on_chunk=None, max_rows=MAX_IN_MEMORY_ROWS):
+    """Stream an ILI listing through the burst-pressure and FFS computations chunk by chunk.
+    
+    Returns the number of rows written when `output_path` (.csv or .parquet) is
+    given, so that nothing accumulates in memory. Without it the whole results
+    table is returned, which is meant for listings of at most `max_rows` anomalies:
+    a larger one raises ValueError as soon as it is exceeded. `on_chunk` is called
+    with each assessed chunk (e.g. to report progress); an exception it raises
+    aborts the assessment.
+    """
+    resolved = None
+    results = []
+    writer = None
+    rows = 0
+    try:
+        for raw in iter_ili_chunks(source, fmt=fmt, chunksize=chunksize):
+            if resolved is None:
+                resolved = resolve_ili_columns(raw.columns, column_map)
+                warn_unmapped_columns(raw, resolved)
+            assessed = assess_anomaly_chunk(normalize_ili_chunk(raw, resolved, units, defaults))
+            if on_chunk is not None:
+                on_chunk(assessed)
+            first_chunk = rows == 0
+            rows += len(assessed)
+            if output_path is None:
+                if max_rows is not None and rows > max_rows:
+                    raise ValueError(f"The listing has more than {max_rows:,} anomalies; "
+                                     "assess it to an output file (output_path) instead")
+                results.append(assessed)
+            elif str(output_path).lower().endswith('.parquet'):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(assessed, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+            else:
+                assessed.to_csv(output_path, mode='w' if first_chunk else 'a',
+                                header=first_chunk, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+    
+    if output_path is not None:
+        return rows
+    if not results:
+        return pd.DataFrame()
+    return pd.concat(results, ignore_index=True)
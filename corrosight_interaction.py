@@ -0,0 +1,194 @@
+"""Interacting-defect grouping and combined-defect assessment (DNV-RP-F101 Part B)."""
+import numpy as np
+import pandas as pd
+
+from corrosight_core import INPUT_FIELDS, calculate_pressures_array, erf_array
+from corrosight_ingest import assess_anomaly_chunk
+
+# Defects interact when both spacings are below these multiples of sqrt(D*t):
+# axial 2.0*sqrt(D*t), circumferential 360*sqrt(t/D) degrees = pi*sqrt(D*t) of arc
+DNV_AXIAL_LIMIT = 2.0
+DNV_CIRCUMFERENTIAL_LIMIT = np.pi
+# Upper bound on candidate pairs or combinations materialized at once
+PAIR_BLOCK = 2_000_000
+
+def clock_to_degrees(values):
+    """Clock positions ('4:30', 4.5 hours, or plain degrees when above 12) to degrees from top dead centre"""
+    series = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series):
+        hours = series.to_numpy(dtype=float)
+    else:
+        parts = series.astype(str).str.extract(r'^\s*(\d+(?:\.\d+)?)\s*(?::\s*(\d+(?:\.\d+)?))?')
+        hours = parts[0].astype(float).to_numpy() + parts[1].astype(float).fillna(0.0).to_numpy() / 60.0
+    return np.where(hours > 12.0, hours, hours * 30.0) % 360.0
+
+def _axial_extent(frame):
+    """Sorted-by-start axial start/end (mm) and the sort order"""
+    length = frame['corrosion_length'].to_numpy(dtype=float)
+    start = frame['chainage'].to_numpy(dtype=float) * 1000.0
+    order = np.argsort(start, kind='stable')
+    return start[order], start[order] + length[order], order
+
+def _candidate_pairs(start, end, reach):
+    """(i, j) index pairs with j > i and start[j] within `reach` of end[i], in blocks.
+    
+    With starts sorted, each defect's candidates are one contiguous run found by
+    binary search, so the cost is O(n log n) plus the number of candidates.
+    """
+    n = start.size
+    upper = np.searchsorted(start, end + reach, side='left')
+    counts = np.maximum(upper - np.arange(n) - 1, 0)
+    cumulative = np.cumsum(counts)
+    first = 0
+    while first < n:
+        budget = (cumulative[first - 1] if first else 0) + PAIR_BLOCK
+        last = max(first + 1, int(np.searchsorted(cumulative, budget, side='right')))
+        block = np.arange(first, min(last, n))
+        i = np.repeat(block, counts[block])
+        if i.size:
+            starts = np.cumsum(counts[block]) - counts[block]
+            j = i + 1 + np.arange(i.size) - np.repeat(starts, counts[block])
+            yield i, j
+        first = last
+
+def _connected_labels(n, i, j):
+    """Component label (smallest member index) per node for the undirected edges (i, j)"""
+    labels = np.arange(n)
+    while i.size:
+        low = np.minimum(labels[i], labels[j])
+        updated = labels.copy()
+        np.minimum.at(updated, i, low)
+        np.minimum.at(updated, j, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    return labels
+
+def interaction_groups(frame):
+    """Group id per anomaly (row order of `frame`): anomalies sharing an id interact.
+    
+    `frame` holds normalized anomalies with chainage (m), corrosion_length,
+    pipe_diameter and pipe_thickness; clock_position and corrosion_width refine
+    the circumferential check when present (absent ones are treated as aligned).
+    Ids are 0..k-1 numbered by axial position.
+    """
+    n = len(frame)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    if 'chainage' not in frame:
+        raise ValueError("Interaction checks need the anomaly chainage")
+    start, end, order = _axial_extent(frame)
+    D = frame['pipe_diameter'].to_numpy(dtype=float)[order]
+    t = frame['pipe_thickness'].to_numpy(dtype=float)[order]
+    scale = np.sqrt(np.clip(D * t, 0.0, None))
+    clock = clock_to_degrees(frame['clock_position'])[order] if 'clock_position' in frame else np.zeros(n)
+    width = frame['corrosion_width'].to_numpy(dtype=float)[order] if 'corrosion_width' in frame else np.zeros(n)
+    width = np.nan_to_num(width)
+    
+    edges_i, edges_j = [], []
+    for i, j in _candidate_pairs(start, end, DNV_AXIAL_LIMIT * scale.max()):
+        pair_scale = np.maximum(scale[i], scale[j])
+        axial = start[j] - end[i] < DNV_AXIAL_LIMIT * pair_scale
+        angle = np.abs(clock[i] - clock[j]) % 360.0
+        arc = np.minimum(angle, 360.0 - angle) / 360.0 * np.pi * np.maximum(D[i], D[j])
+        # Unknown clock positions count as aligned, which can only add interactions
+        circumferential = ~(arc - (width[i] + width[j]) / 2.0 >= DNV_CIRCUMFERENTIAL_LIMIT * pair_scale)
+        keep = axial & circumferential
+        edges_i.append(i[keep])
+        edges_j.append(j[keep])
+    
+    labels = _connected_labels(n, np.concatenate(edges_i or [np.empty(0, int)]),
+                               np.concatenate(edges_j or [np.empty(0, int)]))
+    _, sorted_ids = np.unique(labels, return_inverse=True)
+    groups = np.empty(n, dtype=np.int64)
+    groups[order] = sorted_ids
+    return groups
+
+def _combination_ranges(group_start, group_size):
+    """Every contiguous run (n, m), n <= m, of positions within each group, grouped by n"""
+    local = np.arange(group_size.sum()) - np.repeat(np.cumsum(group_size) - group_size, group_size)
+    first = np.repeat(group_start, group_size) + local
+    counts = np.repeat(group_size, group_size) - local
+    n = np.repeat(first, counts)
+    return n, n + np.arange(n.size) - np.repeat(np.cumsum(counts) - counts, counts)
+
+def combine_interacting_defects(frame, groups):
+    """The governing effective defect of every interacting group of two or more anomalies.
+    
+    Within each group (in axial order) every run of adjacent defects n..m is
+    combined as in DNV-RP-F101: total length from the start of n to the furthest
+    end, depth sum(d_i * l_i) / l_nm (capped at the deepest member, since axial
+    overlap is not projected). Single defects are runs too. The run with the highest
+    critical ERF governs; it keeps the wall, material, pressure and growth inputs
+    of its first defect. Returns one row per group with INPUT_FIELDS, the first
+    defect's identification columns, `group`, `n_defects` and `n_combined`.
+    """
+    groups = np.asarray(groups)
+    size = np.bincount(groups, minlength=groups.max() + 1 if groups.size else 0)
+    multi = np.flatnonzero(size >= 2)
+    if multi.size == 0:
+        return pd.DataFrame(columns=['group', 'n_defects', 'n_combined', *INPUT_FIELDS])
+    
+    members = np.flatnonzero(np.isin(groups, multi))
+    chainage = frame['chainage'].to_numpy(dtype=float)[members]
+    members = members[np.lexsort((chainage, groups[members]))]
+    member_groups = groups[members]
+    group_start = np.searchsorted(member_groups, multi)
+    group_size = size[multi]
+    
+    length = frame['corrosion_length'].to_numpy(dtype=float)[members]
+    depth = frame['corrosion_depth'].to_numpy(dtype=float)[members]
+    start = frame['chainage'].to_numpy(dtype=float)[members] * 1000.0
+    end = start + length
+    column = {f: frame[f].to_numpy(dtype=float)[members] for f in INPUT_FIELDS}
+    area = np.concatenate([[0.0], np.cumsum(depth * length)])
+    
+    best_range = np.zeros((multi.size, 2), dtype=np.int64)
+    best_geometry = np.zeros((multi.size, 2))
+    for block in np.array_split(np.arange(multi.size), max(1, int((group_size ** 2).sum() // PAIR_BLOCK) + 1)):
+        n, m = _combination_ranges(group_start[block], group_size[block])
+        # Running maximum of the end position per first defect n, made segment-local by an offset
+        span = end[m] - start[n]
+        segment = np.cumsum(np.r_[True, n[1:] != n[:-1]])
+        offset = segment * (max(span.max(), depth.max()) + 1.0)
+        combined_length = np.maximum.accumulate(span + offset) - offset
+        combined_depth = np.minimum((area[m + 1] - area[n]) / np.where(combined_length > 0, combined_length, 1.0),
+                                    np.maximum.accumulate(depth[m] + offset) - offset)
+        
+        pressures = calculate_pressures_array(column['pipe_diameter'][n], column['pipe_thickness'][n],
+                                              combined_depth, combined_length,
+                                              column['yield_stress'][n], column['uts'][n])
+        maop = column['max_pressure'][n]
+        critical = np.maximum.reduce([erf_array(maop, pressures[key]) for key in ('P_asme', 'P_dnv', 'P_pcorrc')])
+        
+        owner = np.searchsorted(group_start, n, side='right') - 1
+        order = np.lexsort((-critical, owner))
+        winners = order[np.r_[True, owner[order][1:] != owner[order][:-1]]]
+        best_range[owner[winners]] = np.column_stack([n[winners], m[winners]])
+        best_geometry[owner[winners]] = np.column_stack([combined_length[winners], combined_depth[winners]])
+    
+    first = best_range[:, 0]
+    effective = frame.iloc[members[first]].reset_index(drop=True)
+    effective['corrosion_length'] = best_geometry[:, 0]
+    effective['corrosion_depth'] = best_geometry[:, 1]
+    effective.insert(0, 'group', multi)
+    effective.insert(1, 'n_defects', group_size)
+    effective.insert(2, 'n_combined', best_range[:, 1] - best_range[:, 0] + 1)
+    return effective
+
+def assess_interacting_defects(frame):
+    """Group ids per anomaly and the assessed effective defect of each interacting group.
+    
+    `frame` is a normalized or assessed anomaly table (e.g. from assess_ili_file).
+    The effective defects go through the same burst-pressure, ERF and FFS
+    computations as single anomalies.
+    """
+    groups = interaction_groups(frame)
+    effective = combine_interacting_defects(frame, groups)
+    if effective.empty:
+        return groups, effective
+    assessed = assess_anomaly_chunk(effective)
+    for column in ('n_combined', 'n_defects', 'group'):
+        assessed.insert(0, column, effective[column].to_numpy())
+    return groups, assessed
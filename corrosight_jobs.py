@@ -0,0 +1,194 @@
+"""Background analysis jobs: a shared worker pool, per-session job slots, progress and cancellation."""
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from corrosight_timing import StageTimer
+
+JOB_WORKERS = int(os.environ.get('CORROSIGHT_JOB_WORKERS', min(4, os.cpu_count() or 1)))
+# Processes of the one Monte Carlo pool every job shares, so concurrent sessions never oversubscribe the host
+POF_WORKERS = int(os.environ.get('CORROSIGHT_POF_WORKERS', os.cpu_count() or 1))
+# Finished jobs nobody collected (e.g. the session closed) are dropped after this many seconds
+JOB_RETENTION = 3600
+
+logger = logging.getLogger('corrosight.jobs')
+_ids = itertools.count(1)
+
+class JobCancelled(Exception):
+    """Raised inside a job at its next checkpoint once it has been cancelled"""
+
+class Job:
+    """One background computation and its observable state.
+    
+    The function runs as fn(job, *args, **kwargs) on a pool thread and reports
+    through progress(), which is also its cancellation checkpoint, and
+    add_partial() for results that are usable before the whole job finishes,
+    and may charge its work to named stages of `timer`.
+    Streamlit scripts only read the job. State goes queued -> running -> done,
+    failed or cancelled. A job that replaces another in the same slot waits for
+    that one to stop first, so the two never work on shared state at once.
+    """
+    
+    def __init__(self, owner, slot, label, fn, args=(), kwargs=None, previous=None):
+        self.id = next(_ids)
+        self.owner = owner
+        self.slot = slot
+        self.label = label
+        self.state = 'queued'
+        self.fraction = None
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.timer = None
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs or {}
+        self._previous = previous
+        self._partials = []
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+    
+    @property
+    def done(self):
+        return self._done.is_set()
+    
+    @property
+    def cancelling(self):
+        return self._cancel.is_set() and not self.done
+    
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+    
+    def progress(self, fraction=None, message=None):
+        """Report progress (fraction in [0, 1] or None if unknown); raises JobCancelled once cancelled"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        with self._lock:
+            self.fraction = None if fraction is None else min(max(float(fraction), 0.0), 1.0)
+            if message is not None:
+                self.message = message
+    
+    def add_partial(self, value):
+        with self._lock:
+            self._partials.append(value)
+    
+    def partials(self, start=0):
+        """Partial results published so far, from position `start`"""
+        with self._lock:
+            return self._partials[start:]
+    
+    def cancel(self):
+        self._cancel.set()
+    
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+    
+    def _run(self):
+        if self._previous is not None:
+            self._previous.wait()
+            self._previous = None
+        try:
+            if self._cancel.is_set():
+                raise JobCancelled()
+            self.started = time.time()
+            self.timer = StageTimer()
+            self.state = 'running'
+            self.result = self._fn(self, *self._args, **self._kwargs)
+            self.state = 'done'
+        except JobCancelled:
+            self.state = 'cancelled'
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", self.id, self.label)
+            self.error = e
+            self.state = 'failed'
+        finally:
+            self.finished = time.time()
+            if self.timer is not None:
+                self.timer.stop()
+            self._fn = self._args = self._kwargs = None
+            self._done.set()
+
+class JobManager:
+    """Worker pool running Jobs, indexed by (owner, slot).
+    
+    One instance serves the whole server (see st.cache_resource); owners are
+    session ids, slots name the kind of work (one job per kind and session).
+    Jobs run on threads outside the script thread. The NumPy kernels release
+    the GIL, and Monte Carlo sampling fans out to `pof_executor`, one process
+    pool started on first use and shared by every job.
+    """
+    
+    def __init__(self, workers=JOB_WORKERS, pof_workers=POF_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='corrosight-job')
+        self._pof_workers = pof_workers
+        self._pof_pool = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def pof_executor(self):
+        with self._lock:
+            if self._pof_pool is None:
+                # Spawned, not forked: the server process runs many threads
+                self._pof_pool = ProcessPoolExecutor(max_workers=self._pof_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._pof_pool
+    
+    def submit(self, owner, slot, label, fn, *args, **kwargs):
+        """Run fn(job, *args, **kwargs) in the pool, cancelling and replacing `owner`'s job in `slot`"""
+        with self._lock:
+            self._prune()
+            previous = self._jobs.get((owner, slot))
+            if previous is not None and previous.done:
+                previous = None
+            elif previous is not None:
+                previous.cancel()
+            job = Job(owner, slot, label, fn, args, kwargs, previous)
+            self._jobs[owner, slot] = job
+        # Replacements queue behind the job they replace, which the FIFO pool always starts first
+        self._pool.submit(job._run)
+        return job
+    
+    def get(self, owner, slot):
+        with self._lock:
+            return self._jobs.get((owner, slot))
+    
+    def jobs(self, owner):
+        with self._lock:
+            return [job for (job_owner, _), job in self._jobs.items() if job_owner == owner]
+    
+    def cancel(self, owner, slot=None):
+        """Cancel `owner`'s job in `slot`, or all of its jobs"""
+        for job in self.jobs(owner):
+            if slot is None or job.slot == slot:
+                job.cancel()
+    
+    def forget(self, job):
+        """Drop `job` from its slot, once its result has been collected or is no longer wanted"""
+        with self._lock:
+            if self._jobs.get((job.owner, job.slot)) is job:
+                del self._jobs[job.owner, job.slot]
+    
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION
+        for key, job in list(self._jobs.items()):
+            if job.done and job.finished < cutoff:
+                del self._jobs[key]
+    
+    def shutdown(self, cancel=True):
+        if cancel:
+            for job in list(self._jobs.values()):
+                job.cancel()
+        self._pool.shutdown(wait=True)
+        if self._pof_pool is not None:
+            self._pof_pool.shutdown(wait=True)
@@ -0,0 +1,191 @@
+"""Run-to-run ILI anomaly matching and per-defect corrosion growth rates."""
+import numpy as np
+import pandas as pd
+
+from corrosight_interaction import clock_to_degrees
+
+# Matching windows after odometer correction: axial (m) and circumferential (degrees)
+AXIAL_TOLERANCE = 1.0
+CLOCK_TOLERANCE = 30.0
+# Welds further apart than this (m) after the first-order alignment never correspond
+WELD_TOLERANCE = 2.0
+# Upper bound on candidate anomaly pairs materialized at once
+PAIR_BLOCK = 2_000_000
+# feature_type values (lower case) that mark girth welds
+GIRTH_WELD_TYPES = ('girth weld', 'girth_weld', 'gw', 'weld')
+
+def split_girth_welds(frame):
+    """(anomalies, sorted girth weld chainages in m) of a listing that mixes both via `feature_type`"""
+    if 'feature_type' not in frame:
+        return frame, np.empty(0)
+    kind = frame['feature_type'].astype(str).str.strip().str.lower()
+    welds = kind.isin(GIRTH_WELD_TYPES).to_numpy()
+    return frame[~welds], np.sort(frame['chainage'].to_numpy(dtype=float)[welds])
+
+def _nearest(sorted_values, values):
+    """Index of the nearest element of `sorted_values` for each of `values`"""
+    upper = np.clip(np.searchsorted(sorted_values, values), 1, sorted_values.size - 1)
+    lower = upper - 1
+    return np.where(np.abs(values - sorted_values[lower]) <= np.abs(sorted_values[upper] - values), lower, upper)
+
+def _mutual_nearest(reference, other, tolerance):
+    """(i, j) pairs where reference[i] and other[j] are each other's nearest, within `tolerance`, in order"""
+    if reference.size < 2 or other.size < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    j = np.arange(other.size)
+    i = _nearest(reference, other)
+    keep = (_nearest(other, reference[i]) == j) & (np.abs(reference[i] - other) <= tolerance)
+    i, j = i[keep], j[keep]
+    # Corresponding welds keep their order along the line
+    monotone = i > np.maximum.accumulate(np.r_[-1, i[:-1]])
+    return i[monotone], j[monotone]
+
+def match_girth_welds(reference, other, tolerance=WELD_TOLERANCE):
+    """(i, j) pairs of corresponding girth welds in two runs, both chainage arrays sorted.
+    
+    The first and last welds of each run fix a first-order scale and offset
+    (odometer slip accumulates along the line). Mutual nearest neighbours within
+    `tolerance` then match, and a second pass under the resulting piecewise-linear
+    correction picks up welds the straight-line fit left too far apart.
+    """
+    if reference.size < 2 or other.size < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    scale = (reference[-1] - reference[0]) / (other[-1] - other[0]) if other[-1] > other[0] else 1.0
+    aligned = reference[0] + (other - other[0]) * scale
+    i, j = _mutual_nearest(reference, aligned, tolerance)
+    if i.size >= 2:
+        i, j = _mutual_nearest(reference, correct_chainage(other, other[j], reference[i]), tolerance)
+    return i, j
+
+def correct_chainage(chainage, source_welds, target_welds):
+    """Map chainages onto another run's odometer, piecewise linearly between matched welds"""
+    if source_welds.size == 0:
+        return np.asarray(chainage, dtype=float)
+    # Beyond the end welds the nearest end's offset applies
+    return chainage + np.interp(chainage, source_welds, target_welds - source_welds)
+
+def _candidate_pairs(reference, values, tolerance):
+    """(i, j) pairs with |reference[i] - values[j]| <= tolerance, `reference` sorted, in blocks"""
+    lower = np.searchsorted(reference, values - tolerance, side='left')
+    counts = np.searchsorted(reference, values + tolerance, side='right') - lower
+    cumulative = np.cumsum(counts)
+    first = 0
+    while first < values.size:
+        budget = (cumulative[first - 1] if first else 0) + PAIR_BLOCK
+        last = max(first + 1, int(np.searchsorted(cumulative, budget, side='right')))
+        block = np.arange(first, min(last, values.size))
+        j = np.repeat(block, counts[block])
+        if j.size:
+            starts = np.cumsum(counts[block]) - counts[block]
+            i = np.repeat(lower[block], counts[block]) + np.arange(j.size) - np.repeat(starts, counts[block])
+            yield i, j
+        first = last
+
+def _assign(i, j, score):
+    """One-to-one pairs from scored candidates: repeatedly accept every mutual best pair.
+    
+    Each round accepts at least the best remaining pair and drops the pairs that
+    share an end with an accepted one, which ends with the greedy best-first matching.
+    """
+    accepted_i, accepted_j = [], []
+    while i.size:
+        order = np.lexsort((score, j))
+        best_for_j = order[np.r_[True, j[order][1:] != j[order][:-1]]]
+        order = np.lexsort((score, i))
+        best_for_i = order[np.r_[True, i[order][1:] != i[order][:-1]]]
+        mutual = np.intersect1d(best_for_j, best_for_i, assume_unique=True)
+        accepted_i.append(i[mutual])
+        accepted_j.append(j[mutual])
+        keep = ~(np.isin(i, i[mutual]) | np.isin(j, j[mutual]))
+        i, j, score = i[keep], j[keep], score[keep]
+    if not accepted_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(accepted_i), np.concatenate(accepted_j)
+
+def match_ili_runs(earlier, later, welds_earlier=None, welds_later=None,
+                   axial_tolerance=AXIAL_TOLERANCE, clock_tolerance=CLOCK_TOLERANCE):
+    """Earlier-run counterpart of every anomaly of a later run.
+    
+    Both tables are normalized listings with chainage (m) and, optionally,
+    clock_position. Later chainages are first corrected onto the earlier odometer
+    through matched girth welds (sorted chainage arrays, when both are given).
+    Candidates within `axial_tolerance` come from a sorted merge, those also within
+    `clock_tolerance` are scored by their normalized distance and assigned one to
+    one, best first. Returns a DataFrame indexed like `later` with the matched
+    `earlier` row label (NaN when unmatched), axial_offset (m) and clock_offset (degrees).
+    """
+    for name, frame in (('earlier', earlier), ('later', later)):
+        if 'chainage' not in frame:
+            raise ValueError(f"Matching needs the chainage of the {name} run")
+    chainage = later['chainage'].to_numpy(dtype=float)
+    if welds_earlier is not None and welds_later is not None:
+        i, j = match_girth_welds(np.sort(welds_earlier), np.sort(welds_later))
+        chainage = correct_chainage(chainage, np.sort(welds_later)[j], np.sort(welds_earlier)[i])
+    
+    reference = earlier['chainage'].to_numpy(dtype=float)
+    order = np.argsort(reference, kind='stable')
+    reference = reference[order]
+    clock_earlier = clock_to_degrees(earlier['clock_position'])[order] if 'clock_position' in earlier else None
+    clock_later = clock_to_degrees(later['clock_position']) if 'clock_position' in later else None
+    
+    pairs_i, pairs_j, scores = [], [], []
+    for i, j in _candidate_pairs(reference, chainage, axial_tolerance):
+        score = ((chainage[j] - reference[i]) / axial_tolerance) ** 2
+        if clock_earlier is not None and clock_later is not None:
+            angle = np.abs(clock_earlier[i] - clock_later[j]) % 360.0
+            angle = np.minimum(angle, 360.0 - angle)
+            # Unknown clock positions neither exclude nor favour a candidate
+            angle = np.nan_to_num(angle)
+            keep = angle <= clock_tolerance
+            i, j, score = i[keep], j[keep], score[keep] + (angle[keep] / clock_tolerance) ** 2
+        pairs_i.append(i)
+        pairs_j.append(j)
+        scores.append(score)
+    empty = np.empty(0, dtype=np.int64)
+    i, j = _assign(np.concatenate(pairs_i or [empty]), np.concatenate(pairs_j or [empty]),
+                   np.concatenate(scores or [np.empty(0)]))
+    
+    matched = np.full(len(later), np.nan, dtype=object)
+    matched[j] = earlier.index.to_numpy()[order[i]]
+    axial = np.full(len(later), np.nan)
+    axial[j] = chainage[j] - reference[i]
+    clock = np.full(len(later), np.nan)
+    if clock_earlier is not None and clock_later is not None:
+        clock[j] = (clock_later[j] - clock_earlier[i] + 180.0) % 360.0 - 180.0
+    return pd.DataFrame({'matched': matched, 'axial_offset': axial, 'clock_offset': clock}, index=later.index)
+
+def growth_rates(earlier, later, matches, clip_negative=True):
+    """Depth and length growth rates (mm/yr) of each matched later anomaly, NaN where unmatched.
+    
+    Rates are the change between the runs over the years between their
+    inspection years. Measurement scatter can make a defect shrink; with
+    `clip_negative` such rates count as no growth.
+    """
+    found = matches['matched'].notna().to_numpy()
+    source = matches['matched'].to_numpy()[found]
+    rates = pd.DataFrame({'radial_corrosion_rate': np.nan, 'axial_corrosion_rate': np.nan}, index=later.index)
+    if not found.any():
+        return rates
+    years = (later['inspection_year'].to_numpy(dtype=float)[found]
+             - earlier.loc[source, 'inspection_year'].to_numpy(dtype=float))
+    if (years <= 0).any():
+        raise ValueError("The later run must be inspected after the earlier one")
+    for rate, field in (('radial_corrosion_rate', 'corrosion_depth'), ('axial_corrosion_rate', 'corrosion_length')):
+        change = later[field].to_numpy(dtype=float)[found] - earlier.loc[source, field].to_numpy(dtype=float)
+        values = change / years
+        rates.loc[found, rate] = np.maximum(values, 0.0) if clip_negative else values
+    return rates
+
+def apply_growth_rates(later, rates, fill='median'):
+    """`later` with its growth-rate inputs replaced by the matched per-defect rates.
+    
+    Unmatched (new) anomalies get the median matched rate with fill='median',
+    or keep their own rates with fill=None.
+    """
+    frame = later.copy()
+    for field in ('radial_corrosion_rate', 'axial_corrosion_rate'):
+        values = rates[field]
+        if fill == 'median' and values.notna().any():
+            values = values.fillna(values.median())
+        frame[field] = values.fillna(frame[field]) if field in frame else values
+    return frame
@@ -0,0 +1,208 @@
+"""Streaming rainflow cycle counting of pressure histories and Miner's-rule fatigue damage."""
+import numpy as np
+import pandas as pd
+
+from corrosight_core import calculate_fatigue_criteria_array, calculate_stresses_array
+from corrosight_ingest import _normalize_header, _unit_factor, iter_ili_chunks
+
+DEFAULT_RESOLUTION = 0.01  # MPa
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+# Basquin S-N curve through sigma_f at one reversal and the endurance limit Se here
+ENDURANCE_CYCLES = 1e6
+# Vectorized peeling stops once a pass closes fewer than this share of the reversals
+PEEL_MIN_FRACTION = 0.02
+_BIAS = 1 << 31
+
+def _reversals(levels, pending, direction):
+    """Confirmed turning points of `levels` following the carried point and direction.
+    
+    Returns (reversals, new pending point, new direction); the last point is never
+    confirmed because the next sample may still extend it.
+    """
+    if pending is not None:
+        levels = np.concatenate([[pending], levels])
+    if levels.size == 0:
+        return levels, pending, direction
+    levels = levels[np.r_[True, levels[1:] != levels[:-1]]]
+    if levels.size == 1:
+        return levels[:0], levels[0], direction
+    step = np.sign(np.diff(levels))
+    turning = np.r_[direction != step[0], step[1:] != step[:-1]]
+    return levels[:-1][turning], levels[-1], step[-1]
+
+def _peel(series):
+    """Close the cycles of adjacent pairs inside their neighbours (four-point rule), many at once.
+    
+    Pairs (i, i+1) with |r[i+1] - r[i]| no larger than either neighbouring range
+    are full cycles. Non-adjacent ones are removed together, which leaves the same
+    cycles as removing them one by one. Returns (lows, highs, remaining series).
+    """
+    lows, highs = [], []
+    while series.size >= 4:
+        ranges = np.abs(np.diff(series))
+        inner = ranges[1:-1]
+        candidate = (inner <= ranges[:-2]) & (inner <= ranges[2:])
+        if not candidate.any():
+            break
+        # Every other candidate of each consecutive run, so no two chosen pairs share a point
+        run_start = candidate & ~np.r_[False, candidate[:-1]]
+        first = np.flatnonzero(run_start)[np.cumsum(run_start) - 1]
+        chosen = candidate & ((np.arange(candidate.size) - first) % 2 == 0)
+        i = np.flatnonzero(chosen) + 1
+        pairs = np.sort(np.column_stack([series[i], series[i + 1]]), axis=1)
+        lows.append(pairs[:, 0])
+        highs.append(pairs[:, 1])
+        keep = np.ones(series.size, dtype=bool)
+        keep[i] = keep[i + 1] = False
+        series = series[keep]
+        if i.size < PEEL_MIN_FRACTION * series.size:
+            break
+    return lows, highs, series
+
+def _four_point(series):
+    """Sequential ASTM E1049 four-point rainflow: (lows, highs, residue stack)"""
+    lows, highs, stack = [], [], []
+    for point in series.tolist():
+        stack.append(point)
+        while len(stack) >= 4:
+            a, b, c, d = stack[-4:]
+            if abs(c - b) <= abs(b - a) and abs(c - b) <= abs(d - c):
+                lows.append(min(b, c))
+                highs.append(max(b, c))
+                del stack[-3:-1]
+            else:
+                break
+    return lows, highs, np.array(stack, dtype=np.int64)
+
+class RainflowCounter:
+    """Rainflow counter fed a pressure history in chunks of any size.
+    
+    Pressures are quantized to `resolution` (MPa), so both the residue of open
+    half cycles and the (low, high) cycle histogram are bounded by the number
+    of pressure levels rather than by the history length.
+    """
+    
+    def __init__(self, resolution=DEFAULT_RESOLUTION):
+        self.resolution = resolution
+        self.samples = 0
+        self._residue = np.empty(0, dtype=np.int64)
+        self._pending = None
+        self._direction = 0
+        self._counts = {}
+    
+    def _add(self, lows, highs):
+        # One int64 key per (low, high) pair (high biased into the low 32 bits); a row-wise unique is far slower
+        keys = (np.concatenate(lows).astype(np.int64) << 32) + np.concatenate(highs).astype(np.int64) + _BIAS
+        keys, counts = np.unique(keys, return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            low, high = key >> 32, (key & 0xFFFFFFFF) - _BIAS
+            self._counts[low, high] = self._counts.get((low, high), 0.0) + count
+    
+    def update(self, pressures):
+        """Count the closed cycles in the next stretch of the history (MPa, NaNs skipped)"""
+        pressures = np.asarray(pressures, dtype=float)
+        pressures = pressures[~np.isnan(pressures)]
+        self.samples += pressures.size
+        levels = np.rint(pressures / self.resolution).astype(np.int64)
+        reversals, self._pending, self._direction = _reversals(levels, self._pending, self._direction)
+        if reversals.size == 0:
+            return
+        # The open point trails the series as an outer neighbour only, never as a cycle end
+        series = np.concatenate([self._residue, reversals, [self._pending]])
+        lows, highs, series = _peel(series)
+        more_lows, more_highs, series = _four_point(series)
+        self._add(lows + [more_lows], highs + [more_highs])
+        self._residue = series[:-1]
+    
+    def histogram(self, final=True):
+        """DataFrame of p_low, p_high (MPa) and cycles; with `final`, the residue counts as half cycles"""
+        counts = dict(self._counts)
+        if final:
+            residue = self._residue
+            if self._pending is not None:
+                # The open point is a reversal once the history ends, and may enclose cycles of the
+                # residue: a stretch that only extended it was never run through the four-point check
+                lows, highs, residue = _four_point(np.r_[residue, self._pending])
+                for low, high in zip(lows, highs):
+                    counts[low, high] = counts.get((low, high), 0.0) + 1.0
+            for low, high in zip(np.minimum(residue[:-1], residue[1:]).tolist(),
+                                 np.maximum(residue[:-1], residue[1:]).tolist()):
+                counts[low, high] = counts.get((low, high), 0.0) + 0.5
+        keys = np.array(list(counts), dtype=np.int64).reshape(-1, 2)
+        return pd.DataFrame({
+            'p_low': keys[:, 0] * self.resolution,
+            'p_high': keys[:, 1] * self.resolution,
+            'cycles': np.fromiter(counts.values(), dtype=float, count=len(counts))
+        }).sort_values(['p_low', 'p_high'], ignore_index=True)
+
+def fatigue_damage(histogram, inputs, duration_years=None):
+    """Miner's-rule damage of a rainflow histogram for each mean-stress criterion.
+    
+    Each bin's pressure extremes become Von Mises stresses with the thin-wall
+    formulas of calculate_stresses_array. The mean-stress terms of
+    calculate_fatigue_criteria_array turn its alternating stress into an
+    equivalent fully reversed amplitude, whose life comes from a Basquin curve
+    through sigma_f and the endurance limit Se (no damage below Se). Returns
+    ({criterion: {'damage', 'life_years'}}, per-bin DataFrame with each criterion's damage).
+    """
+    p_low, p_high = histogram['p_low'].to_numpy(), histogram['p_high'].to_numpy()
+    cycles = histogram['cycles'].to_numpy()
+    stresses = calculate_stresses_array(inputs['pipe_thickness'], inputs['pipe_diameter'], p_high, p_low,
+                                        inputs['uts'])
+    sigma_a, Se, sigma_f = stresses['sigma_a'], stresses['Se'], stresses['sigma_f']
+    criteria = calculate_fatigue_criteria_array(sigma_a, stresses['sigma_m'], Se, inputs['uts'],
+                                                inputs['yield_stress'], sigma_f)
+    
+    Se, sigma_f = float(np.max(Se)), float(np.max(sigma_f))
+    exponent = np.log10(Se / sigma_f) / np.log10(2 * ENDURANCE_CYCLES) if 0 < Se < sigma_f else np.nan
+    amplitude_ratio = sigma_a / Se if Se > 0 else np.zeros_like(sigma_a)
+    
+    per_bin = histogram.copy()
+    per_bin['sigma_a'] = sigma_a
+    per_bin['sigma_m'] = stresses['sigma_m']
+    summary = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name, factor in criteria.items():
+            # Remaining capacity of the mean-stress term, e.g. 1 - sigma_m/UTS for Goodman
+            if name == 'ASME-Elliptic':
+                capacity = np.sqrt(np.clip(1.0 - (factor ** 2 - amplitude_ratio ** 2), 0.0, None))
+            else:
+                capacity = 1.0 - (factor - amplitude_ratio)
+            equivalent = np.where(capacity > 0, sigma_a / capacity, np.inf)
+            life = np.where(equivalent > Se, 0.5 * (equivalent / sigma_f) ** (1.0 / exponent), np.inf)
+            damage = np.where(sigma_a > 0, cycles / life, 0.0)
+            per_bin[f'damage_{name}'] = damage
+            total = float(damage.sum())
+            summary[name] = {
+                'damage': total,
+                'life_years': duration_years / total if duration_years and total > 0 else np.inf
+            }
+    return summary, per_bin
+
+def _pressure_column(columns, column=None):
+    if column is not None:
+        return column
+    for candidate in columns:
+        if 'pressure' in _normalize_header(candidate):
+            return candidate
+    raise ValueError("No pressure column found; name it explicitly")
+
+def assess_pressure_history(source, inputs, column=None, unit='MPa', sample_rate=1.0,
+                            resolution=DEFAULT_RESOLUTION, fmt=None, chunksize=1_000_000, on_chunk=None):
+    """Rainflow-count a SCADA pressure log (CSV or Parquet) in chunks and sum its fatigue damage.
+    
+    `inputs` supplies the pipe and material fields; `sample_rate` (Hz) turns the
+    sample count into the logged duration used for the life estimates.
+    `on_chunk` is called with the counter after each chunk; an exception it raises aborts.
+    Returns (summary, per-bin DataFrame, RainflowCounter).
+    """
+    factor = _unit_factor('max_pressure', unit)
+    counter = RainflowCounter(resolution)
+    for raw in iter_ili_chunks(source, fmt=fmt, chunksize=chunksize):
+        column = _pressure_column(raw.columns, column)
+        counter.update(pd.to_numeric(raw[column], errors='coerce').to_numpy(dtype=float) * factor)
+        if on_chunk is not None:
+            on_chunk(counter)
+    duration_years = counter.samples / sample_rate / SECONDS_PER_YEAR
+    summary, per_bin = fatigue_damage(counter.histogram(), inputs, duration_years)
+    return summary, per_bin, counter
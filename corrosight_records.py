@@ -0,0 +1,162 @@
+"""Compact array-backed result containers with the read API of the dicts they replace.
+
+Every session keeps its scenarios' results (and the shared result cache keeps
+more), so they are packed rather than held as dicts of boxed Python floats:
+each scenario's scalar sections share one float64 array and its FFS projection
+is one structured array. The containers are read-only.
+"""
+import io
+import json
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+# Layouts and key tuples are shared by every container built with the same keys
+_SHARED = {}
+
+def _shared(value):
+    return _SHARED.setdefault(value, value)
+
+class ArrayRecord(Mapping):
+    """Read-only mapping of a few named numbers held in (a slice of) one NumPy array"""
+    __slots__ = ('_keys', '_values')
+    # NaN entries are absent from sparse records (e.g. methods that never fail)
+    sparse = False
+    convert = float
+    
+    def __init__(self, keys, values):
+        self._keys = _shared(tuple(keys))
+        self._values = np.asarray(values, dtype=float)
+    
+    def __getitem__(self, key):
+        try:
+            value = self._values[self._keys.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+        if self.sparse and np.isnan(value):
+            raise KeyError(key)
+        return self.convert(value)
+    
+    def __iter__(self):
+        if not self.sparse:
+            return iter(self._keys)
+        return (key for key, value in zip(self._keys, self._values) if not np.isnan(value))
+    
+    def __len__(self):
+        return len(self._keys) if not self.sparse else int(np.count_nonzero(~np.isnan(self._values)))
+    
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self)!r})'
+
+class SparseRecord(ArrayRecord):
+    __slots__ = ()
+    sparse = True
+
+class YearRecord(SparseRecord):
+    __slots__ = ()
+    convert = int
+
+class ProjectionRecord(Sequence):
+    """Per-year FFS projection rows: row dicts by position, column arrays by name.
+    
+    Takes ownership of the structured `rows` array (without copying) and marks it read-only.
+    """
+    __slots__ = ('_rows',)
+    
+    def __init__(self, rows):
+        self._rows = np.asarray(rows)
+        self._rows.flags.writeable = False
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._rows[key]
+        if isinstance(key, slice):
+            return [dict(zip(self._rows.dtype.names, row)) for row in self._rows[key].tolist()]
+        return dict(zip(self._rows.dtype.names, self._rows[key].tolist()))
+    
+    def __len__(self):
+        return self._rows.size
+    
+    @property
+    def fields(self):
+        return self._rows.dtype.names
+    
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame(self._rows)
+
+# Results sections held as scalars, and the record type each is read back as
+RESULT_SECTIONS = {
+    'pressures': ArrayRecord,
+    'stresses': ArrayRecord,
+    'fatigue': ArrayRecord,
+    'failure_years': YearRecord,
+    'remaining_life': SparseRecord
+}
+
+class ScenarioResults(Mapping):
+    """One scenario's results dict: scalar sections, 'ffs_results' and, with Monte Carlo, 'pof'.
+    
+    `sections` maps each RESULT_SECTIONS name to a {key: number} mapping (NaN
+    where a sparse entry is absent); `rows` is the structured projection array,
+    which the results take over (see ProjectionRecord).
+    """
+    __slots__ = ('_layout', '_scalars', '_projection', '_pof')
+    
+    def __init__(self, sections, rows, pof=None):
+        layout, values, start = [], [], 0
+        for name in RESULT_SECTIONS:
+            keys = tuple(sections[name])
+            layout.append((name, keys, start, start + len(keys)))
+            values.extend(sections[name][key] for key in keys)
+            start += len(keys)
+        self._layout = _shared(tuple(layout))
+        self._scalars = np.array(values, dtype=float)
+        self._scalars.flags.writeable = False
+        self._projection = ProjectionRecord(rows)
+        self._pof = pof
+    
+    def __getitem__(self, name):
+        if name == 'ffs_results':
+            return self._projection
+        if name == 'pof' and self._pof is not None:
+            return self._pof
+        for section, keys, start, stop in self._layout:
+            if section == name:
+                return RESULT_SECTIONS[name](keys, self._scalars[start:stop])
+        raise KeyError(name)
+    
+    def __iter__(self):
+        yield from RESULT_SECTIONS
+        yield 'ffs_results'
+        if self._pof is not None:
+            yield 'pof'
+    
+    def __len__(self):
+        return len(RESULT_SECTIONS) + 1 + (self._pof is not None)
+    
+    def to_bytes(self):
+        """Self-describing binary encoding (an uncompressed .npz, no pickles) for persistent caches"""
+        arrays = {
+            'layout': np.array(json.dumps([[name, list(keys)] for name, keys, _, _ in self._layout])),
+            'scalars': self._scalars,
+            'rows': self._projection._rows
+        }
+        for key, value in (self._pof or {}).items():
+            arrays[f'pof_{key}'] = np.asarray(value)
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+    
+    @classmethod
+    def from_bytes(cls, blob):
+        with np.load(io.BytesIO(blob), allow_pickle=False) as arrays:
+            scalars = arrays['scalars']
+            sections, start = {}, 0
+            for name, keys in json.loads(arrays['layout'].item()):
+                sections[name] = dict(zip(keys, scalars[start:start + len(keys)]))
+                start += len(keys)
+            pof = {name[4:]: arrays[name] for name in arrays.files if name.startswith('pof_')}
+            if 'n_samples' in pof:
+                pof['n_samples'] = pof['n_samples'].item()
+            return cls(sections, arrays['rows'], pof or None)
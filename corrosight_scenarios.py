@@ -0,0 +1,144 @@
+"""Structure-of-arrays store for any number of assessment scenarios."""
+from collections.abc import Mapping
+from dataclasses import make_dataclass
+
+import numpy as np
+
+from corrosight_core import DEFAULT_INPUTS, INPUT_FIELDS, INTEGER_INPUT_FIELDS
+
+class _InputsMapping(Mapping):
+    """dict-style access to the fields of Inputs, so code written for `inputs` dicts keeps working"""
+    __slots__ = ()
+    
+    def __getitem__(self, field):
+        if field not in INPUT_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+    
+    def __setitem__(self, field, value):
+        if field not in INPUT_FIELDS:
+            raise KeyError(field)
+        setattr(self, field, value)
+    
+    def __iter__(self):
+        return iter(INPUT_FIELDS)
+    
+    def __len__(self):
+        return len(INPUT_FIELDS)
+    
+    @classmethod
+    def from_mapping(cls, inputs):
+        """Inputs from any mapping holding (at least) the INPUT_FIELDS"""
+        return cls(**{field: inputs[field] for field in INPUT_FIELDS})
+
+# One scenario's inputs as a slotted dataclass: attribute or item access, no per-instance dict
+Inputs = make_dataclass(
+    'Inputs', [(field, int if field in INTEGER_INPUT_FIELDS else float, DEFAULT_INPUTS[field])
+               for field in INPUT_FIELDS],
+    bases=(_InputsMapping,), eq=False, slots=True)
+Inputs.__module__ = __name__
+
+class ScenarioStore:
+    """Named scenarios held as one NumPy column per `inputs` field.
+    
+    Rows are scenarios in display order. `results` maps scenario names to the
+    results dict of the last analysis run.
+    """
+    
+    def __init__(self):
+        self.names = []
+        self.columns = {
+            field: np.empty(0, dtype=np.int64 if field in INTEGER_INPUT_FIELDS else float)
+            for field in INPUT_FIELDS
+        }
+        self.visible = np.empty(0, dtype=bool)
+        self.results = {}
+    
+    @classmethod
+    def with_defaults(cls, count=3):
+        """'Dataset 1'..'Dataset N' with default inputs, only the first one visible"""
+        store = cls()
+        for i in range(count):
+            store.add(name=f'Dataset {i+1}', visible=i == 0)
+        return store
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def __contains__(self, name):
+        return name in self.names
+    
+    def __iter__(self):
+        return iter(self.names)
+    
+    def index(self, name):
+        return self.names.index(name)
+    
+    def _unique_name(self, base):
+        if base not in self.names:
+            return base
+        n = 2
+        while f'{base} ({n})' in self.names:
+            n += 1
+        return f'{base} ({n})'
+    
+    def add(self, inputs=None, name=None, visible=True):
+        """Append a scenario (default inputs unless given) and return its name"""
+        inputs = {**DEFAULT_INPUTS, **(inputs or {})}
+        name = self._unique_name(name or f'Scenario {len(self.names) + 1}')
+        self.names.append(name)
+        for field, column in self.columns.items():
+            self.columns[field] = np.append(column, np.asarray(inputs[field], dtype=column.dtype))
+        self.visible = np.append(self.visible, visible)
+        return name
+    
+    def clone(self, name, new_name=None):
+        """Copy a scenario's inputs into a new scenario placed right after it"""
+        new_name = self.add(self.inputs(name), new_name or f'{name} copy')
+        self.move(new_name, self.index(name) + 1)
+        return new_name
+    
+    def remove(self, name):
+        i = self.index(name)
+        del self.names[i]
+        for field, column in self.columns.items():
+            self.columns[field] = np.delete(column, i)
+        self.visible = np.delete(self.visible, i)
+        self.results.pop(name, None)
+    
+    def move(self, name, position):
+        order = list(range(len(self.names)))
+        order.insert(position, order.pop(self.index(name)))
+        self.names = [self.names[i] for i in order]
+        for field, column in self.columns.items():
+            self.columns[field] = column[order]
+        self.visible = self.visible[order]
+    
+    def inputs(self, name):
+        """The scenario's Inputs, with plain Python values"""
+        i = self.index(name)
+        return Inputs(**{field: column[i].item() for field, column in self.columns.items()})
+    
+    def set_inputs(self, name, inputs):
+        """Write back edited inputs (results are kept until the next analysis run)"""
+        i = self.index(name)
+        for field, column in self.columns.items():
+            column[i] = inputs[field]
+    
+    def batch(self, rows=None):
+        """Column slices for the given row indices (all scenarios by default)"""
+        if rows is None:
+            return dict(self.columns)
+        return {field: column[rows] for field, column in self.columns.items()}
+    
+    def visible_names(self):
+        return [name for name, shown in zip(self.names, self.visible) if shown]
+    
+    def set_visible(self, names):
+        names = set(names)
+        self.visible = np.array([name in names for name in self.names], dtype=bool)
+    
+    def result_matrix(self, names, section, keys):
+        """(len(names) x len(keys)) array of each scenario's results[section] values, NaN if absent"""
+        return np.array([[self.results[name][section].get(key, np.nan) for key in keys] for name in names],
+                        dtype=float).reshape(len(names), len(keys))
@@ -0,0 +1,433 @@
+"""Local HTTP assessment service: burst pressures, FFS projections and fatigue criteria for batches of defects.
+
+    python corrosight_service.py --port 8765 --workers 4
+    
+    POST /assess   {"defects": [{"pipe_thickness": 9.5, ...}, ...] or {"pipe_thickness": [9.5, ...], ...},
+                    "defaults": {...pipeline-level inputs...}, "projection": false}
+    GET  /health   worker pool status
+    GET  /stats    request latency percentiles and batching counts
+
+`defects` are `inputs` records or columns (scalars broadcast); `defaults` fills
+fields they leave out. Values must be finite and within FIELD_BOUNDS. Responses
+hold one entry per defect for each results section (null where a value is
+undefined), the per-year FFS projection when asked for, and the request's
+timing. A request not answered within REQUEST_TIMEOUT seconds gets a 504.
+
+Concurrent requests are coalesced: whatever arrives within a few milliseconds
+of the first waiting request, or while every worker is busy, is concatenated
+into one analyze_batch call on a pool of worker processes that are started and
+warmed up before the server accepts connections. Only the standard library and
+NumPy are used, and the server binds to localhost unless told otherwise.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from corrosight_core import DEFAULT_INPUTS, FFS_GRID_FIELDS, INPUT_FIELDS, analyze_batch
+from corrosight_records import RESULT_SECTIONS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# How long the first queued request waits for others to share its batch
+COALESCE_WINDOW = 0.002
+MAX_BATCH_ROWS = 100_000
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# Longest a handler thread waits for its request's batch before answering 504
+REQUEST_TIMEOUT = 120
+# Latency percentiles cover this many recent requests
+LATENCY_WINDOW = 1000
+# Fields a defect may leave out without a default, as in scenario files
+OPTIONAL_FIELDS = ('pipe_length', 'min_pressure')
+# Accepted [low, high] range per field (others: finite and not negative). Every
+# request in a batch shares its year grid, so the horizon is bounded tightly.
+MAX_PROJECTION_YEARS = 100
+FIELD_BOUNDS = {
+    'inspection_year': (1900, 2200),
+    'projection_years': (0, MAX_PROJECTION_YEARS)
+}
+
+logger = logging.getLogger('corrosight.service')
+
+# Requests and Batches
+def request_columns(body):
+    """(defect count, INPUT_FIELDS float columns) of a request body"""
+    defects = body.get('defects')
+    defaults = dict(body.get('defaults') or {})
+    for field in OPTIONAL_FIELDS:
+        defaults.setdefault(field, DEFAULT_INPUTS[field])
+    
+    if isinstance(defects, list):
+        if not all(isinstance(defect, dict) for defect in defects):
+            raise ValueError("`defects` records must be JSON objects")
+        rows = len(defects)
+        columns = {field: [defect.get(field, defaults.get(field)) for defect in defects] for field in INPUT_FIELDS}
+    elif isinstance(defects, dict):
+        lengths = {len(values) for values in defects.values() if isinstance(values, list)}
+        if len(lengths) > 1:
+            raise ValueError("`defects` columns differ in length")
+        rows = lengths.pop() if lengths else 1
+        columns = {field: defects.get(field, defaults.get(field)) for field in INPUT_FIELDS}
+    else:
+        raise ValueError("`defects` must be a list of records or an object of columns")
+    if rows == 0:
+        raise ValueError("`defects` is empty")
+    
+    missing = [field for field, values in columns.items()
+               if values is None or (isinstance(values, list) and None in values)]
+    if missing:
+        raise ValueError(f"Defects have no value or default for: {', '.join(missing)}")
+    try:
+        columns = {field: np.broadcast_to(np.asarray(values, dtype=float), (rows,)).copy()
+                   for field, values in columns.items()}
+    except (TypeError, ValueError):
+        raise ValueError("Defect fields must be numbers (or lists of numbers)") from None
+    for field, values in columns.items():
+        low, high = FIELD_BOUNDS.get(field, (0.0, np.inf))
+        if not np.all(np.isfinite(values) & (values >= low) & (values <= high)):
+            bounds = f"from {low:g} to {high:g}" if np.isfinite(high) else f"at least {low:g}"
+            raise ValueError(f"`{field}` must be a finite number {bounds}")
+    return rows, columns
+
+def evaluate_batch(columns, projection=False):
+    """The results sections of analyze_batch for one coalesced batch (and its FFS grid if asked for)"""
+    batch = analyze_batch(columns)
+    result = {name: batch[name] for name in RESULT_SECTIONS}
+    if projection:
+        result['grid'] = batch['grid']
+        result['horizon'] = batch['horizon']
+    return result
+
+def _warm_worker():
+    """Pay a worker's imports and first-call costs before it serves a request"""
+    evaluate_batch({field: [DEFAULT_INPUTS[field]] for field in INPUT_FIELDS}, projection=True)
+
+class _Request:
+    __slots__ = ('columns', 'rows', 'projection', 'future', 'queued')
+    
+    def __init__(self, columns, rows, projection):
+        self.columns = columns
+        self.rows = rows
+        self.projection = projection
+        self.future = Future()
+        self.queued = time.perf_counter()
+
+class BatchCoalescer:
+    """Merges concurrent requests into vectorized batches evaluated on a worker pool.
+    
+    submit() returns a Future of the request's own slice of its batch results and
+    the batch timing. A dispatcher thread holds one of `workers` slots per batch
+    in flight, so requests arriving while every worker is busy simply queue up
+    and leave together, up to `max_rows` rows per batch.
+    """
+    
+    def __init__(self, pool, workers, window=COALESCE_WINDOW, max_rows=MAX_BATCH_ROWS):
+        self.window = window
+        self.max_rows = max_rows
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_rows = 0
+        self._pool = pool
+        self._slots = threading.Semaphore(workers)
+        self._pending = deque()
+        self._ready = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._dispatch, name='corrosight-coalescer', daemon=True)
+        self._thread.start()
+    
+    def submit(self, columns, rows, projection=False):
+        request = _Request(columns, rows, projection)
+        with self._ready:
+            if self._closed:
+                raise RuntimeError("Assessment service is shutting down")
+            self._pending.append(request)
+            self._ready.notify()
+        return request.future
+    
+    def close(self):
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+        self._thread.join()
+    
+    def _queued_rows(self):
+        return sum(request.rows for request in self._pending)
+    
+    def _next_batch(self):
+        """The requests of the next batch, or None once closed and drained"""
+        with self._ready:
+            while not self._pending and not self._closed:
+                self._ready.wait()
+            if not self._pending:
+                return None
+            # The window runs from the oldest request's arrival, which may already have passed
+            deadline = self._pending[0].queued + self.window
+            while not self._closed and self._queued_rows() < self.max_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+            batch, rows = [], 0
+            while self._pending and (not batch or rows + self._pending[0].rows <= self.max_rows):
+                batch.append(self._pending.popleft())
+                rows += batch[-1].rows
+            return batch
+    
+    def _dispatch(self):
+        while True:
+            self._slots.acquire()
+            batch = self._next_batch()
+            if batch is None:
+                self._slots.release()
+                return
+            self._evaluate(batch, time.perf_counter())
+    
+    def _evaluate(self, batch, dispatched, slot=True):
+        """Send one batch to the pool; `slot` when it holds one of the dispatcher's worker slots"""
+        if len(batch) == 1:
+            columns = batch[0].columns
+        else:
+            columns = {field: np.concatenate([request.columns[field] for request in batch])
+                       for field in INPUT_FIELDS}
+        try:
+            future = self._pool.submit(evaluate_batch, columns, any(request.projection for request in batch))
+        except Exception as e:
+            if slot:
+                self._slots.release()
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        future.add_done_callback(lambda done: self._deliver(batch, done, dispatched, slot))
+    
+    def _deliver(self, batch, done, dispatched, slot):
+        """Split a finished batch's results between its requests"""
+        if slot:
+            self._slots.release()
+        finished = time.perf_counter()
+        try:
+            result = done.result()
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            # Only the request at fault should fail: evaluate the batch's requests one by one
+            logger.warning("Batch of %d requests failed (%s); retrying them separately", len(batch), e)
+            for request in batch:
+                self._evaluate([request], time.perf_counter(), slot=False)
+            return
+        rows = sum(request.rows for request in batch)
+        self.batches += 1
+        self.batched_requests += len(batch)
+        self.batched_rows += rows
+        start = 0
+        try:
+            for request in batch:
+                stop = start + request.rows
+                part = {name: {key: values[start:stop] for key, values in result[name].items()}
+                        for name in RESULT_SECTIONS}
+                if request.projection:
+                    horizon = int(result['horizon'][start:stop].max())
+                    part['projection'] = result['grid'][start:stop, :horizon + 1]
+                timing = {'queued_ms': (dispatched - request.queued) * 1e3,
+                          'compute_ms': (finished - dispatched) * 1e3,
+                          'batch_requests': len(batch), 'batch_rows': rows}
+                request.future.set_result((part, timing))
+                start = stop
+        except Exception as e:
+            # Nothing else would ever complete the requests still waiting
+            logger.exception("Splitting the results of a batch of %d requests failed", len(batch))
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+
+# Service
+def _json_values(values):
+    """List (nested for 2-D arrays) of an array's values, None where not finite"""
+    values = np.asarray(values)
+    if values.dtype.kind != 'f':
+        return values.tolist()
+    return np.where(np.isfinite(values), values, None).tolist()
+
+class LatencyStats:
+    """Count and recent-window percentiles of request latencies"""
+    
+    def __init__(self, window=LATENCY_WINDOW):
+        self.requests = 0
+        self.errors = 0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds, error=False):
+        with self._lock:
+            self.requests += 1
+            self.errors += error
+            self._recent.append(seconds)
+    
+    def summary(self):
+        with self._lock:
+            recent = np.array(self._recent)
+            summary = {'requests': self.requests, 'errors': self.errors}
+        if recent.size:
+            p50, p95, p99 = np.percentile(recent, [50, 95, 99]) * 1e3
+            summary.update(p50_ms=round(p50, 3), p95_ms=round(p95, 3), p99_ms=round(p99, 3),
+                           max_ms=round(recent.max() * 1e3, 3))
+        return summary
+
+class AssessmentService:
+    """Warm worker pool, request coalescer and latency statistics behind the HTTP handler"""
+    
+    def __init__(self, workers=None, window=COALESCE_WINDOW, max_rows=MAX_BATCH_ROWS, timeout=REQUEST_TIMEOUT):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        # Spawned rather than forked, as the server process runs threads; the start-up cost is paid here once
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=_warm_worker)
+        # One task per worker starts (and so warms) them all before the first request
+        self.worker_pids = sorted({f.result() for f in wait([self._pool.submit(os.getpid)
+                                                             for _ in range(self.workers)]).done})
+        self.coalescer = BatchCoalescer(self._pool, self.workers, window, max_rows)
+        self.latency = LatencyStats()
+        self.started = time.time()
+    
+    def assess(self, body):
+        """Response body of one /assess request"""
+        started = time.perf_counter()
+        rows, columns = request_columns(body)
+        future = self.coalescer.submit(columns, rows, bool(body.get('projection')))
+        try:
+            part, timing = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise TimeoutError(f"Assessment took longer than {self.timeout:g} s") from None
+        response = {'defects': rows}
+        for name in RESULT_SECTIONS:
+            response[name] = {key: _json_values(values) for key, values in part[name].items()}
+        if 'projection' in part:
+            grid = part['projection']
+            response['projection'] = {field: _json_values(grid[field]) for field in ('year',) + FFS_GRID_FIELDS}
+        timing['total_ms'] = (time.perf_counter() - started) * 1e3
+        response['timing'] = {key: round(value, 3) for key, value in timing.items()}
+        return response
+    
+    def health(self):
+        return {'status': 'ok', 'workers': self.workers, 'worker_pids': self.worker_pids,
+                'uptime_s': round(time.time() - self.started, 1)}
+    
+    def stats(self):
+        coalescer = self.coalescer
+        batches = coalescer.batches
+        return {
+            **self.latency.summary(),
+            'batches': batches,
+            'mean_batch_requests': round(coalescer.batched_requests / batches, 2) if batches else None,
+            'mean_batch_rows': round(coalescer.batched_rows / batches, 1) if batches else None,
+            'coalesce_window_ms': coalescer.window * 1e3
+        }
+    
+    def close(self):
+        self.coalescer.close()
+        self._pool.shutdown(wait=True)
+
+class AssessmentHandler(BaseHTTPRequestHandler):
+    server_version = 'CorroSight'
+    # Keep-alive, so a client sending many small requests does not reconnect for each
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        service = self.server.service
+        if self.path == '/health':
+            self._send(200, service.health())
+        elif self.path == '/stats':
+            self._send(200, service.stats())
+        else:
+            self._send(404, {'error': f"No such endpoint: {self.path}"})
+    
+    def do_POST(self):
+        if self.path != '/assess':
+            self._send(404, {'error': f"No such endpoint: {self.path}"})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_REQUEST_BYTES:
+            self.close_connection = True
+            self._send(413, {'error': f"Request body exceeds {MAX_REQUEST_BYTES:,} bytes"})
+            return
+        service = self.server.service
+        started = time.perf_counter()
+        status = 200
+        try:
+            body = json.loads(self.rfile.read(length))
+            if not isinstance(body, dict):
+                raise ValueError("Request body must be a JSON object")
+            response = service.assess(body)
+        except ValueError as e:
+            status, response = 400, {'error': str(e)}
+        except TimeoutError as e:
+            logger.warning("Assessment request timed out: %s", e)
+            status, response = 504, {'error': str(e)}
+        except Exception as e:
+            logger.exception("Assessment request failed")
+            status, response = 500, {'error': str(e)}
+        service.latency.record(time.perf_counter() - started, error=status != 200)
+        self._send(status, response)
+    
+    def _send(self, status, payload):
+        data = json.dumps(payload, allow_nan=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+class AssessmentServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the AssessmentService its handlers share"""
+    daemon_threads = True
+    # Bursts of clients connecting at once are what coalescing is for; the default backlog of 5 resets them
+    request_queue_size = 256
+    
+    def __init__(self, address, service):
+        super().__init__(address, AssessmentHandler)
+        self.service = service
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CorroSight local assessment service")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="interface to bind (default: localhost only)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--window-ms', type=float, default=COALESCE_WINDOW * 1e3,
+                        help="how long a request waits for others to share its batch")
+    parser.add_argument('--max-batch-rows', type=int, default=MAX_BATCH_ROWS, help="defects per coalesced batch")
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT,
+                        help="seconds a request may wait for its results")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    
+    service = AssessmentService(args.workers, args.window_ms / 1e3, args.max_batch_rows, args.timeout)
+    try:
+        server = AssessmentServer((args.host, args.port), service)
+    except OSError as e:
+        service.close()
+        print(f"corrosight: {e}", file=sys.stderr)
+        return 1
+    print(f"Serving on http://{args.host}:{server.server_port} with {service.workers} warm workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
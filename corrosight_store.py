@@ -0,0 +1,291 @@
+"""On-disk columnar store of FFS projections, memory-mapped for zero-copy reads."""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from corrosight_cache import user_cache_dir
+from corrosight_core import FFS_GRID_FIELDS, project_ffs_grid
+
+STORE_VERSION = 1
+# Private to the user running the server: stores found here are trusted and pruned
+STORE_ROOT = os.environ.get('CORROSIGHT_STORE_DIR', os.path.join(user_cache_dir(), 'projections'))
+# Stores under STORE_ROOT are evicted least recently used first beyond this total size,
+# except those used within STORE_MIN_IDLE seconds, which a session may still be reading
+STORE_MAX_BYTES = int(float(os.environ.get('CORROSIGHT_STORE_MAX_MB', 2048)) * 2**20)
+STORE_MIN_IDLE = 3600
+MANIFEST = 'manifest.json'
+DEFAULT_STORE_DTYPE = np.float32
+# project_ffs_grid arguments, in order
+PROJECTION_INPUTS = ('pipe_diameter', 'pipe_thickness', 'corrosion_depth', 'corrosion_length', 'yield_stress',
+                     'uts', 'max_pressure', 'radial_corrosion_rate', 'axial_corrosion_rate',
+                     'inspection_year', 'projection_years')
+
+class ProjectionStore:
+    """Projection grids of any number of defects, one raw binary file per field.
+    
+    Each field file holds a C-ordered (defects, years) array, where column k is k
+    years after the defect's inspection. Defects are appended chunk by chunk, so a
+    network never has to be in memory at once. Defects with shorter projection
+    periods are NaN-padded. The manifest records the shape and dtype. A store is
+    only marked complete by close(); open() refuses incomplete ones. Reads are
+    np.memmap views, so a row range or a year column touches only its own pages.
+    """
+    
+    def __init__(self, path, manifest, writable=False):
+        self.path = Path(path)
+        self.manifest = manifest
+        self.writable = writable
+        self._files = {}
+        self._maps = {}
+    
+    @classmethod
+    def create(cls, path, years=None, dtype=DEFAULT_STORE_DTYPE, fields=FFS_GRID_FIELDS, overwrite=False):
+        """New empty store at directory `path`; `years` columns, or the first appended grid's width"""
+        path = Path(path)
+        if path.exists() and any(path.iterdir()):
+            # Only ever delete a directory that is itself a store
+            if not (overwrite and (path / MANIFEST).exists()):
+                raise ValueError(f"Projection store directory is not empty: {path}")
+            shutil.rmtree(path)
+        path.mkdir(parents=True, exist_ok=True)
+        manifest = {'version': STORE_VERSION, 'defects': 0, 'years': years, 'dtype': np.dtype(dtype).str,
+                    'fields': list(fields), 'complete': False}
+        store = cls(path, manifest, writable=True)
+        store._write_manifest()
+        return store
+    
+    @classmethod
+    def open(cls, path):
+        """Reopen a completed store read-only"""
+        path = Path(path)
+        try:
+            with open(path / MANIFEST, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"Not a projection store: {path}") from None
+        if manifest.get('version') != STORE_VERSION:
+            raise ValueError(f"Projection store version {manifest.get('version')} is not supported")
+        if not manifest['complete']:
+            raise ValueError(f"Projection store was never closed (interrupted write?): {path}")
+        return cls(path, manifest)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def __len__(self):
+        return self.manifest['defects']
+    
+    @property
+    def years(self):
+        return self.manifest['years'] or 0
+    
+    @property
+    def fields(self):
+        return tuple(self.manifest['fields'])
+    
+    def _write_manifest(self):
+        # Written to a temporary file first so a crash never leaves a torn manifest
+        temporary = self.path / (MANIFEST + '.tmp')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(temporary, self.path / MANIFEST)
+    
+    def _file(self, name):
+        if name not in self._files:
+            self._files[name] = open(self.path / f'{name}.bin', 'ab')
+        return self._files[name]
+    
+    def append(self, grid):
+        """Add the defects of a project_ffs_grid result (rows in order)"""
+        if not self.writable:
+            raise ValueError("Projection store is open read-only")
+        n, width = grid.shape
+        if self.manifest['years'] is None:
+            self.manifest['years'] = width
+        if width > self.years:
+            raise ValueError(f"Grid projects {width} years but the store holds {self.years}")
+        dtype = np.dtype(self.manifest['dtype'])
+        for field in self.fields:
+            block = np.full((n, self.years), np.nan, dtype=dtype)
+            block[:, :width] = grid[field]
+            self._file(field).write(block.tobytes())
+        inspection = grid['year'][:, 0] if width else np.zeros(n, dtype=np.int32)
+        self._file('inspection_year').write(inspection.astype(np.int32).tobytes())
+        self.manifest['defects'] += n
+        self._maps.clear()
+    
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+        self._maps.clear()
+        if self.writable:
+            self.manifest['complete'] = True
+            self._write_manifest()
+            self.writable = False
+    
+    def column(self, field):
+        """(defects, years) read-only memory map of one field"""
+        if field not in self._maps:
+            if field != 'inspection_year' and field not in self.fields:
+                raise KeyError(field)
+            if len(self) == 0:
+                shape = (0,) if field == 'inspection_year' else (0, self.years)
+                dtype = np.int32 if field == 'inspection_year' else self.manifest['dtype']
+                return np.empty(shape, dtype=dtype)
+            for f in self._files.values():
+                f.flush()
+            if field == 'inspection_year':
+                self._maps[field] = np.memmap(self.path / 'inspection_year.bin', dtype=np.int32, mode='r',
+                                              shape=(len(self),))
+            else:
+                self._maps[field] = np.memmap(self.path / f'{field}.bin', dtype=self.manifest['dtype'], mode='r',
+                                              shape=(len(self), self.years))
+        return self._maps[field]
+    
+    def year(self, field, elapsed):
+        """Strided view of `field` for every defect `elapsed` years after its inspection"""
+        return self.column(field)[:, elapsed]
+    
+    def history(self, row):
+        """{field: per-year values} of one defect"""
+        return {field: np.asarray(self.column(field)[row]) for field in self.fields}
+    
+    def frame(self, start=0, stop=None, fields=None):
+        """Long-format DataFrame (defect, year, fields) of rows start..stop, like ffs_grid_to_frame"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        fields = fields or self.fields
+        n = max(stop - start, 0)
+        year = np.asarray(self.column('inspection_year')[start:stop])[:, None] + np.arange(self.years)
+        frame = pd.DataFrame({'defect': np.repeat(np.arange(start, start + n), self.years), 'year': year.ravel()})
+        for field in fields:
+            frame[field] = np.asarray(self.column(field)[start:stop]).ravel()
+        return frame.dropna(subset=[fields[-1]]).reset_index(drop=True)
+    
+    def iter_frames(self, chunk_size=50_000, fields=None):
+        for start in range(0, len(self), chunk_size):
+            yield self.frame(start, start + chunk_size, fields)
+    
+    def export(self, path, chunk_size=50_000, fields=None):
+        """Stream the long-format projection to CSV, or to Parquet with one row group per chunk"""
+        path = Path(path)
+        if path.suffix.lower() == '.parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("Writing Parquet projections requires pyarrow") from e
+            writer = None
+            try:
+                for frame in self.iter_frames(chunk_size, fields):
+                    table = pa.Table.from_pandas(frame, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            for i, frame in enumerate(self.iter_frames(chunk_size, fields)):
+                frame.to_csv(path, mode='a' if i else 'w', header=not i, index=False)
+
+def project_anomalies(frame, dtype=DEFAULT_STORE_DTYPE):
+    """project_ffs_grid over an assessed or normalized anomaly table"""
+    return project_ffs_grid(*(frame[f].to_numpy(dtype=float) for f in PROJECTION_INPUTS), dtype=dtype)
+
+def build_projection_store(frame, path, chunk_size=50_000, years=None, dtype=DEFAULT_STORE_DTYPE, overwrite=False):
+    """Project every anomaly of `frame` into a new store at `path`, a chunk of rows at a time"""
+    if years is None and len(frame):
+        years = int(np.floor(frame['projection_years'].to_numpy(dtype=float).max())) + 1
+    with ProjectionStore.create(path, years, dtype, overwrite=overwrite) as store:
+        for start in range(0, len(frame), chunk_size):
+            store.append(project_anomalies(frame.iloc[start:start + chunk_size], dtype))
+    return ProjectionStore.open(path)
+
+def projection_key(frame):
+    """Content digest of the projection inputs of an anomaly table"""
+    hashes = pd.util.hash_pandas_object(frame[list(PROJECTION_INPUTS)].astype(float), index=False)
+    return hashlib.sha256(hashes.to_numpy().tobytes()).hexdigest()[:32]
+
+def _usage(path):
+    """(bytes, last use) of a store directory; reopening a store touches its manifest"""
+    size = 0
+    used = path.stat().st_mtime
+    for entry in os.scandir(path):
+        info = entry.stat()
+        size += info.st_size
+        used = max(used, info.st_mtime)
+    return size, used
+
+def prune_stores(root=STORE_ROOT, max_bytes=STORE_MAX_BYTES, min_idle=STORE_MIN_IDLE, keep=()):
+    """Delete the least recently used stores under `root` until the rest fit in `max_bytes`.
+    
+    Stores used within `min_idle` seconds and those named in `keep` are spared,
+    even if the total stays over the bound. Returns the names deleted.
+    """
+    stores = []
+    for path in Path(root).iterdir():
+        try:
+            if path.is_dir():
+                stores.append((*_usage(path), path))
+        except OSError:
+            # Renamed or deleted by another session meanwhile
+            continue
+    total = sum(size for size, _, _ in stores)
+    cutoff = time.time() - min_idle
+    deleted = []
+    for size, used, path in sorted(stores, key=lambda store: store[1]):
+        if total <= max_bytes:
+            break
+        if used >= cutoff or path.name in keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        deleted.append(path.name)
+    return deleted
+
+def open_or_build_store(frame, root=STORE_ROOT, chunk_size=50_000):
+    """The store for `frame` under `root`, reopened when an earlier session already built it.
+    
+    A new store is built in a private directory and renamed into place, so
+    concurrent builders of the same listing never see each other's partial files.
+    Building prunes `root` back under STORE_MAX_BYTES (see prune_stores).
+    """
+    path = Path(root) / projection_key(frame)
+    try:
+        store = ProjectionStore.open(path)
+    except ValueError:
+        pass
+    else:
+        try:
+            os.utime(path / MANIFEST)
+        except OSError:
+            pass
+        return store
+    Path(root).mkdir(mode=0o700, parents=True, exist_ok=True)
+    building = Path(tempfile.mkdtemp(prefix=path.name + '.', dir=root))
+    build_projection_store(frame, building, chunk_size, overwrite=True).close()
+    prune_stores(root, keep=(path.name, building.name))
+    try:
+        os.rename(building, path)
+    except OSError:
+        # Another session finished first, or a stale incomplete store is in the way
+        try:
+            store = ProjectionStore.open(path)
+        except ValueError:
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(building, path)
+        else:
+            shutil.rmtree(building, ignore_errors=True)
+            return store
+    return ProjectionStore.open(path)
@@ -0,0 +1,110 @@
+"""Parameter sweeps and one-at-a-time sensitivity over the `inputs` fields."""
+import math
+
+import numpy as np
+
+from corrosight_core import (
+    FFS_METHODS, INPUT_FIELDS, calculate_pressures_array, erf_array,
+    ffs_failure_years_array, remaining_life_array
+)
+
+DEFAULT_TILE_SIZE = 100_000
+
+def _evaluate(columns):
+    """Current ERF, whole failure year and fractional remaining life per method for flat columns"""
+    c = {field: np.asarray(columns[field], dtype=float) for field in INPUT_FIELDS}
+    D, t = c['pipe_diameter'], c['pipe_thickness']
+    d, L = c['corrosion_depth'], c['corrosion_length']
+    Sy, UTS = c['yield_stress'], c['uts']
+    growth = (c['max_pressure'], c['radial_corrosion_rate'], c['axial_corrosion_rate'])
+    
+    pressures = calculate_pressures_array(D, t, d, L, Sy, UTS)
+    life = remaining_life_array(D, t, d, L, Sy, UTS, *growth, np.floor(c['projection_years']))
+    failure_years = ffs_failure_years_array(
+        D, t, d, L, Sy, UTS, *growth, c['inspection_year'], c['projection_years'], life=life)
+    return {
+        'erf': {m: erf_array(c['max_pressure'], pressures[f'P_{m.lower()}']) for m in FFS_METHODS},
+        'failure_year': failure_years,
+        'remaining_life': life
+    }
+
+def relative_range(base_inputs, field, low, high, num=11):
+    """Values spanning base*(1+low) .. base*(1+high), e.g. (-0.1, 0.1) for +/-10% depth sizing"""
+    base = base_inputs[field]
+    return np.linspace(base * (1 + low), base * (1 + high), num)
+
+def sweep(base_inputs, ranges, tile_size=DEFAULT_TILE_SIZE):
+    """Evaluate the Cartesian grid of `ranges` ({field: values}) around `base_inputs`.
+    
+    Grid points are generated lazily tile by tile from flat indices, so working
+    memory is bounded by `tile_size` whatever the grid size; only the result
+    hypercubes (one axis per swept field, in `ranges` order) span the full grid.
+    Remaining life is NaN where ERF stays below 1 within the projection period.
+    """
+    unknown = set(ranges) - set(INPUT_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot sweep unknown input fields: {', '.join(sorted(unknown))}")
+    axes = {field: np.asarray(values, dtype=float).ravel() for field, values in ranges.items()}
+    shape = tuple(len(values) for values in axes.values())
+    size = math.prod(shape)
+    
+    cubes = {
+        'erf': {m: np.empty(size) for m in FFS_METHODS},
+        'failure_year': {m: np.empty(size) for m in FFS_METHODS},
+        'remaining_life': {m: np.empty(size) for m in FFS_METHODS}
+    }
+    for start in range(0, size, tile_size):
+        flat = np.arange(start, min(start + tile_size, size))
+        positions = np.unravel_index(flat, shape)
+        columns = {field: np.full(flat.size, float(base_inputs[field])) for field in INPUT_FIELDS}
+        for (field, values), position in zip(axes.items(), positions):
+            columns[field] = values[position]
+        tile = _evaluate(columns)
+        for metric, per_method in tile.items():
+            for method, values in per_method.items():
+                cubes[metric][method][flat] = values
+    
+    result = {'axes': axes}
+    for metric, per_method in cubes.items():
+        result[metric] = {method: values.reshape(shape) for method, values in per_method.items()}
+    result['critical_erf'] = np.maximum.reduce([result['erf'][m] for m in FFS_METHODS])
+    return result
+
+def tornado(base_inputs, bounds, metric='remaining_life'):
+    """One-at-a-time sensitivity ranking per method.
+    
+    `bounds` maps fields to (low, high) values. Every low/high variant and the base
+    case are evaluated together in one vectorized batch. A defect that survives its
+    projection period counts as the full period for remaining life, and as the year
+    after the horizon for failure year, so that swings stay finite and rankable.
+    Returns {method: [entry, ...]} sorted by descending swing.
+    """
+    fields = list(bounds)
+    n = 2 * len(fields) + 1
+    columns = {field: np.full(n, float(base_inputs[field])) for field in INPUT_FIELDS}
+    for k, field in enumerate(fields):
+        columns[field][2 * k], columns[field][2 * k + 1] = bounds[field]
+    values = _evaluate(columns)[metric]
+    # Survivor outcome per variant, since projection_years may itself be varied
+    horizon = np.floor(columns['projection_years'])
+    survived = {
+        'remaining_life': horizon,
+        'failure_year': columns['inspection_year'] + horizon + 1
+    }.get(metric)
+    
+    ranking = {}
+    for method in FFS_METHODS:
+        outcome = values[method]
+        if survived is not None:
+            outcome = np.where(np.isnan(outcome), survived, outcome)
+        entries = [{
+            'field': field,
+            'low': bounds[field][0],
+            'high': bounds[field][1],
+            'at_low': float(outcome[2 * k]),
+            'at_high': float(outcome[2 * k + 1]),
+            'base': float(outcome[-1]),
+            'swing': float(abs(outcome[2 * k + 1] - outcome[2 * k]))
+        } for k, field in enumerate(fields)]
+        ranking[method] = sorted(entries, key=lambda entry: entry['swing'], reverse=True)
+    return ranking
@@ -0,0 +1,86 @@
+"""Per-stage wall-clock timing of an app rerun, structured timing logs and cProfile capture."""
+import cProfile
+import io
+import json
+import logging
+import marshal
+import pstats
+import time
+from contextlib import contextmanager
+
+STAGES = ('compute', 'table build', 'figure build', 'figure encode', 'asset load')
+
+logger = logging.getLogger('corrosight.timing')
+
+class StageTimer:
+    """Exclusive wall-clock seconds and call counts per named stage.
+    
+    Stages may nest; time spent in an inner stage is charged to it alone, so the
+    stage totals never double count. stop() freezes elapsed() once the timed
+    work is over, e.g. a background job whose timings are shown later.
+    """
+    
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+        self.started = time.perf_counter()
+        self.stopped = None
+        self._nested = []
+    
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed - self._nested.pop()
+            self.counts[name] = self.counts.get(name, 0) + 1
+            if self._nested:
+                self._nested[-1] += elapsed
+    
+    def elapsed(self):
+        return (self.stopped or time.perf_counter()) - self.started
+    
+    def stop(self):
+        if self.stopped is None:
+            self.stopped = time.perf_counter()
+    
+    def summary(self):
+        """[{'stage', 'ms', 'calls', 'share'}, ...] for the known stages, anything else, and the untimed rest"""
+        total = self.elapsed()
+        names = list(STAGES) + sorted(set(self.totals) - set(STAGES))
+        rows = [{'stage': name, 'ms': self.totals.get(name, 0.0) * 1e3, 'calls': self.counts.get(name, 0)}
+                for name in names]
+        rows.append({'stage': 'other', 'ms': max(0.0, total - sum(self.totals.values())) * 1e3, 'calls': 0})
+        for row in rows:
+            row['share'] = row['ms'] / (total * 1e3) if total > 0 else 0.0
+        return rows
+    
+    def log(self, **context):
+        """Emit one JSON record with every stage's milliseconds on the `corrosight.timing` logger"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        record = {
+            'event': 'rerun_timing',
+            **context,
+            'total_ms': round(self.elapsed() * 1e3, 3),
+            'stages': {row['stage']: round(row['ms'], 3) for row in self.summary()}
+        }
+        logger.info(json.dumps(record))
+
+def profile_call(fn, *args, sort='cumulative', limit=30, **kwargs):
+    """Run `fn` under cProfile.
+    
+    Returns (result, report, stats_bytes): the top `limit` entries as text and the
+    raw statistics in the .prof format read by pstats, snakeviz and similar tools.
+    """
+    profile = cProfile.Profile()
+    try:
+        result = profile.runcall(fn, *args, **kwargs)
+    finally:
+        out = io.StringIO()
+        stats = pstats.Stats(profile, stream=out)
+        stats.sort_stats(sort).print_stats(limit)
+    return result, out.getvalue(), marshal.dumps(stats.stats)
@@ -0,0 +1,50 @@
+"""Input hashing and the persistent result cache."""
+import sqlite3
+
+from corrosight_cache import DiskCache, ResultCache, inputs_key
+
+def raw_cache(path, version, max_bytes=1000):
+    return DiskCache(path, max_bytes, version=version, encode=bytes, decode=bytes)
+
+def test_equal_inputs_hash_alike():
+    assert inputs_key({'a': 2023, 'b': [1, 2]}) == inputs_key({'b': [1.0, 2.0], 'a': 2023.0})
+    assert inputs_key({'a': 1}) != inputs_key({'a': 1}, pof_samples=10)
+
+def test_versions_coexist_and_are_served_only_to_their_own(tmp_path):
+    path = tmp_path / 'results.sqlite'
+    old = raw_cache(path, 'old')
+    old.put('k', b'old result')
+    new = raw_cache(path, 'new')
+    assert new.get('k') is None
+    new.put('k', b'new result')
+    assert (old.get('k'), new.get('k')) == (b'old result', b'new result')
+    assert len(new) == 2 and new.size_bytes() == 20
+
+def test_other_versions_age_out_by_least_recent_use(tmp_path):
+    path = tmp_path / 'results.sqlite'
+    raw_cache(path, 'old').put('stale', b'x' * 400)
+    new = raw_cache(path, 'new')
+    assert len(new) == 1
+    new.put('a', b'a' * 400)
+    new.get('a')
+    new.put('b', b'b' * 400)
+    assert (len(new), new.get('a'), new.get('b')) == (2, b'a' * 400, b'b' * 400)
+    assert raw_cache(path, 'old').get('stale') is None
+
+def test_files_of_an_older_layout_are_emptied(tmp_path):
+    path = tmp_path / 'results.sqlite'
+    with sqlite3.connect(path) as db:
+        db.execute('CREATE TABLE results (key TEXT PRIMARY KEY, version TEXT NOT NULL, size INTEGER NOT NULL, '
+                   'used REAL NOT NULL, value BLOB NOT NULL)')
+        db.execute("INSERT INTO results VALUES ('k', 'v', 1, 0, x'00')")
+    cache = raw_cache(path, 'v')
+    assert len(cache) == 0 and cache.size_bytes() == 0
+    cache.put('k', b'fresh')
+    assert cache.get('k') == b'fresh'
+
+def test_memory_misses_fall_back_to_disk(tmp_path):
+    disk = raw_cache(tmp_path / 'results.sqlite', 'v')
+    ResultCache(disk=disk).put('k', b'value')
+    cache = ResultCache(disk=disk)
+    assert cache.get_or_compute('k', lambda: b'recomputed') == b'value'
+    assert (cache.hits, cache.disk_hits, cache.misses) == (0, 1, 0)
@@ -0,0 +1,93 @@
+"""LTTB downsampling, percentile bands and density grids behind the bounded chart payloads."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import corrosight_charts
+from corrosight_charts import (
+    density_grid, downsample_curves, lttb, percentile_bands, population_chart, scatter_chart
+)
+
+def reference_lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets one point at a time"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    kept, a = [0], 0
+    for k in range(threshold - 2):
+        lo, hi = int(k * every) + 1, int((k + 1) * every) + 1
+        # The last bucket's successor is the last point
+        next_hi = min(int((k + 2) * every) + 1, n)
+        cx, cy = np.mean(x[hi:next_hi]), np.mean(y[hi:next_hi])
+        areas = [abs((x[a] - cx) * (y[p] - y[a]) - (x[a] - x[p]) * (cy - y[a])) for p in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        kept.append(a)
+    return np.array(kept + [n - 1])
+
+@pytest.mark.parametrize('n, threshold', [(1000, 50), (997, 400), (10, 3), (50, 49)])
+def test_lttb_matches_the_reference(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.sort(rng.uniform(0, 100, n))
+    y = np.cumsum(rng.normal(size=n))
+    assert np.array_equal(lttb(x, y, threshold), reference_lttb(x, y, threshold))
+
+def test_lttb_keeps_the_ends_and_the_peaks():
+    x = np.arange(5000.0)
+    y = np.sin(x / 300.0)
+    y[1234], y[3456] = 25.0, -25.0
+    kept = lttb(x, y, 100)
+    assert kept.size == 100 and kept[0] == 0 and kept[-1] == 4999
+    assert np.all(np.diff(kept) > 0)
+    assert {1234, 3456} <= set(kept)
+
+def test_short_curves_are_kept_whole():
+    assert np.array_equal(lttb(np.arange(10.0), np.ones(10), 400), np.arange(10))
+
+def test_downsampled_curves_drop_nans():
+    x = np.arange(2000.0)
+    frame = downsample_curves(x, {'a': np.where(x < 500, np.nan, x), 'b': np.sqrt(x)}, max_points=100)
+    assert frame.groupby('series').size().to_dict() == {'a': 100, 'b': 100}
+    assert frame['value'].notna().all()
+    assert frame[frame['series'] == 'a']['x'].min() == 500.0
+
+def test_bands_match_percentiles_per_point(monkeypatch):
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(200, 60))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[:, -5:] = np.nan
+    x = np.arange(2000, 2060)
+    # Blocks of a few columns must give what one pass does
+    monkeypatch.setattr(corrosight_charts, 'BAND_BLOCK', 7 * values.shape[0])
+    bands = percentile_bands(x, values, max_points=1000)
+    expected = np.nanpercentile(values[:, :-5], (5, 25, 50, 75, 95), axis=0)
+    assert list(bands['x']) == list(x[:-5])
+    for p, level in zip((5, 25, 50, 75, 95), expected):
+        np.testing.assert_allclose(bands[f'p{p}'], level)
+
+def test_bands_are_bounded_and_nested():
+    rng = np.random.default_rng(1)
+    values = np.cumsum(rng.normal(size=(500, 3000)), axis=1)
+    bands = percentile_bands(np.arange(3000), values, max_points=120)
+    assert len(bands) == 120
+    columns = bands[['p5', 'p25', 'p50', 'p75', 'p95']].to_numpy()
+    assert np.all(np.diff(columns, axis=1) >= 0)
+
+def test_density_grid_counts_every_finite_point():
+    rng = np.random.default_rng(2)
+    x, y = rng.normal(size=10_000), rng.normal(size=10_000)
+    x[:10] = np.nan
+    grid = density_grid(x, y, bins=20)
+    assert grid['count'].sum() == 9_990
+    assert len(grid) <= 400 and (grid['count'] > 0).all()
+
+def data_rows(chart):
+    spec = chart.to_dict()
+    return sum(len(rows) for rows in spec.get('datasets', {}).values())
+
+def test_chart_payloads_stay_bounded():
+    x = np.arange(2023, 2123)
+    values = np.random.default_rng(3).random((1000, x.size))
+    names = [f'S{i}' for i in range(1000)]
+    assert data_rows(population_chart(x, names, values, ['#000000'] * 1000, 'ERF', 'Year', 'ERF')) <= x.size
+    points = np.random.default_rng(4).random((2, 50_000))
+    chart = scatter_chart(points[0], points[1], [''] * 50_000, ['#000000'] * 50_000, 'Goodman', 'Mean', 'Amplitude')
+    assert data_rows(chart) <= corrosight_charts.DENSITY_BINS ** 2
@@ -0,0 +1,75 @@
+"""Headless scenario and anomaly runs: output tables, chunking and worker independence."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from corrosight_cli import main, run_anomalies, run_scenarios
+from corrosight_core import FFS_METHODS, INPUT_FIELDS, analyze_batch
+from corrosight_ingest import assess_ili_file
+
+PIPELINE = dict(yield_stress=450.0, uts=535.0, max_pressure=9.0, inspection_year=2023,
+                radial_corrosion_rate=0.15, axial_corrosion_rate=1.0, projection_years=25)
+
+def scenarios(rows=5):
+    return pd.DataFrame({'name': [f'S{i}' for i in range(rows)], 'pipe_thickness': 10.0, 'pipe_diameter': 610.0,
+                         'corrosion_length': np.linspace(50, 250, rows), 'corrosion_depth': np.linspace(1, 5, rows),
+                         'min_pressure': 2.0, **PIPELINE})
+
+def listing(rows=300):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'Feature ID': [f'A{i}' for i in range(rows)], 'Odometer (m)': np.arange(rows) * 10.0,
+                         'WT (mm)': 10.0, 'OD (mm)': 610.0, 'Depth (%)': rng.uniform(10, 60, rows),
+                         'Length (mm)': rng.uniform(20, 200, rows)})
+
+def test_scenario_outputs_match_the_batch_analysis(tmp_path):
+    frame = scenarios()
+    frame.to_csv(tmp_path / 'scenarios.csv', index=False)
+    output = tmp_path / 'results.csv'
+    assert run_scenarios(tmp_path / 'scenarios.csv', output, workers=1, chunk_size=2) == len(frame)
+    
+    summary = pd.read_csv(output)
+    expected = analyze_batch({field: frame[field].to_numpy() if field in frame else np.zeros(len(frame))
+                              for field in INPUT_FIELDS})
+    assert list(summary['name']) == list(frame['name'])
+    np.testing.assert_allclose(summary['P_dnv'], expected['pressures']['P_dnv'])
+    for method in FFS_METHODS:
+        np.testing.assert_allclose(summary[f'failure_year_{method.lower()}'], expected['failure_years'][method])
+    
+    projection = pd.read_csv(tmp_path / 'results_projection.csv')
+    assert set(projection['name']) == set(frame['name'])
+    assert projection.groupby('name')['year'].agg(['min', 'max']).eq([2023, 2048]).all().all()
+    assert not (tmp_path / 'results_pof.csv').exists()
+
+def test_scenario_results_do_not_depend_on_workers(tmp_path):
+    scenarios(7).to_parquet(tmp_path / 'scenarios.parquet')
+    run_scenarios(tmp_path / 'scenarios.parquet', tmp_path / 'one.parquet', workers=1, chunk_size=2,
+                  pof_samples=2000)
+    run_scenarios(tmp_path / 'scenarios.parquet', tmp_path / 'two.parquet', workers=2, chunk_size=2,
+                  pof_samples=2000)
+    for suffix in ('', '_projection', '_pof'):
+        pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / f'one{suffix}.parquet'),
+                                      pd.read_parquet(tmp_path / f'two{suffix}.parquet'))
+    pof = pd.read_parquet(tmp_path / 'one_pof.parquet')
+    assert (pof.groupby('name')['critical'].diff().dropna() >= 0).all()
+
+def test_missing_scenario_columns_are_reported(tmp_path, capsys):
+    scenarios().drop(columns='uts').to_csv(tmp_path / 'scenarios.csv', index=False)
+    assert main(['scenarios', str(tmp_path / 'scenarios.csv'), '-o', str(tmp_path / 'out.csv')]) == 1
+    assert 'uts' in capsys.readouterr().err
+
+def test_output_format_is_checked(tmp_path):
+    with pytest.raises(SystemExit):
+        main(['scenarios', str(tmp_path / 'scenarios.csv'), '-o', str(tmp_path / 'out.xlsx')])
+
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet', '.json'])
+def test_anomaly_outputs_match_one_pass(tmp_path, suffix):
+    listing().to_csv(tmp_path / 'run.csv', index=False)
+    output = tmp_path / f'assessed{suffix}'
+    assert run_anomalies(tmp_path / 'run.csv', output, workers=2, chunk_size=64, defaults=PIPELINE) == 300
+    read = {'.csv': pd.read_csv, '.parquet': pd.read_parquet,
+            '.json': lambda path: pd.read_json(path, orient='records')}[suffix]
+    assessed = read(output)
+    whole = assess_ili_file(tmp_path / 'run.csv', defaults=PIPELINE)
+    assert list(assessed['anomaly_id']) == list(whole['anomaly_id'])
+    np.testing.assert_allclose(assessed['critical_erf'], whole['critical_erf'])
+    np.testing.assert_allclose(assessed['failure_year_dnv'], whole['failure_year_dnv'])
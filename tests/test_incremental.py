@@ -0,0 +1,63 @@
+"""Incremental recompute against a full analysis."""
+import numpy as np
+import pytest
+
+from corrosight_core import INPUT_FIELDS, analyze_scenarios
+from corrosight_incremental import IncrementalAnalyzer, dirty_stages
+from corrosight_records import RESULT_SECTIONS
+from corrosight_timing import StageTimer
+
+# (field, new value) edits, each reaching a different part of the stage graph
+EDITS = [
+    ('corrosion_depth', 4.5), ('radial_corrosion_rate', 0.3), ('max_pressure', 9.0), ('min_pressure', 1.0),
+    ('uts', 600.0), ('inspection_year', 2030), ('projection_years', 45), ('projection_years', 12),
+    ('pipe_diameter', 914.0)
+]
+
+PIPELINE = dict(pipe_diameter=610.0, pipe_thickness=10.0, pipe_length=1000.0, corrosion_depth=3.0,
+                corrosion_length=100.0, yield_stress=450.0, uts=535.0, max_pressure=9.0, min_pressure=2.0,
+                inspection_year=2023, radial_corrosion_rate=0.15, axial_corrosion_rate=1.0, projection_years=30)
+
+def scenario(i):
+    rng = np.random.default_rng(i)
+    return {**PIPELINE, 'corrosion_depth': float(rng.uniform(1, 5)), 'corrosion_length': float(rng.uniform(20, 400)),
+            'max_pressure': float(rng.uniform(6, 12)), 'radial_corrosion_rate': float(rng.uniform(0.05, 0.3)),
+            'projection_years': int(rng.integers(10, 40))}
+
+def full_analysis(scenarios):
+    columns = {field: [inputs[field] for inputs in scenarios.values()] for field in INPUT_FIELDS}
+    return dict(zip(scenarios, analyze_scenarios(columns)))
+
+def assert_same_results(actual, expected):
+    assert list(actual) == list(expected)
+    for name in RESULT_SECTIONS:
+        assert dict(actual[name]) == pytest.approx(dict(expected[name]), rel=1e-12, nan_ok=True)
+    rows, expected_rows = actual['ffs_results']._rows, expected['ffs_results']._rows
+    assert rows.dtype == expected_rows.dtype
+    for field in rows.dtype.names:
+        np.testing.assert_allclose(rows[field], expected_rows[field], rtol=1e-12)
+
+def test_edits_recompute_to_the_full_analysis():
+    analyzer = IncrementalAnalyzer()
+    scenarios = {f'Dataset {i}': scenario(i) for i in range(6)}
+    analyzer.analyze(scenarios)
+    for k, (field, value) in enumerate(EDITS):
+        # Edit a different subset each time, so clean and dirty scenarios share a run
+        for name in list(scenarios)[k % 3::2]:
+            scenarios[name] = {**scenarios[name], field: value}
+        results = analyzer.analyze(scenarios)
+        expected = full_analysis(scenarios)
+        assert any(len(results[name]['failure_years']) for name in scenarios)
+        for name in scenarios:
+            assert_same_results(results[name], expected[name])
+
+def test_only_dirty_stages_run():
+    analyzer = IncrementalAnalyzer()
+    scenarios = {'a': scenario(0), 'b': scenario(1)}
+    analyzer.analyze(scenarios)
+    scenarios['a'] = {**scenarios['a'], 'max_pressure': 9.5}
+    timer = StageTimer()
+    analyzer.analyze(scenarios, timer=timer)
+    ran = {stage for stage, n in analyzer.last_run.items() if n}
+    assert ran == dirty_stages({'max_pressure'}) == set(timer.counts)
+    assert analyzer.last_run['erf'] == scenarios['a']['projection_years'] + 1
@@ -0,0 +1,93 @@
+"""Chainage range queries against a brute-force scan of the assessed table."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from corrosight_core import FFS_METHODS, calculate_pressures_array, projected_erf_array
+from corrosight_index import ChainageIndex
+from corrosight_ingest import assess_anomaly_chunk
+
+BELOW_ONE = 1 - 2e-8
+
+def listing(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'chainage': np.round(rng.uniform(0, 5000, n), 1),
+        'pipe_thickness': 10.0, 'pipe_diameter': 610.0, 'pipe_length': 12.0,
+        'corrosion_length': rng.uniform(10, 300, n), 'corrosion_depth': rng.uniform(0.5, 7.5, n),
+        'yield_stress': 450.0, 'uts': 535.0, 'max_pressure': rng.uniform(6, 11, n), 'min_pressure': 0.0,
+        'inspection_year': rng.choice([2019, 2021, 2023], n), 'radial_corrosion_rate': rng.uniform(0, 0.2, n),
+        'axial_corrosion_rate': rng.uniform(0, 2, n), 'projection_years': rng.choice([10, 20, 30], n)
+    }, index=pd.RangeIndex(100, 100 + n))
+    # Anomaly 0 sits just below the threshold: float32 would round its ERF up to 1
+    pressures = calculate_pressures_array(*(frame[f].to_numpy()[:1] for f in (
+        'pipe_diameter', 'pipe_thickness', 'corrosion_depth', 'corrosion_length', 'yield_stress', 'uts')))
+    frame.loc[100, 'max_pressure'] = min(p[0] for p in pressures.values()) * BELOW_ONE
+    frame.loc[100, 'radial_corrosion_rate'] = 0.0
+    frame.loc[100, 'axial_corrosion_rate'] = 0.0
+    return assess_anomaly_chunk(frame)
+
+def yearly_erf(assessed, year):
+    """Critical ERF of every anomaly in a calendar year, NaN outside its projection period"""
+    args = [assessed[f].to_numpy() for f in ('pipe_diameter', 'pipe_thickness', 'corrosion_depth',
+                                             'corrosion_length', 'yield_stress', 'uts', 'max_pressure',
+                                             'radial_corrosion_rate', 'axial_corrosion_rate')]
+    elapsed = year - assessed['inspection_year'].to_numpy()
+    inside = (elapsed >= 0) & (elapsed <= assessed['projection_years'].to_numpy())
+    erf = np.maximum.reduce([projected_erf_array(m, *args, np.clip(elapsed, 0, None)) for m in FFS_METHODS])
+    return np.where(inside, erf, np.nan)
+
+def brute_force(assessed, start, end, year=None):
+    inside = assessed[(assessed['chainage'] >= start) & (assessed['chainage'] <= end)]
+    erf = inside['critical_erf'] if year is None else pd.Series(yearly_erf(inside, year), index=inside.index)
+    failure = inside[[f'failure_year_{m.lower()}' for m in FFS_METHODS]].min(axis=1)
+    return {
+        'count': len(inside),
+        'max_critical_erf': erf.max() if erf.notna().any() else np.nan,
+        'earliest_failure_year': failure.min() if failure.notna().any() else np.nan,
+        'exceeding': int((erf >= 1.0).sum())
+    }
+
+@pytest.fixture(scope='module')
+def assessed():
+    return listing()
+
+@pytest.mark.parametrize('block_size', [1, 7, 64, 1000])
+def test_range_queries_match_a_scan(assessed, block_size):
+    index = ChainageIndex(assessed, block_size=block_size)
+    rng = np.random.default_rng(1)
+    for _ in range(60):
+        start, end = np.sort(rng.uniform(-100, 5100, 2))
+        year = None if rng.random() < 0.3 else int(rng.integers(index.years[0], index.years[-1] + 1))
+        result, expected = index.query(start, end, year), brute_force(assessed, start, end, year)
+        assert result['count'] == expected['count']
+        assert result['exceeding'] == expected['exceeding']
+        np.testing.assert_allclose(result['max_critical_erf'], expected['max_critical_erf'], rtol=1e-12)
+        np.testing.assert_equal(result['earliest_failure_year'], expected['earliest_failure_year'])
+        row = result['max_critical_erf_row']
+        if row is not None:
+            assert start <= assessed.loc[row, 'chainage'] <= end
+            scan_erf = assessed.loc[row, 'critical_erf'] if year is None else yearly_erf(assessed.loc[[row]], year)[0]
+            assert scan_erf == result['max_critical_erf']
+
+def test_erf_just_below_one_is_not_exceeding(assessed):
+    index = ChainageIndex(assessed)
+    chainage = assessed.loc[100, 'chainage']
+    erf, row = index.max_critical_erf(chainage, chainage)
+    assert np.float32(assessed.loc[100, 'critical_erf']) == 1.0
+    assert erf == assessed.loc[100, 'critical_erf'] < 1.0
+    assert index.count_exceeding(chainage, chainage) == 0
+    assert index.count_exceeding(chainage, chainage, year=assessed.loc[100, 'inspection_year']) == 0
+
+def test_empty_range_and_years_outside_the_projection(assessed):
+    index = ChainageIndex(assessed)
+    result = index.query(6000, 7000)
+    assert (result['count'], result['exceeding']) == (0, 0)
+    assert np.isnan(result['max_critical_erf']) and result['max_critical_erf_row'] is None
+    assert np.isnan(result['earliest_failure_year']) and result['earliest_failure_row'] is None
+    with pytest.raises(ValueError):
+        index.max_critical_erf(0, 5000, year=index.years[-1] + 1)
+
+def test_needs_chainage(assessed):
+    with pytest.raises(ValueError):
+        ChainageIndex(assessed.drop(columns='chainage'))
@@ -0,0 +1,87 @@
+"""ILI header resolution, unit handling and chunked assessment."""
+import io
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from corrosight_ingest import (
+    assess_anomaly_chunk, assess_ili_file, normalize_ili_chunk, read_ili_file, resolve_ili_columns,
+    unmapped_ili_columns
+)
+
+PIPELINE = dict(yield_stress=450.0, uts=535.0, max_pressure=7.0, inspection_year=2023,
+                radial_corrosion_rate=0.1, axial_corrosion_rate=1.0, projection_years=30)
+
+@pytest.mark.parametrize('header, expected', [
+    ('WT (mm)', ('pipe_thickness', 'mm')),
+    ('OD (mm)', ('pipe_diameter', 'mm')),
+    ('Odometer (m)', ('chainage', 'm')),
+    ('Odometer_m', ('chainage', 'm')),
+    ('KP', ('chainage', 'km')),
+    ('Depth (%)', ('corrosion_depth', '%')),
+    ('Depth [%WT]', ('corrosion_depth', '%wt')),
+    ('Max Depth %', ('corrosion_depth', '%')),
+    ('depth_pct', ('corrosion_depth', '%wt')),
+    ('Depth', ('corrosion_depth', None)),
+    ('Length [in]', ('corrosion_length', 'in')),
+    ('SMYS (psi)', ('yield_stress', 'psi')),
+    ('Clock', ('clock_position', None))
+])
+def test_vendor_headers_resolve_with_their_units(header, expected):
+    assert resolve_ili_columns([header]) == {header: expected}
+
+def test_d_is_not_taken_for_the_diameter():
+    assert resolve_ili_columns(['D']) == {}
+
+def test_first_alias_of_a_field_wins():
+    assert resolve_ili_columns(['WT', 'Wall Thickness']) == {'WT': ('pipe_thickness', None)}
+
+def test_header_units_are_converted():
+    raw = pd.DataFrame({'WT (in)': [0.5], 'OD (m)': [0.61], 'Depth (%)': [40.0], 'Length [in]': [2.0],
+                        'MAOP (bar)': [70.0]})
+    frame = normalize_ili_chunk(raw, resolve_ili_columns(raw.columns), defaults=PIPELINE)
+    assert frame['pipe_thickness'][0] == pytest.approx(12.7)
+    assert frame['pipe_diameter'][0] == pytest.approx(610.0)
+    # Percent of wall thickness, after the thickness itself is converted
+    assert frame['corrosion_depth'][0] == pytest.approx(0.4 * 12.7)
+    assert frame['corrosion_length'][0] == pytest.approx(50.8)
+    assert frame['max_pressure'][0] == pytest.approx(7.0)
+
+def test_percent_is_rejected_for_other_fields():
+    raw = pd.DataFrame({'WT (%)': [10.0], 'OD': [610.0], 'Depth': [2.0], 'Length': [50.0]})
+    with pytest.raises(ValueError, match='pipe_thickness'):
+        normalize_ili_chunk(raw, resolve_ili_columns(raw.columns), defaults=PIPELINE)
+
+def listing(rows=10, **extra):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'Feature ID': [f'A{i}' for i in range(rows)], 'Odometer (m)': np.arange(rows) * 10.0,
+                         'WT (mm)': 10.0, 'OD (mm)': 610.0, 'Depth (%)': rng.uniform(10, 50, rows),
+                         'Length (mm)': rng.uniform(20, 200, rows), **extra})
+
+def test_unmapped_numeric_columns_are_reported():
+    buffer = io.BytesIO(listing(Mystery=1.0, Comment='x').to_csv(index=False).encode())
+    buffer.name = 'run.csv'
+    assert unmapped_ili_columns(buffer) == ['Mystery']
+    assert buffer.tell() == 0
+    with pytest.warns(UserWarning, match='Mystery'):
+        read_ili_file(buffer, defaults=PIPELINE)
+
+def test_chunked_assessment_matches_one_pass(tmp_path):
+    path = tmp_path / 'run.csv'
+    listing(1000).to_csv(path, index=False)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        chunked = assess_ili_file(path, defaults=PIPELINE, chunksize=128)
+    whole = assess_anomaly_chunk(read_ili_file(path, defaults=PIPELINE, chunksize=10_000))
+    pd.testing.assert_frame_equal(chunked.reset_index(drop=True), whole.reset_index(drop=True))
+
+def test_large_listings_need_an_output_file(tmp_path):
+    path = tmp_path / 'run.csv'
+    listing(1000).to_csv(path, index=False)
+    with pytest.raises(ValueError, match='output file'):
+        assess_ili_file(path, defaults=PIPELINE, chunksize=128, max_rows=500)
+    output = tmp_path / 'assessed.csv'
+    assert assess_ili_file(path, defaults=PIPELINE, chunksize=128, output_path=output, max_rows=500) == 1000
+    assert len(pd.read_csv(output)) == 1000
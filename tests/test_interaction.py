@@ -0,0 +1,119 @@
+"""DNV interaction grouping and combined defects against a brute-force pairwise check."""
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from corrosight_core import calculate_pressures_array, erf_array
+from corrosight_ingest import assess_anomaly_chunk
+from corrosight_interaction import (
+    DNV_AXIAL_LIMIT, DNV_CIRCUMFERENTIAL_LIMIT, assess_interacting_defects, clock_to_degrees,
+    combine_interacting_defects, interaction_groups
+)
+
+def listing(n=80, seed=0, clock=True):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'chainage': np.round(rng.uniform(0, 15, n), 3),
+        'pipe_thickness': rng.choice([9.5, 12.7], n), 'pipe_diameter': 610.0, 'pipe_length': 12.0,
+        'corrosion_length': rng.uniform(5, 150, n), 'corrosion_depth': rng.uniform(0.5, 6, n),
+        'corrosion_width': rng.uniform(5, 100, n),
+        'yield_stress': 450.0, 'uts': 535.0, 'max_pressure': 9.0, 'min_pressure': 0.0,
+        'inspection_year': 2023, 'radial_corrosion_rate': 0.1, 'axial_corrosion_rate': 1.0, 'projection_years': 20
+    })
+    if clock:
+        frame['clock_position'] = [f'{h}:{m:02d}' for h, m in zip(rng.integers(1, 13, n), rng.integers(0, 60, n))]
+    return frame
+
+def interacts(a, b):
+    """DNV-RP-F101 interaction of two anomalies (rows), straight from the definition"""
+    first, second = (a, b) if a['chainage'] <= b['chainage'] else (b, a)
+    scale = max(np.sqrt(a['pipe_diameter'] * a['pipe_thickness']), np.sqrt(b['pipe_diameter'] * b['pipe_thickness']))
+    gap = second['chainage'] * 1000.0 - (first['chainage'] * 1000.0 + first['corrosion_length'])
+    if gap >= DNV_AXIAL_LIMIT * scale:
+        return False
+    if 'clock_position' not in a:
+        return True
+    angle = abs(clock_to_degrees([a['clock_position']])[0] - clock_to_degrees([b['clock_position']])[0])
+    arc = min(angle, 360.0 - angle) / 360.0 * np.pi * max(a['pipe_diameter'], b['pipe_diameter'])
+    return arc - (a['corrosion_width'] + b['corrosion_width']) / 2.0 < DNV_CIRCUMFERENTIAL_LIMIT * scale
+
+def brute_force_groups(frame):
+    """Partition of row positions into connected interaction components"""
+    parent = list(range(len(frame)))
+    
+    def root(k):
+        while parent[k] != k:
+            k = parent[k]
+        return k
+    
+    rows = [row for _, row in frame.iterrows()]
+    for a, b in itertools.combinations(range(len(frame)), 2):
+        if interacts(rows[a], rows[b]):
+            parent[root(b)] = root(a)
+    components = {}
+    for k in range(len(frame)):
+        components.setdefault(root(k), set()).add(k)
+    return sorted(components.values(), key=min)
+
+@pytest.mark.parametrize('seed, clock', [(0, True), (1, True), (2, False)])
+def test_groups_match_pairwise_check(seed, clock):
+    frame = listing(seed=seed, clock=clock)
+    groups = interaction_groups(frame)
+    found = sorted(({int(k) for k in np.flatnonzero(groups == g)} for g in np.unique(groups)), key=min)
+    expected = brute_force_groups(frame)
+    assert found == expected
+    assert any(len(component) > 1 for component in expected)
+    # Ids are numbered by axial position
+    first_chainage = [frame['chainage'].to_numpy()[groups == g].min() for g in range(groups.max() + 1)]
+    assert np.all(np.diff(first_chainage) >= 0)
+
+def brute_force_combined(frame, members):
+    """(n_combined, length, depth) of the governing run of adjacent defects in one group"""
+    rows = frame.iloc[sorted(members, key=lambda k: (frame['chainage'].iloc[k], k))]
+    start = rows['chainage'].to_numpy() * 1000.0
+    end = start + rows['corrosion_length'].to_numpy()
+    depth, length = rows['corrosion_depth'].to_numpy(), rows['corrosion_length'].to_numpy()
+    best = None
+    for n in range(len(rows)):
+        for m in range(n, len(rows)):
+            combined_length = end[n:m + 1].max() - start[n]
+            combined_depth = min((depth[n:m + 1] * length[n:m + 1]).sum() / combined_length, depth[n:m + 1].max())
+            first = rows.iloc[n]
+            pressures = calculate_pressures_array(*(np.array([value]) for value in (
+                first['pipe_diameter'], first['pipe_thickness'], combined_depth, combined_length,
+                first['yield_stress'], first['uts'])))
+            critical = max(erf_array(np.array([first['max_pressure']]), pressures[key])[0]
+                           for key in ('P_asme', 'P_dnv', 'P_pcorrc'))
+            if best is None or critical > best[0]:
+                best = (critical, m - n + 1, combined_length, combined_depth)
+    return best[1:]
+
+@pytest.mark.parametrize('seed', [0, 3])
+def test_combined_defects_match_every_run(seed):
+    frame = listing(seed=seed)
+    groups = interaction_groups(frame)
+    effective = combine_interacting_defects(frame, groups)
+    multi = [g for g in range(groups.max() + 1) if (groups == g).sum() >= 2]
+    assert list(effective['group']) == multi
+    for _, row in effective.iterrows():
+        members = np.flatnonzero(groups == row['group'])
+        assert row['n_defects'] == members.size
+        n_combined, length, depth = brute_force_combined(frame, members)
+        assert row['n_combined'] == n_combined
+        assert row['corrosion_length'] == pytest.approx(length)
+        assert row['corrosion_depth'] == pytest.approx(depth)
+
+def test_governing_defect_is_at_least_as_severe_as_its_members():
+    frame = listing(seed=4)
+    groups, assessed = assess_interacting_defects(frame)
+    single = assess_anomaly_chunk(frame)['critical_erf'].to_numpy()
+    for _, row in assessed.iterrows():
+        assert row['critical_erf'] >= single[groups == row['group']].max() * (1 - 1e-12)
+
+def test_isolated_defects_have_no_combined_rows():
+    frame = listing(n=3).assign(chainage=[0.0, 100.0, 200.0])
+    groups = interaction_groups(frame)
+    assert sorted(groups) == [0, 1, 2]
+    assert combine_interacting_defects(frame, groups).empty
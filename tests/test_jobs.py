@@ -0,0 +1,44 @@
+"""Background jobs: results, partials, cancellation and stage timings."""
+import threading
+import time
+
+from corrosight_jobs import JobManager
+
+def test_job_result_partials_and_timings():
+    manager = JobManager(workers=1)
+    
+    def work(job, n):
+        for i in range(n):
+            job.progress(i / n)
+            with job.timer.stage('compute'):
+                job.add_partial(i)
+        return n
+    
+    job = manager.submit('owner', 'analysis', 'Counting', work, 3)
+    assert job.wait(5)
+    assert (job.state, job.result, job.partials()) == ('done', 3, [0, 1, 2])
+    assert job.timer.counts == {'compute': 3}
+    elapsed = job.timer.elapsed()
+    time.sleep(0.01)
+    assert job.timer.elapsed() == elapsed
+    manager.shutdown()
+
+def test_replacement_cancels_the_running_job():
+    manager = JobManager(workers=2)
+    started = threading.Event()
+    
+    def spin(job):
+        started.set()
+        while True:
+            job.progress()
+            time.sleep(0.001)
+    
+    first = manager.submit('owner', 'analysis', 'Spinning', spin)
+    assert started.wait(5)
+    second = manager.submit('owner', 'analysis', 'Done', lambda job: 'ok')
+    assert second.wait(5) and first.done
+    assert (first.state, second.state, second.result) == ('cancelled', 'done', 'ok')
+    assert manager.get('owner', 'analysis') is second
+    manager.forget(second)
+    assert manager.jobs('owner') == []
+    manager.shutdown()
@@ -0,0 +1,111 @@
+"""Girth weld alignment, one-to-one anomaly matching and growth rates between ILI runs."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from corrosight_matching import (
+    _assign, apply_growth_rates, correct_chainage, growth_rates, match_girth_welds, match_ili_runs,
+    split_girth_welds
+)
+
+def odometer(chainage):
+    """A later run's odometer: 0.2% stretch, a 3 m offset and 1.5 m of slip after 600 m"""
+    chainage = np.asarray(chainage, dtype=float)
+    return 3.0 + chainage * 1.002 + np.where(chainage > 600.0, 1.5, 0.0)
+
+WELDS = np.arange(0.0, 1212.0, 12.0)
+
+def test_girth_welds_match_in_order():
+    i, j = match_girth_welds(WELDS, odometer(WELDS))
+    assert np.array_equal(i, np.arange(WELDS.size)) and np.array_equal(j, np.arange(WELDS.size))
+
+def test_missing_welds_are_skipped():
+    later = np.delete(odometer(WELDS), [5, 40, 41])
+    i, j = match_girth_welds(WELDS, later)
+    assert np.array_equal(WELDS[i], np.delete(WELDS, [5, 40, 41]))
+    assert np.array_equal(j, np.arange(later.size))
+
+def test_weld_correction_undoes_the_odometer_error():
+    chainage = np.random.default_rng(0).uniform(1.0, 1199.0, 200)
+    # Anomalies right at the slip are ambiguous within a joint; keep them clear of it
+    chainage = chainage[np.abs(chainage - 600.0) > 12.0]
+    i, j = match_girth_welds(WELDS, odometer(WELDS))
+    corrected = correct_chainage(odometer(chainage), odometer(WELDS)[j], WELDS[i])
+    np.testing.assert_allclose(corrected, chainage, atol=1e-9)
+
+def test_runs_match_only_after_weld_correction():
+    chainage = np.arange(5.0, 1200.0, 23.0)
+    chainage = chainage[np.abs(chainage - 600.0) > 12.0]
+    earlier = pd.DataFrame({'chainage': chainage, 'clock_position': 3.0},
+                           index=[f'a{k}' for k in range(chainage.size)])
+    later = pd.DataFrame({'chainage': odometer(chainage), 'clock_position': '3:15'})
+    matches = match_ili_runs(earlier, later, WELDS, odometer(WELDS))
+    assert list(matches['matched']) == list(earlier.index)
+    np.testing.assert_allclose(matches['axial_offset'], 0.0, atol=1e-9)
+    np.testing.assert_allclose(matches['clock_offset'], 7.5)
+    # Without the welds most of the line is beyond the axial tolerance
+    assert match_ili_runs(earlier, later)['matched'].isna().sum() > chainage.size // 2
+
+def test_split_girth_welds():
+    frame = pd.DataFrame({'chainage': [24.0, 5.0, 12.0, 7.0],
+                          'feature_type': ['GW', 'metal loss', 'Girth Weld', 'ML']})
+    anomalies, welds = split_girth_welds(frame)
+    assert list(anomalies['chainage']) == [5.0, 7.0]
+    assert np.array_equal(welds, [12.0, 24.0])
+
+def greedy(i, j, score):
+    """Best-first one-to-one assignment by a plain scan"""
+    used_i, used_j, pairs = set(), set(), set()
+    for k in np.argsort(score, kind='stable'):
+        if i[k] not in used_i and j[k] not in used_j:
+            used_i.add(i[k])
+            used_j.add(j[k])
+            pairs.add((i[k], j[k]))
+    return pairs
+
+@pytest.mark.parametrize('seed', range(5))
+def test_assignment_is_greedy_best_first(seed):
+    rng = np.random.default_rng(seed)
+    i, j = rng.integers(0, 30, 400), rng.integers(0, 30, 400)
+    unique = np.unique(np.c_[i, j], axis=0)
+    i, j = unique[:, 0], unique[:, 1]
+    score = rng.permutation(i.size).astype(float)
+    assigned_i, assigned_j = _assign(i, j, score)
+    assert len(set(assigned_i)) == assigned_i.size and len(set(assigned_j)) == assigned_j.size
+    assert set(zip(assigned_i, assigned_j)) == greedy(i, j, score)
+
+def test_nearer_candidate_wins_a_contested_anomaly():
+    earlier = pd.DataFrame({'chainage': [100.0, 100.8]})
+    later = pd.DataFrame({'chainage': [100.5, 100.7]})
+    assert list(match_ili_runs(earlier, later)['matched']) == [0, 1]
+
+def runs():
+    earlier = pd.DataFrame({'corrosion_depth': [2.0, 3.0, 4.0], 'corrosion_length': [50.0, 80.0, 30.0],
+                            'inspection_year': 2015}, index=['a', 'b', 'c'])
+    later = pd.DataFrame({'corrosion_depth': [3.6, 2.8, 4.8, 1.0], 'corrosion_length': [58.0, 80.0, 46.0, 20.0],
+                          'inspection_year': 2023, 'radial_corrosion_rate': 0.3, 'axial_corrosion_rate': 1.5})
+    matches = pd.DataFrame({'matched': ['a', 'b', 'c', np.nan]})
+    return earlier, later, matches
+
+def test_growth_rates_clip_shrinkage():
+    earlier, later, matches = runs()
+    rates = growth_rates(earlier, later, matches)
+    np.testing.assert_allclose(rates['radial_corrosion_rate'], [0.2, 0.0, 0.1, np.nan])
+    np.testing.assert_allclose(rates['axial_corrosion_rate'], [1.0, 0.0, 2.0, np.nan])
+    raw = growth_rates(earlier, later, matches, clip_negative=False)
+    np.testing.assert_allclose(raw['radial_corrosion_rate'], [0.2, -0.025, 0.1, np.nan])
+
+def test_growth_needs_a_later_inspection():
+    earlier, later, matches = runs()
+    with pytest.raises(ValueError, match='after'):
+        growth_rates(earlier, later.assign(inspection_year=2015), matches)
+
+def test_unmatched_anomalies_get_the_median_rate():
+    earlier, later, matches = runs()
+    rates = growth_rates(earlier, later, matches)
+    filled = apply_growth_rates(later, rates)
+    np.testing.assert_allclose(filled['radial_corrosion_rate'], [0.2, 0.0, 0.1, 0.1])
+    np.testing.assert_allclose(filled['axial_corrosion_rate'], [1.0, 0.0, 2.0, 1.0])
+    kept = apply_growth_rates(later, rates, fill=None)
+    np.testing.assert_allclose(kept['radial_corrosion_rate'], [0.2, 0.0, 0.1, 0.3])
+    assert later['radial_corrosion_rate'].eq(0.3).all()
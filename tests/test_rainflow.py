@@ -0,0 +1,64 @@
+"""Rainflow counting against a plain sequential four-point reference."""
+import numpy as np
+import pytest
+
+from corrosight_rainflow import RainflowCounter
+
+def reference_rainflow(levels):
+    """{(low, high): cycles} of a whole integer history: reversals, four-point closure, residue as half cycles"""
+    reversals = []
+    for level in levels:
+        if reversals and level == reversals[-1]:
+            continue
+        if len(reversals) >= 2 and (reversals[-1] - reversals[-2]) * (level - reversals[-1]) > 0:
+            reversals[-1] = level
+        else:
+            reversals.append(level)
+    counts, stack = {}, []
+    for point in reversals:
+        stack.append(point)
+        while len(stack) >= 4:
+            a, b, c, d = stack[-4:]
+            if abs(c - b) <= abs(b - a) and abs(c - b) <= abs(d - c):
+                key = (min(b, c), max(b, c))
+                counts[key] = counts.get(key, 0.0) + 1.0
+                del stack[-3:-1]
+            else:
+                break
+    for b, c in zip(stack[:-1], stack[1:]):
+        key = (min(b, c), max(b, c))
+        counts[key] = counts.get(key, 0.0) + 0.5
+    return counts
+
+def counted(counter):
+    histogram = counter.histogram()
+    keys = zip(np.rint(histogram['p_low'] / counter.resolution).astype(int).tolist(),
+               np.rint(histogram['p_high'] / counter.resolution).astype(int).tolist())
+    return dict(zip(keys, histogram['cycles'].tolist()))
+
+def feed(levels, chunks, seed=0):
+    counter = RainflowCounter(resolution=1.0)
+    cuts = np.sort(np.random.default_rng(seed).choice(np.arange(1, len(levels)), chunks - 1, replace=False))
+    for part in np.split(np.asarray(levels, dtype=float), cuts):
+        counter.update(part)
+    return counter
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('chunks', [1, 7, 200])
+def test_matches_reference_for_any_chunking(seed, chunks):
+    rng = np.random.default_rng(seed)
+    levels = np.cumsum(rng.integers(-20, 21, 2000))
+    assert counted(feed(levels, chunks, seed)) == reference_rainflow(levels.tolist())
+
+def test_final_point_closes_the_cycle_it_encloses():
+    # The last chunk only extends the open excursion, which then encloses 2 -> 5
+    counter = feed([0, 10, 2, 5, 4], 1)
+    counter.update([-10])
+    assert counted(counter) == reference_rainflow([0, 10, 2, 5, 4, -10]) == {
+        (2, 5): 1.0, (0, 10): 0.5, (-10, 10): 0.5}
+
+def test_partial_histogram_leaves_the_counter_untouched():
+    counter = feed([0, 10, 2, 5], 1)
+    counter.histogram()
+    counter.update([-10, 0])
+    assert counted(counter) == reference_rainflow([0, 10, 2, 5, -10, 0])
@@ -0,0 +1,48 @@
+"""Result containers: dict read API, read-only storage and the binary encoding."""
+import numpy as np
+import pytest
+
+from corrosight_core import analyze_inputs
+from corrosight_records import RESULT_SECTIONS, ScenarioResults
+
+@pytest.fixture(scope='module')
+def results():
+    # Fails within the horizon under some methods only, so the sparse sections have gaps
+    return analyze_inputs(dict(pipe_diameter=610.0, pipe_thickness=10.0, pipe_length=1000.0, corrosion_depth=3.0,
+                               corrosion_length=100.0, yield_stress=450.0, uts=535.0, max_pressure=9.0,
+                               min_pressure=2.0, inspection_year=2023, radial_corrosion_rate=0.15,
+                               axial_corrosion_rate=1.0, projection_years=30))
+
+def with_pof(results):
+    pof = {'year': 2023 + np.arange(31), 'ASME': np.linspace(0, 0.2, 31), 'n_samples': 1000}
+    return ScenarioResults({name: results[name] for name in RESULT_SECTIONS}, results['ffs_results']._rows, pof)
+
+def test_sparse_sections_read_like_the_dicts_they_replace(results):
+    failure_years = results['failure_years']
+    assert 0 < len(failure_years) < 3
+    assert all(isinstance(year, int) for year in failure_years.values())
+    assert set(failure_years) == set(results['remaining_life'])
+    missing = ({'ASME', 'DNV', 'PCORRC'} - set(failure_years)).pop()
+    with pytest.raises(KeyError):
+        failure_years[missing]
+
+def test_projection_is_read_only(results):
+    rows = results['ffs_results']
+    assert rows[0]['year'] == 2023 and len(rows) == 31
+    with pytest.raises(ValueError):
+        rows['erf_asme'][0] = 0.0
+
+@pytest.mark.parametrize('pof', [False, True])
+def test_bytes_round_trip(results, pof):
+    original = with_pof(results) if pof else results
+    decoded = ScenarioResults.from_bytes(original.to_bytes())
+    assert list(decoded) == list(original)
+    for name in RESULT_SECTIONS:
+        assert dict(decoded[name]) == dict(original[name])
+        assert [type(v) for v in decoded[name].values()] == [type(v) for v in original[name].values()]
+    np.testing.assert_array_equal(decoded['ffs_results']._rows, original['ffs_results']._rows)
+    assert decoded['ffs_results']._rows.dtype == original['ffs_results']._rows.dtype
+    if pof:
+        assert decoded['pof']['n_samples'] == 1000
+        np.testing.assert_array_equal(decoded['pof']['ASME'], original['pof']['ASME'])
+    assert decoded.to_bytes() == original.to_bytes()
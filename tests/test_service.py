@@ -0,0 +1,92 @@
+"""Request validation and batch coalescing of the local assessment service."""
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import corrosight_service
+from corrosight_core import DEFAULT_INPUTS, INPUT_FIELDS, analyze_batch
+from corrosight_service import AssessmentService, BatchCoalescer, request_columns
+
+DEFECT = dict(DEFAULT_INPUTS, pipe_thickness=10.0, pipe_diameter=610.0, corrosion_length=100.0,
+              corrosion_depth=3.0, yield_stress=450.0, uts=535.0, max_pressure=7.0, min_pressure=2.0,
+              radial_corrosion_rate=0.15, axial_corrosion_rate=1.0, projection_years=30)
+
+def test_records_and_columns_agree():
+    records = [dict(DEFECT, corrosion_depth=depth) for depth in (1.0, 2.0, 3.0)]
+    columns = dict(DEFECT, corrosion_depth=[1.0, 2.0, 3.0])
+    rows, from_records = request_columns({'defects': records})
+    assert rows == 3
+    _, from_columns = request_columns({'defects': columns})
+    for field in INPUT_FIELDS:
+        assert np.array_equal(from_records[field], from_columns[field])
+
+@pytest.mark.parametrize('field, value', [
+    ('projection_years', float('nan')), ('projection_years', 1e9), ('inspection_year', 1e12),
+    ('corrosion_depth', float('inf')), ('pipe_thickness', -1.0)
+])
+def test_out_of_range_values_are_rejected(field, value):
+    with pytest.raises(ValueError, match=field):
+        request_columns({'defects': [dict(DEFECT, **{field: value})]})
+
+def test_missing_fields_need_defaults():
+    defect = {key: value for key, value in DEFECT.items() if key != 'uts'}
+    with pytest.raises(ValueError, match='uts'):
+        request_columns({'defects': [defect]})
+    rows, columns = request_columns({'defects': [defect], 'defaults': {'uts': 535.0}})
+    assert columns['uts'][0] == 535.0
+
+def submit_all(coalescer, bodies, projection=False):
+    futures = []
+    for body in bodies:
+        rows, columns = request_columns({'defects': body})
+        futures.append(coalescer.submit(columns, rows, projection))
+    return [future.exception(timeout=30) or future.result()[0] for future in futures]
+
+def test_coalesced_results_are_each_requests_own_slice():
+    bodies = [[dict(DEFECT, corrosion_depth=depth, projection_years=years)] * 2
+              for depth, years in ((1.0, 10), (2.0, 30), (4.0, 20))]
+    with ThreadPoolExecutor(1) as pool:
+        coalescer = BatchCoalescer(pool, 1, window=0.05)
+        parts = submit_all(coalescer, bodies, projection=True)
+        coalescer.close()
+    assert coalescer.batches == 1 and coalescer.batched_requests == 3
+    for body, part in zip(bodies, parts):
+        expected = analyze_batch({field: [defect[field] for defect in body] for field in INPUT_FIELDS})
+        assert np.array_equal(part['pressures']['P_asme'], expected['pressures']['P_asme'])
+        assert np.array_equal(part['failure_years']['PCORRC'], expected['failure_years']['PCORRC'],
+                              equal_nan=True)
+        assert part['projection'].shape == (2, body[0]['projection_years'] + 1)
+
+def test_failing_request_does_not_fail_its_batch(monkeypatch):
+    def evaluate_batch(columns, projection=False):
+        if np.any(columns['pipe_thickness'] == 13.0):
+            raise ValueError("bad defect")
+        return analyze_batch(columns)
+    
+    monkeypatch.setattr(corrosight_service, 'evaluate_batch', evaluate_batch)
+    bodies = [[DEFECT], [dict(DEFECT, pipe_thickness=13.0)], [DEFECT], [DEFECT]]
+    with ThreadPoolExecutor(1) as pool:
+        coalescer = BatchCoalescer(pool, 1, window=0.05)
+        outcomes = submit_all(coalescer, bodies)
+        coalescer.close()
+    assert isinstance(outcomes[1], ValueError)
+    assert all(isinstance(outcome, dict) for i, outcome in enumerate(outcomes) if i != 1)
+
+def test_failed_split_completes_every_request(monkeypatch):
+    monkeypatch.setattr(corrosight_service, 'evaluate_batch', lambda columns, projection=False: {})
+    with ThreadPoolExecutor(1) as pool:
+        coalescer = BatchCoalescer(pool, 1, window=0.05)
+        outcomes = submit_all(coalescer, [[DEFECT], [DEFECT], [DEFECT]])
+        coalescer.close()
+    assert all(isinstance(outcome, KeyError) for outcome in outcomes)
+
+class _StalledCoalescer:
+    def submit(self, columns, rows, projection=False):
+        return Future()
+
+def test_unanswered_request_times_out():
+    service = AssessmentService.__new__(AssessmentService)
+    service.coalescer, service.timeout = _StalledCoalescer(), 0.05
+    with pytest.raises(TimeoutError, match='0.05 s'):
+        service.assess({'defects': [DEFECT]})
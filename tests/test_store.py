@@ -0,0 +1,63 @@
+"""Memory-mapped projection stores and their eviction."""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from corrosight_cli import run_anomalies
+from corrosight_cache import user_cache_dir
+from corrosight_store import (
+    STORE_ROOT, ProjectionStore, build_projection_store, open_or_build_store, prune_stores
+)
+
+PIPELINE = dict(yield_stress=450.0, uts=535.0, max_pressure=7.0, inspection_year=2023,
+                radial_corrosion_rate=0.1, axial_corrosion_rate=1.0, projection_years=20)
+
+def anomalies(depth, years=20):
+    return pd.DataFrame({'pipe_diameter': 610.0, 'pipe_thickness': 10.0, 'corrosion_depth': depth,
+                         'corrosion_length': 100.0, **{f: float(v) for f, v in PIPELINE.items()},
+                         'projection_years': years})
+
+def age(path, seconds):
+    past = time.time() - seconds
+    for name in os.listdir(path):
+        os.utime(path / name, (past, past))
+    os.utime(path, (past, past))
+
+def test_store_matches_projection_and_pads_short_rows(tmp_path):
+    frame = anomalies([2.0, 3.0, 4.0], years=[5, 20, 10])
+    with build_projection_store(frame, tmp_path / 'store', chunk_size=2) as store:
+        assert (len(store), store.years) == (3, 21)
+        erf = store.column('critical_erf')
+        assert np.isnan(erf[0, 6:]).all() and not np.isnan(erf[0, :6]).any()
+        assert list(store.year('depth', 0)) == [2.0, 3.0, 4.0]
+
+@pytest.mark.skipif('CORROSIGHT_STORE_DIR' in os.environ, reason="store root set explicitly")
+def test_default_root_is_private_to_the_user():
+    assert os.path.dirname(STORE_ROOT) == user_cache_dir()
+
+def test_least_recently_used_stores_are_evicted(tmp_path):
+    root = tmp_path / 'projections'
+    stores = [open_or_build_store(anomalies([depth]), root) for depth in (1.0, 2.0, 3.0)]
+    assert root.stat().st_mode & 0o777 == 0o700
+    paths = [store.path for store in stores]
+    for path, hours in zip(paths, (3, 2, 1)):
+        age(path, hours * 3600)
+    # Reopening marks the oldest store as used again
+    open_or_build_store(anomalies([1.0]), root)
+    size = sum(f.stat().st_size for f in paths[0].iterdir())
+    assert prune_stores(root, max_bytes=size, min_idle=1800) == [paths[1].name, paths[2].name]
+    assert prune_stores(root, max_bytes=0, min_idle=1800) == []
+    assert [path.exists() for path in paths] == [True, False, False]
+
+def test_cli_sizes_the_store_from_the_listing(tmp_path):
+    listing = tmp_path / 'run.csv'
+    pd.DataFrame({'WT': 10.0, 'OD': 610.0, 'Depth': [2.0, 3.0], 'Length': 100.0,
+                  'Years': [10, 40]}).to_csv(listing, index=False)
+    run_anomalies(listing, tmp_path / 'out.csv', workers=1, chunk_size=1, defaults=PIPELINE,
+                  column_map={'Years': 'projection_years'}, projection_store=tmp_path / 'store')
+    store = ProjectionStore.open(tmp_path / 'store')
+    assert store.years == 41
+    assert list(np.isnan(store.column('critical_erf')).sum(axis=1)) == [30, 0]
@@ -0,0 +1,46 @@
+"""Sweep hypercubes and tornado rankings."""
+import numpy as np
+import pytest
+
+from corrosight_core import FFS_METHODS
+from corrosight_sweep import sweep, tornado
+
+BASE = dict(pipe_diameter=610.0, pipe_thickness=10.0, pipe_length=1000.0, corrosion_depth=3.0,
+            corrosion_length=100.0, yield_stress=450.0, uts=535.0, max_pressure=11.0, min_pressure=2.0,
+            inspection_year=2023, radial_corrosion_rate=0.1, axial_corrosion_rate=1.0, projection_years=30)
+
+# The base case survives the horizon; only the high depth and rate variants fail within it
+BOUNDS = {'uts': (500.0, 570.0), 'radial_corrosion_rate': (0.05, 0.3), 'corrosion_length': (90.0, 110.0),
+          'corrosion_depth': (1.0, 6.0)}
+
+@pytest.mark.parametrize('metric', ['failure_year', 'remaining_life'])
+def test_survivors_rank_by_finite_swings(metric):
+    ranking = tornado(BASE, BOUNDS, metric)
+    for method in FFS_METHODS:
+        swings = [entry['swing'] for entry in ranking[method]]
+        assert np.all(np.isfinite(swings))
+        assert swings == sorted(swings, reverse=True)
+    assert [entry['field'] for entry in ranking['ASME'][:2]] == ['corrosion_depth', 'radial_corrosion_rate']
+    depth = ranking['ASME'][0]
+    survived = 2023 + 30 + 1 if metric == 'failure_year' else 30
+    assert depth['base'] == depth['at_low'] == survived
+
+def test_failure_year_and_remaining_life_rank_alike():
+    by_year = tornado(BASE, BOUNDS, 'failure_year')
+    by_life = tornado(BASE, BOUNDS, 'remaining_life')
+    for method in FFS_METHODS:
+        assert [e['field'] for e in by_year[method]] == [e['field'] for e in by_life[method]]
+
+def test_varied_horizon_uses_its_own_survivor_outcome():
+    entry, = tornado(BASE, {'projection_years': (10, 20)}, 'failure_year')['ASME']
+    assert (entry['at_low'], entry['at_high'], entry['swing']) == (2034.0, 2044.0, 10.0)
+
+def test_sweep_matches_single_evaluations():
+    ranges = {'corrosion_depth': [2.0, 4.0, 6.0], 'max_pressure': [8.0, 11.0]}
+    grid = sweep(BASE, ranges, tile_size=4)
+    for i, depth in enumerate(ranges['corrosion_depth']):
+        for j, pressure in enumerate(ranges['max_pressure']):
+            point = sweep(BASE, {'corrosion_depth': [depth], 'max_pressure': [pressure]})
+            for method in FFS_METHODS:
+                np.testing.assert_allclose(grid['erf'][method][i, j], point['erf'][method][0, 0])
+                np.testing.assert_equal(grid['failure_year'][method][i, j], point['failure_year'][method][0, 0])
@@ -0,0 +1,59 @@
+"""Server-side table paging and threshold styling."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from corrosight_tables import highlight_threshold, page_bounds, page_count, page_slice, threshold_styles
+
+@pytest.mark.parametrize('n_rows, page_size, pages', [(0, 200, 1), (1, 200, 1), (200, 200, 1), (201, 200, 2),
+                                                      (1000, 7, 143)])
+def test_page_count(n_rows, page_size, pages):
+    assert page_count(n_rows, page_size) == pages
+
+def test_pages_cover_every_row_once():
+    rows = []
+    for page in range(1, page_count(1000, 7) + 1):
+        start, stop = page_bounds(1000, page, 7)
+        rows.extend(range(start, stop))
+    assert rows == list(range(1000))
+
+def test_out_of_range_pages_are_clamped():
+    assert page_bounds(1000, 0, 200) == (0, 200)
+    assert page_bounds(1000, 99, 200) == (800, 1000)
+    assert page_bounds(0, 3, 200) == (0, 0)
+
+def table(rows=500):
+    rng = np.random.default_rng(0)
+    erf = np.round(rng.uniform(0.2, 1.4, rows), 1)
+    erf[rng.random(rows) < 0.1] = np.nan
+    return pd.DataFrame({'anomaly_id': [f'A{i}' for i in range(rows)], 'critical_erf': erf,
+                         'failure_year_dnv': rng.choice([2030.0, 2040.0, np.nan], rows)},
+                        index=pd.RangeIndex(1000, 1000 + rows))
+
+@pytest.mark.parametrize('ascending', [True, False])
+def test_sorted_pages_match_a_full_sort(ascending):
+    frame = table()
+    expected = frame.sort_values('critical_erf', ascending=ascending, kind='stable', na_position='last')
+    pages = [page_slice(frame, page, 64, sort_by='critical_erf', ascending=ascending)
+             for page in range(1, page_count(len(frame), 64) + 1)]
+    pd.testing.assert_frame_equal(pd.concat(pages), expected)
+
+def test_unsorted_page_is_a_view_of_its_rows():
+    frame = table()
+    pd.testing.assert_frame_equal(page_slice(frame, 2, 64), frame.iloc[64:128])
+
+@pytest.mark.parametrize('inclusive', [True, False])
+def test_threshold_styles_match_a_cell_by_cell_check(inclusive):
+    frame = table(50)
+    styles = threshold_styles(frame, ['critical_erf'], 1.0, 'color: red', 'color: green', inclusive)
+    for label, value in frame['critical_erf'].items():
+        exceeds = value >= 1.0 if inclusive else value > 1.0
+        assert styles.loc[label, 'critical_erf'] == ('color: red' if exceeds else 'color: green')
+    assert (styles[['anomaly_id', 'failure_year_dnv']] == '').all().all()
+
+def test_highlighted_page_renders_styles_and_formats():
+    frame = page_slice(table(), 1, 20)
+    html = highlight_threshold(frame, ['critical_erf'], 1.0, 'background-color: #ffcccc', '',
+                               formats={'critical_erf': '{:.3f}'}).to_html()
+    assert 'background-color: #ffcccc' in html
+    assert f"{frame['critical_erf'].dropna().iloc[0]:.3f}" in html